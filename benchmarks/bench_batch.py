@@ -0,0 +1,96 @@
+"""
+Per-prompt overhead of ask_chatgpt_batch against one ask_chatgpt_tool call per prompt.
+
+Calls the real FastMCP server through an in-memory client session against the
+simulated app. Answers are generated almost instantly, so the time per prompt
+is mostly overhead: checking the app, bringing it forward, finding the
+controls, pasting and detecting completion.
+
+A batch does the setup (checking the session, finding the action button)
+once instead of once per prompt; "setup" is the time spent in it per prompt.
+"start wait" is the time per prompt spent waiting for the button to show
+that generation started. An answer this quick is often complete before the
+first sample; it is detected as soon as a sample shows text after the
+prompt. A single call then waits for the text to settle and reads it; a
+batch sends the next prompt straight away and reads the answer from the
+conversation model meanwhile. Also shows a batch with a deadline of half
+the time the batch took, which cuts it short:
+
+    python benchmarks/bench_batch.py [prompts]
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+os.environ.setdefault("CHATGPT_MCP_OSASCRIPT", os.path.join(HERE, "fake_osascript.py"))
+os.environ.setdefault("FAKE_CHATGPT_STATE", os.path.join(tempfile.mkdtemp(), "state.json"))
+os.environ.setdefault("FAKE_CHATGPT_START_DELAY", "0.05")
+os.environ.setdefault("FAKE_CHATGPT_SPEED", "5000")
+os.environ.setdefault("FAKE_CHATGPT_RESPONSE_LENGTH", "200")
+
+from mcp.shared.memory import create_connected_server_and_client_session  # noqa: E402
+from simulated_chatgpt import SimulatedChatGPT  # noqa: E402
+from chatgpt_mcp.chatgpt_mcp import mcp  # noqa: E402
+from chatgpt_mcp.metrics import get_metrics  # noqa: E402
+from chatgpt_mcp.readiness import phase_stats  # noqa: E402
+
+SETUP_SPANS = ["ask_chatgpt.ensure_ready", "ask_chatgpt_batch.ensure_ready", "prepare_chatgpt"]
+
+
+def counters():
+    """Seconds spent in setup and in the start wait so far"""
+    spans = get_metrics().snapshot()["spans"]
+    setup = sum(spans[name]["sum"] for name in SETUP_SPANS if name in spans)
+    return setup, phase_stats().get("start", {}).get("seconds", 0.0)
+
+
+def report(label: str, simulator: SimulatedChatGPT, count: int, elapsed: float, answered: int, before):
+    calls = sum(simulator.call_counts().values())
+    setup, start_wait = (after - earlier for after, earlier in zip(counters(), before))
+    print(f"{label:24s} {elapsed:6.1f}s  {elapsed / count:5.2f}s/prompt  "
+          f"{calls / count:5.1f} scripts/prompt  setup {setup / count * 1000:5.1f}ms/prompt  "
+          f"start wait {start_wait / count:4.2f}s/prompt  answered {answered}/{count}")
+
+
+async def run(count: int):
+    simulator = SimulatedChatGPT()
+    prompts = [f"Batch question number {i}?" for i in range(count)]
+
+    async with create_connected_server_and_client_session(mcp._mcp_server) as session:
+        simulator.reset()
+        before = counters()
+        start = time.perf_counter()
+        answered = 0
+        for prompt in prompts:
+            result = await session.call_tool("ask_chatgpt_tool", {"prompt": prompt})
+            answered += prompt in result.content[0].text
+        report("one call per prompt", simulator, count, time.perf_counter() - start, answered, before)
+
+        simulator.reset()
+        before = counters()
+        start = time.perf_counter()
+        result = await session.call_tool("ask_chatgpt_batch", {"prompts": prompts})
+        entries = [json.loads(content.text) for content in result.content]
+        answered = sum(1 for e in entries if e["prompt"] in e.get("response", ""))
+        elapsed = time.perf_counter() - start
+        report("ask_chatgpt_batch", simulator, count, elapsed, answered, before)
+
+        simulator.reset()
+        timeout = round(elapsed / 2, 1)
+        result = await session.call_tool("ask_chatgpt_batch", {"prompts": prompts, "timeout": timeout})
+        entries = [json.loads(content.text) for content in result.content]
+        failed = [e for e in entries if "error" in e]
+        print(f"batch with a {timeout:.1f}s deadline: {len(entries) - len(failed)} answered, "
+              f"{len(failed)} reported as '{failed[0]['error'] if failed else ''}'")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 20))
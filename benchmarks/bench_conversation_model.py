@@ -0,0 +1,98 @@
+"""
+Turn-indexed conversation model vs flattened reads, by conversation length.
+
+The simulated app charges FAKE_CHATGPT_ELEMENT_COST seconds for every text
+element a script visits. For each history length the benchmark times:
+
+- the full-window walk the fallback path uses (every text of the window);
+- the scoped read of the last two message containers;
+- the conversation model's first refresh (every turn is read) and its later
+  refreshes (signatures of all turns, text of the last one only);
+- looking up the latest answer and an early turn in the model.
+
+It also checks that the model's latest answer, roles and turn N are right:
+
+    python benchmarks/bench_conversation_model.py [reads] [element_cost_seconds]
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+os.environ.setdefault("CHATGPT_MCP_OSASCRIPT", os.path.join(HERE, "fake_osascript.py"))
+os.environ.setdefault("FAKE_CHATGPT_STATE", os.path.join(tempfile.mkdtemp(), "state.json"))
+
+from simulated_chatgpt import SimulatedChatGPT  # noqa: E402
+from chatgpt_mcp.conversation_model import ASSISTANT, USER, get_conversation  # noqa: E402
+from chatgpt_mcp.mcp_tools import RESPONSE_SCRIPT  # noqa: E402
+from chatgpt_mcp.message_scope import get_scope  # noqa: E402
+from chatgpt_mcp.script_runner import run_script_async  # noqa: E402
+from chatgpt_mcp.ui_locator import get_locator  # noqa: E402
+
+LOOKUPS = 100_000
+
+
+async def full_walk():
+    await run_script_async(RESPONSE_SCRIPT, ["1"])
+
+
+async def timed(read, reads: int) -> float:
+    start = time.perf_counter()
+    for _ in range(reads):
+        await read()
+    return (time.perf_counter() - start) / reads
+
+
+def lookup_cost(model) -> float:
+    start = time.perf_counter()
+    for _ in range(LOOKUPS):
+        model.latest(ASSISTANT)
+        model.turn(3)
+    return (time.perf_counter() - start) / (2 * LOOKUPS)
+
+
+async def run(reads: int):
+    print(f"{'history':>7s} {'full walk':>10s} {'scoped':>9s} {'model 1st':>10s} {'model next':>11s} "
+          f"{'lookup':>8s} {'turns/re-read':>14s}  correct")
+    for history in (0, 50, 200):
+        simulator = SimulatedChatGPT()
+        simulator.history = history
+        simulator.reset()
+        get_scope().reset()
+        model = get_conversation()
+        model.reset()
+        await get_locator().scan()
+
+        full = await timed(full_walk, reads)
+        scoped = await timed(get_scope().read, reads)
+        first = await timed(model.refresh, 1)
+        before = model.stats["turns_read"]
+        later = await timed(model.refresh, reads)
+        read_later = (model.stats["turns_read"] - before) / reads
+
+        latest = model.latest(ASSISTANT)
+        correct = (not history or (
+            latest.text == simulator.answer_for(f"earlier {history}")
+            and model.turn(3).text == "Earlier question number 2?"
+            and model.turn(1).role == USER and model.turn(2).role == ASSISTANT
+            and model.message_count == 2 * history))
+        print(f"{history:7d} {full * 1000:8.1f}ms {scoped * 1000:7.1f}ms {first * 1000:8.1f}ms "
+              f"{later * 1000:9.1f}ms {lookup_cost(model) * 1e9:6.0f}ns "
+              f"{model.message_count:10d}/{read_later:<3.0f}  {correct}")
+
+
+def main():
+    reads = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    os.environ.setdefault("FAKE_CHATGPT_ELEMENT_COST",
+                          sys.argv[2] if len(sys.argv) > 2 else "0.0005")
+    asyncio.run(run(reads))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Named conversations vs starting over and pasting the context again.
+
+An agent keeps THREADS threads going, each with its own large context. The
+same questions are asked through ask_chatgpt_tool over an in-memory MCP
+session against the simulated app, in rounds that visit every thread:
+
+- re-paste: new_chat_tool, then the thread's context with the question;
+- routed: the context with the first question, then only the questions, all
+  with ``conversation`` set to the thread's key.
+
+The simulated app reads FAKE_CHATGPT_PROMPT_SPEED characters of a new prompt
+per second before answering (default here 50000), standing in for the cost
+of a long prompt. The benchmark reports the characters pasted, the time per
+follow-up question, the sidebar switches and row searches, and checks that
+every thread holds only its own questions, in order:
+
+    python benchmarks/bench_conversations.py [rounds] [context_chars]
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+os.environ.setdefault("CHATGPT_MCP_OSASCRIPT", os.path.join(HERE, "fake_osascript.py"))
+os.environ.setdefault("FAKE_CHATGPT_STATE", os.path.join(tempfile.mkdtemp(), "state.json"))
+os.environ.setdefault("FAKE_CHATGPT_START_DELAY", "0.2")
+os.environ.setdefault("FAKE_CHATGPT_SPEED", "2000")
+os.environ.setdefault("FAKE_CHATGPT_PROMPT_SPEED", "50000")
+
+from mcp.shared.memory import create_connected_server_and_client_session  # noqa: E402
+from simulated_chatgpt import SimulatedChatGPT  # noqa: E402
+from chatgpt_mcp import conversation_router  # noqa: E402
+from chatgpt_mcp.chatgpt_mcp import mcp  # noqa: E402
+
+THREADS = ["billing", "search", "deploy"]
+
+
+def context_for(thread: str, size: int) -> str:
+    line = f"Context for the {thread} service: module, owner, constraints and open issues.\n"
+    return (line * (size // len(line) + 1))[:size]
+
+
+def question(thread: str, round_number: int) -> str:
+    return f"[{thread}] Question {round_number + 1} about the {thread} service?"
+
+
+async def ask(session, prompt: str, **arguments) -> str:
+    result = await session.call_tool("ask_chatgpt_tool", {"prompt": prompt, **arguments})
+    if result.isError:
+        raise RuntimeError(result.content[0].text)
+    return result.content[0].text
+
+
+async def repaste(session, rounds: int, size: int):
+    """Every question: new chat, then context and question"""
+    followups = []
+    for round_number in range(rounds):
+        for thread in THREADS:
+            start = time.perf_counter()
+            await session.call_tool("new_chat_tool", {})
+            await ask(session, question(thread, round_number) + "\n\n" + context_for(thread, size))
+            if round_number:
+                followups.append(time.perf_counter() - start)
+    return followups
+
+
+async def routed(session, rounds: int, size: int):
+    """First question with the context, the rest on their own, each in its thread"""
+    followups = []
+    for round_number in range(rounds):
+        for thread in THREADS:
+            prompt = question(thread, round_number)
+            if not round_number:
+                prompt += "\n\n" + context_for(thread, size)
+            start = time.perf_counter()
+            await ask(session, prompt, conversation=thread)
+            if round_number:
+                followups.append(time.perf_counter() - start)
+    return followups
+
+
+def threads_intact(simulator: SimulatedChatGPT, rounds: int, with_context: bool) -> bool:
+    """Whether each thread's conversation holds its own questions, in order"""
+    with simulator.state() as state:
+        conversations = [messages for messages in state["windows"]["1"]["conversations"] if messages]
+    found = {}
+    for messages in conversations:
+        prompts = [message["text"] for message in messages if message["role"] == "user"]
+        thread = prompts[0][1:prompts[0].index("]")]
+        if any(not prompt.startswith(f"[{thread}]") for prompt in prompts):
+            return False
+        found.setdefault(thread, []).append(prompts)
+    if with_context:
+        # One conversation per question
+        return all(len(found.get(thread, [])) == rounds for thread in THREADS)
+    return all(
+        len(found.get(thread, [])) == 1
+        and [prompt.split("\n")[0] for prompt in found[thread][0]]
+        == [question(thread, round_number) for round_number in range(rounds)]
+        for thread in THREADS)
+
+
+async def main(rounds: int, size: int):
+    simulator = SimulatedChatGPT()
+    print(f"{len(THREADS)} threads x {rounds} questions, {size} characters of context per thread")
+    print(f"{'mode':10s} {'pasted chars':>13s} {'total':>8s} {'per follow-up':>14s} {'new chats':>10s} "
+          f"{'switches':>9s} {'searches':>9s}  threads intact")
+    for mode, run in (("re-paste", repaste), ("routed", routed)):
+        simulator.reset()
+        conversation_router._router = None
+        async with create_connected_server_and_client_session(mcp._mcp_server) as session:
+            start = time.perf_counter()
+            followups = await run(session, rounds, size)
+            total = time.perf_counter() - start
+        pasted = sum(len(event["text"]) for event in simulator.events() if event["event"] == "paste")
+        calls = simulator.call_counts()
+        router = conversation_router.get_router()
+        intact = threads_intact(simulator, rounds, mode == "re-paste")
+        print(f"{mode:10s} {pasted:13d} {total:7.2f}s {sum(followups) / len(followups):13.2f}s "
+              f"{calls.get('start_new_chat', 0):10d} {router.stats['switches']:9d} "
+              f"{router.stats['searched']:9d}  {intact}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 4,
+                     int(sys.argv[2]) if len(sys.argv) > 2 else 20_000))
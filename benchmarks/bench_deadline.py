@@ -0,0 +1,151 @@
+"""
+Abandoned requests with a hung script: is the window free for the next one?
+
+A streaming ask_chatgpt_tool call is sent to the simulated app while its
+status probe hangs (the first status_probe call never returns), and a second
+call is queued behind it. The first call is abandoned mid-generation, either
+by its deadline (``timeout``) or by the client cancelling it, and the
+benchmark reports:
+
+- how long the first call took to come back;
+- whether the second prompt was pasted while the abandoned answer was still
+  generating (the real app does not send a message then);
+- whether the second call got the answer to its own prompt, and how long
+  after the first call it finished;
+- osascript processes still running scripts afterwards (hung ones not killed).
+
+A client cancellation is delivered the way the server delivers
+``notifications/cancelled``, by cancelling the task running the tool call
+(the in-memory session of mcp 1.9 closes when a request is cancelled).
+
+Each scenario runs with and without stopping the generation on abort.
+Finally a hung probe is run under a deadline outside of any tool call, to
+show that the deadline, not the runner's own timeout, bounds the call:
+
+    python benchmarks/bench_deadline.py
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+os.environ.setdefault("CHATGPT_MCP_OSASCRIPT", os.path.join(HERE, "fake_osascript.py"))
+os.environ.setdefault("FAKE_CHATGPT_STATE", os.path.join(tempfile.mkdtemp(), "state.json"))
+os.environ.setdefault("FAKE_CHATGPT_START_DELAY", "0.2")
+os.environ.setdefault("FAKE_CHATGPT_SPEED", "100")
+os.environ.setdefault("FAKE_CHATGPT_RESPONSE_LENGTH", "800")
+os.environ.setdefault("FAKE_CHATGPT_HUNG_SCRIPTS", "status_probe=1")
+
+from mcp.shared.memory import create_connected_server_and_client_session  # noqa: E402
+from simulated_chatgpt import SimulatedChatGPT  # noqa: E402
+from chatgpt_mcp import mcp_tools  # noqa: E402
+from chatgpt_mcp.chatgpt_mcp import mcp  # noqa: E402
+from chatgpt_mcp.deadline import deadline_scope  # noqa: E402
+from chatgpt_mcp.message_scope import get_scope  # noqa: E402
+from chatgpt_mcp.response_boundary import forget_prompt  # noqa: E402
+from chatgpt_mcp.script_runner import get_runner  # noqa: E402
+from chatgpt_mcp.status_probe import probe_status  # noqa: E402
+
+ABANDON_AFTER = 3.0
+FIRST = "First question, abandoned while its answer is generating"
+SECOND = "Second question, queued behind the first"
+
+
+def script_processes():
+    """osascript stand-ins running a script (workers excluded)"""
+    count = 0
+    for pid in filter(str.isdigit, os.listdir("/proc")):
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                argv = f.read().split(b"\0")
+        except OSError:
+            continue
+        if any(arg.endswith(b"fake_osascript.py") for arg in argv) and b"JavaScript" not in argv:
+            count += 1
+    return count
+
+
+async def no_stop(window: int = 1) -> bool:
+    return False
+
+
+async def discard(*args, **kwargs):
+    pass
+
+
+async def scenario(session, simulator: SimulatedChatGPT, how: str):
+    simulator.reset()
+    get_scope(1).reset()
+    forget_prompt(1)
+
+    start = time.perf_counter()
+    if how == "deadline":
+        first = asyncio.ensure_future(session.call_tool(
+            "ask_chatgpt_tool", {"prompt": FIRST, "stream": True, "timeout": ABANDON_AFTER}))
+    else:
+        # Streamed text goes nowhere; the request context only needs to exist
+        ctx = SimpleNamespace(request_context=SimpleNamespace(meta=None), log=discard)
+        tool = mcp._tool_manager.get_tool("ask_chatgpt_tool")
+        first = asyncio.ensure_future(tool.fn(prompt=FIRST, stream=True, ctx=ctx))
+        asyncio.get_running_loop().call_later(ABANDON_AFTER, first.cancel)
+    await asyncio.sleep(0.5)
+    second = asyncio.ensure_future(session.call_tool("ask_chatgpt_tool", {"prompt": SECOND}))
+
+    try:
+        await first
+    except (Exception, asyncio.CancelledError):
+        pass
+    first_done = time.perf_counter()
+
+    result = await second
+    second_done = time.perf_counter()
+    pastes = [e for e in simulator.events() if e["event"] == "paste" and e["text"] == SECOND]
+    return {
+        "first": first_done - start,
+        "blocked": any(e["while_generating"] for e in pastes),
+        "own": SECOND in result.content[0].text and FIRST not in result.content[0].text,
+        "second": second_done - first_done,
+        "left": script_processes(),
+    }
+
+
+async def main():
+    simulator = SimulatedChatGPT()
+    simulator.reset()
+    stop = mcp_tools.abort_generation
+    print(f"first call abandoned after {ABANDON_AFTER:.0f}s of a "
+          f"{int(os.environ['FAKE_CHATGPT_RESPONSE_LENGTH']) / float(os.environ['FAKE_CHATGPT_SPEED']):.0f}s "
+          f"generation, status probe hung")
+    print(f"{'abandoned by':13s} {'stop on abort':>13s} {'1st back':>9s} {'2nd pasted while generating':>28s} "
+          f"{'2nd own answer':>15s} {'2nd after 1st':>14s} {'hung left':>10s}")
+    async with create_connected_server_and_client_session(mcp._mcp_server) as session:
+        for how in ("deadline", "cancel"):
+            for stopping in (False, True):
+                mcp_tools.abort_generation = stop if stopping else no_stop
+                row = await scenario(session, simulator, how)
+                print(f"{how:13s} {str(stopping):>13s} {row['first']:8.1f}s {str(row['blocked']):>28s} "
+                      f"{str(row['own']):>15s} {row['second']:13.1f}s {row['left']:10d}")
+    mcp_tools.abort_generation = stop
+
+    simulator.reset()
+    start = time.perf_counter()
+    with deadline_scope(time.monotonic() + 1.0):
+        probe = await probe_status(1)
+        hung = time.perf_counter() - start
+        expired = time.perf_counter()
+        await asyncio.sleep(1.1)
+        await probe_status(1)
+    print(f"hung status probe under a 1s deadline: gave up after {hung:.1f}s with {probe} "
+          f"(runner timeout {get_runner().timeout:.0f}s); next probe refused in "
+          f"{(time.perf_counter() - expired - 1.1) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
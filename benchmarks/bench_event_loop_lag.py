@@ -0,0 +1,110 @@
+"""
+Event-loop lag while the server is polling a long generation.
+
+A monitor task sleeps in 1 ms steps and records how late each wake-up is,
+while another task polls the action button for the duration of a simulated
+generation (the fake osascript never reports completion, and every probe
+takes FAKE_OSASCRIPT_LATENCY seconds). For comparison the same probe is run
+with ``subprocess.run`` on the measured loop, as the tools did before, and the
+loop is measured once with nothing else to do.
+
+A stalled loop takes no samples while it is stalled, so each late wake-up
+also counts the 1 ms ticks it missed (a lag of L ms adds samples of L-1,
+L-2, ... ms), as HdrHistogram does for an expected interval. Without that,
+one 130 ms stall per probe would weigh as much as one on-time tick.
+
+The gate is the async path's p99 lag, set below the latency of one probe:
+a script run on the loop's thread pushes p99 past it, scheduling noise does
+not. The maximum is not gated: on a machine
+with few cores it is set by the OS scheduling the stand-in osascript process
+(a Python program) rather than by the server, and an idle loop shows spikes
+of the same size.
+
+    python benchmarks/bench_event_loop_lag.py [generation_seconds]
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+os.environ.setdefault("FAKE_OSASCRIPT_LATENCY", "0.05")
+os.environ.setdefault("CHATGPT_MCP_OSASCRIPT", os.path.join(HERE, "fake_osascript.py"))
+
+from chatgpt_mcp.button_helper import AsyncChatGPTButtonHelper  # noqa: E402
+from chatgpt_mcp.ui_backend import FIND_ACTION_BUTTON_SCRIPT  # noqa: E402
+
+MAX_P99_LAG_MS = 20.0
+PROBE_INTERVAL = 0.2
+
+
+TICK_MS = 1.0
+
+
+async def monitor(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK_MS / 1000)
+        lag = (time.perf_counter() - start) * 1000 - TICK_MS
+        lags.append(lag)
+        # The ticks missed while the loop was stalled
+        missed = lag - TICK_MS
+        while missed > 0:
+            lags.append(missed)
+            missed -= TICK_MS
+
+
+def blocking_probe():
+    """One probe the way the tools ran it before: osascript spawned on the loop's thread"""
+    subprocess.run([os.environ["CHATGPT_MCP_OSASCRIPT"], "-e", FIND_ACTION_BUTTON_SCRIPT.source],
+                   capture_output=True, text=True)
+
+
+async def simulate(duration: float, mode: str) -> list:
+    lags = []
+    stop = asyncio.Event()
+    monitor_task = asyncio.create_task(monitor(stop, lags))
+    if mode == "blocking":
+        deadline = time.time() + duration
+        while time.time() < deadline:
+            blocking_probe()
+            await asyncio.sleep(PROBE_INTERVAL)
+    elif mode == "async":
+        await AsyncChatGPTButtonHelper.wait_for_button_state("submit", timeout=duration)
+    else:
+        await asyncio.sleep(duration)
+    stop.set()
+    await monitor_task
+    return sorted(lags)
+
+
+def percentile(lags: list, fraction: float) -> float:
+    return lags[min(int(len(lags) * fraction), len(lags) - 1)]
+
+
+def report(label: str, lags: list):
+    print(f"{label:9s} samples={len(lags):6d}  p99={percentile(lags, 0.99):7.2f} ms  "
+          f"p99.9={percentile(lags, 0.999):7.2f} ms  max={lags[-1]:7.2f} ms")
+
+
+def main():
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 60.0
+    async_lags = asyncio.run(simulate(duration, "async"))
+    blocking_lags = asyncio.run(simulate(min(duration, 5.0), "blocking"))
+    idle_lags = asyncio.run(simulate(min(duration, 5.0), "idle"))
+    report("async", async_lags)
+    report("blocking", blocking_lags)
+    report("idle", idle_lags)
+    p99 = percentile(async_lags, 0.99)
+    if p99 > MAX_P99_LAG_MS:
+        print(f"FAIL: async p99 lag {p99:.2f} ms above {MAX_P99_LAG_MS} ms")
+        sys.exit(1)
+    print(f"OK: async p99 lag within {MAX_P99_LAG_MS} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Sequential vs racing extraction methods when the usual ones misbehave.
+
+The simulated app is set up so that the scoped read and the group walk fail
+(the group walk after 3 s), the class-based walk hangs past the 10 s script
+timeout and only the static-text walk answers, after 1 s. Each mode runs the
+improved extraction N times (default 3) with fresh per-session statistics, so
+the first call shows the cost before anything is learned and the later calls
+the cost once the working method is known:
+
+    python benchmarks/bench_extraction_race.py [calls]
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+os.environ.setdefault("CHATGPT_MCP_OSASCRIPT", os.path.join(HERE, "fake_osascript.py"))
+os.environ.setdefault("CHATGPT_MCP_OSACOMPILE", os.path.join(HERE, "fake_osacompile.py"))
+os.environ.setdefault("CHATGPT_MCP_SCRIPT_CACHE", os.path.join(tempfile.mkdtemp(), "scripts"))
+os.environ.setdefault("FAKE_CHATGPT_STATE", os.path.join(tempfile.mkdtemp(), "state.json"))
+os.environ.setdefault("FAKE_CHATGPT_HISTORY", "3")
+os.environ.setdefault("FAKE_CHATGPT_FAILING_SCRIPTS", "extract_latest_messages,extract_group_hierarchical")
+os.environ.setdefault("FAKE_CHATGPT_SCRIPT_DELAYS",
+                      "extract_class_based=12,extract_group_hierarchical=3,extract_static_text=1")
+
+from simulated_chatgpt import SimulatedChatGPT  # noqa: E402
+from chatgpt_mcp import improved_extraction  # noqa: E402
+from chatgpt_mcp.improved_extraction import ImprovedChatGPTExtractor, method_stats  # noqa: E402
+from chatgpt_mcp.message_scope import get_scope  # noqa: E402
+from chatgpt_mcp.ui_locator import get_locator  # noqa: E402
+
+
+async def run(calls: int):
+    simulator = SimulatedChatGPT()
+    simulator.reset()
+    await get_locator().scan()
+
+    for race in (False, True):
+        improved_extraction._method_stats.clear()
+        extractor = ImprovedChatGPTExtractor(race=race)
+        timings = []
+        spawns_before = simulator.spawn_counts().get("osascript", 0)
+        for _ in range(calls):
+            get_scope().reset()
+            start = time.perf_counter()
+            response = await extractor.extract_with_fallback()
+            timings.append(time.perf_counter() - start)
+        spawns = simulator.spawn_counts().get("osascript", 0) - spawns_before
+        mode = "race" if race else "sequential"
+        print(f"{mode:10s} " + "  ".join(f"call {i + 1} {t:5.2f}s" for i, t in enumerate(timings))
+              + f"  osascript processes {spawns}  answered: {response.startswith('Here is the answer')}")
+        winners = {name: stats["successes"] for name, stats in method_stats().items() if stats["successes"]}
+        print(f"{'':10s} learned: {winners}")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 3))
@@ -0,0 +1,70 @@
+"""
+Full-window extraction vs reading only the latest messages, by conversation length.
+
+The simulated app charges FAKE_CHATGPT_ELEMENT_COST seconds for every text
+element a script visits, so the full walk grows with the history while the
+scoped read stays flat:
+
+    python benchmarks/bench_extraction_scope.py [reads] [element_cost_seconds]
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+os.environ.setdefault("CHATGPT_MCP_OSASCRIPT", os.path.join(HERE, "fake_osascript.py"))
+os.environ.setdefault("FAKE_CHATGPT_STATE", os.path.join(tempfile.mkdtemp(), "state.json"))
+
+from simulated_chatgpt import SimulatedChatGPT  # noqa: E402
+from chatgpt_mcp.mcp_tools import RESPONSE_SCRIPT, get_chatgpt_response, process_response_texts  # noqa: E402
+from chatgpt_mcp.message_scope import get_scope  # noqa: E402
+from chatgpt_mcp.script_runner import run_script_async  # noqa: E402
+from chatgpt_mcp.ui_locator import get_locator  # noqa: E402
+from chatgpt_mcp.wire_format import read_frame  # noqa: E402
+
+
+async def full_walk() -> str:
+    result = await run_script_async(RESPONSE_SCRIPT, ["1"])
+    _, _, texts = read_frame(result.stdout)
+    return process_response_texts(texts)
+
+
+async def timed(read, reads: int):
+    response = await read()
+    start = time.perf_counter()
+    for _ in range(reads):
+        await read()
+    return (time.perf_counter() - start) / reads, response
+
+
+async def run(reads: int):
+    for history in (0, 50, 200):
+        simulator = SimulatedChatGPT()
+        simulator.history = history
+        simulator.reset()
+        get_scope().reset()
+        await get_locator().scan()
+
+        full, full_response = await timed(full_walk, reads)
+        scoped, scoped_response = await timed(get_chatgpt_response, reads)
+        expected = simulator.answer_for(f"earlier {history}") if history else None
+        verdict = lambda response: "yes" if response == expected else "no"
+        print(f"history {history:4d}  full {full * 1000:7.1f} ms (last answer only: {verdict(full_response)})  "
+              f"scoped {scoped * 1000:7.1f} ms (last answer only: {verdict(scoped_response)})")
+
+
+def main():
+    reads = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    os.environ.setdefault("FAKE_CHATGPT_ELEMENT_COST",
+                          sys.argv[2] if len(sys.argv) > 2 else "0.0005")
+    asyncio.run(run(reads))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Transcript store: cost on the request path, and searching past answers.
+
+1. Request path: time spent in ``record`` per answer, against writing each
+   answer synchronously (one INSERT and commit per call, on the event loop).
+2. End to end: prompts sent through ask_chatgpt_tool over an in-memory MCP
+   session against the simulated app, with the store on and off; then
+   search_history and get_last_response are called and checked, and the
+   scripts they ran are counted (none: the app is not touched).
+3. Search: ranked FTS5 queries against substring matching on a store of N
+   past exchanges (default 50000).
+
+    python benchmarks/bench_history.py [entries]
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+WORK = tempfile.mkdtemp()
+os.environ.setdefault("CHATGPT_MCP_OSASCRIPT", os.path.join(HERE, "fake_osascript.py"))
+os.environ.setdefault("FAKE_CHATGPT_STATE", os.path.join(WORK, "state.json"))
+os.environ.setdefault("FAKE_CHATGPT_START_DELAY", "0.2")
+os.environ.setdefault("FAKE_CHATGPT_SPEED", "2000")
+os.environ.setdefault("CHATGPT_MCP_HISTORY_DB", os.path.join(WORK, "history.sqlite3"))
+
+from mcp.shared.memory import create_connected_server_and_client_session  # noqa: E402
+from simulated_chatgpt import SimulatedChatGPT  # noqa: E402
+from chatgpt_mcp import transcript_store  # noqa: E402
+from chatgpt_mcp.chatgpt_mcp import mcp  # noqa: E402
+from chatgpt_mcp.transcript_store import SCHEMA, TranscriptStore  # noqa: E402
+
+TOPICS = ["sqlite", "accessibility", "asyncio", "latency", "quantum", "france", "osascript", "bm25"]
+PROMPTS = [f"Question {i}: how does {TOPICS[i % len(TOPICS)]} handle case {i}?" for i in range(6)]
+
+
+def sync_insert(db: sqlite3.Connection, prompt: str, response: str):
+    db.execute("INSERT INTO transcripts (prompt, response, asked_at) VALUES (?, ?, ?)",
+               (prompt, response, time.time()))
+    db.commit()
+
+
+async def request_path(calls: int):
+    response = "An answer of a few hundred characters. " * 10
+    store = TranscriptStore(os.path.join(WORK, "path.sqlite3"), flush_interval=0.05)
+    start = time.perf_counter()
+    for i in range(calls):
+        store.record(f"prompt {i}", response, time.time())
+    batched = (time.perf_counter() - start) / calls
+    await store.close()
+
+    db = sqlite3.connect(os.path.join(WORK, "sync.sqlite3"))
+    for statement in SCHEMA:
+        db.execute(statement)
+    start = time.perf_counter()
+    for i in range(calls):
+        sync_insert(db, f"prompt {i}", response)
+    synchronous = (time.perf_counter() - start) / calls
+    db.close()
+    print(f"request path per answer: record() {batched * 1e6:.1f}us, synchronous insert+commit "
+          f"{synchronous * 1e6:.1f}us; batched writes: {store.stats['flushes']} for {calls} answers")
+
+
+async def ask_all(session) -> float:
+    start = time.perf_counter()
+    for prompt in PROMPTS:
+        await session.call_tool("ask_chatgpt_tool", {"prompt": prompt})
+    return (time.perf_counter() - start) / len(PROMPTS)
+
+
+async def end_to_end():
+    simulator = SimulatedChatGPT()
+    results = {}
+    for setting in ("off", os.environ["CHATGPT_MCP_HISTORY_DB"]):
+        simulator.reset()
+        transcript_store._store = TranscriptStore(setting)
+        async with create_connected_server_and_client_session(mcp._mcp_server) as session:
+            results[setting] = await ask_all(session)
+            if setting == "off":
+                continue
+            calls = sum(simulator.call_counts().values())
+            found = await session.call_tool("search_history", {"query": "quantum case", "limit": 3})
+            last = await session.call_tool("get_last_response", {})
+            earlier = await session.call_tool("get_last_response", {"prompt": PROMPTS[1]})
+            scripts = sum(simulator.call_counts().values()) - calls
+    hits = [json.loads(content.text) for content in found.content]
+    last, earlier = json.loads(last.content[0].text), json.loads(earlier.content[0].text)
+    print(f"ask_chatgpt_tool per prompt: history off {results['off']:.2f}s, "
+          f"on {results[os.environ['CHATGPT_MCP_HISTORY_DB']]:.2f}s")
+    print(f"search 'quantum case': {[hit['prompt'] for hit in hits]}")
+    print(f"get_last_response: last is prompt 6: {last['prompt'] == PROMPTS[-1]}, "
+          f"answer matches: {last['response'] == simulator.answer_for(PROMPTS[-1])}, "
+          f"by prompt: {earlier['prompt'] == PROMPTS[1]}; scripts run by history tools: {scripts}")
+
+
+async def search(entries: int):
+    store = TranscriptStore(os.path.join(WORK, "large.sqlite3"), flush_interval=3600)
+    for i in range(entries):
+        topic = TOPICS[i % len(TOPICS)]
+        store.record(f"Question {i} about {topic} and item {i % 997}?",
+                     f"Answer {i}: {topic} works like this, with detail {i % 101} and more text. " * 4,
+                     time.time() - entries + i, conversation=f"c{i // 20}")
+    await store.flush()
+
+    print(f"search among {entries} entries:")
+    for query in ("quantum detail 42", "osascript item 500", "item 996 detail 7", "nothing matches this"):
+        timings = []
+        for mode in (True, False):
+            store.fts = mode
+            start = time.perf_counter()
+            found = await store.search(query, 10)
+            timings.append(f"{(time.perf_counter() - start) * 1000:6.1f}ms ({len(found):2d})")
+        print(f"  {query!r:24s} FTS5 ranked {timings[0]}   substring {timings[1]}")
+    await store.close()
+
+
+async def main(entries: int):
+    await request_path(2000)
+    await end_to_end()
+    await search(entries)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000))
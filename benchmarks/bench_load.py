@@ -0,0 +1,213 @@
+"""
+End-to-end load benchmark through the real server over stdio.
+
+Starts ``python -m chatgpt_mcp`` as a subprocess with the stand-in
+``osascript``/``osacompile`` (``fake_osascript.py``, ``fake_osacompile.py``)
+answering from the simulated app, connects an MCP client over stdio and runs:
+
+- sequential: one ask_chatgpt_tool call at a time;
+- new_chat: new_chat_tool calls;
+- concurrent: bursts of concurrent ask_chatgpt_tool calls.
+
+For each scenario it reports p50/p95/p99 latency, throughput, osascript
+spawns and script runs per request, and compares them with the limits in
+``load_thresholds.json``. The exit status is 1 if any limit is exceeded, so
+the benchmark can gate CI. The simulated app is tuned with the FAKE_CHATGPT_*
+variables (generation speed, conversation length) and FAKE_OSASCRIPT_LATENCY
+(probe latency); see simulated_chatgpt.py.
+
+    python benchmarks/bench_load.py [--requests N] [--concurrency C]
+                                    [--thresholds FILE] [--write-thresholds]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+WORK = tempfile.mkdtemp()
+os.environ.setdefault("FAKE_CHATGPT_STATE", os.path.join(WORK, "state.json"))
+os.environ.setdefault("FAKE_CHATGPT_START_DELAY", "0.2")
+os.environ.setdefault("FAKE_CHATGPT_SPEED", "2000")
+os.environ.setdefault("FAKE_CHATGPT_RESPONSE_LENGTH", "400")
+
+from mcp import ClientSession  # noqa: E402
+from mcp.client.stdio import StdioServerParameters, stdio_client  # noqa: E402
+from simulated_chatgpt import SimulatedChatGPT  # noqa: E402
+
+DEFAULT_THRESHOLDS = os.path.join(HERE, "load_thresholds.json")
+
+# Headroom applied by --write-thresholds: relative, with a floor in seconds
+# so that very fast scenarios do not fail on scheduling noise
+MARGIN = 1.5
+MIN_SLACK = 0.5
+
+
+def percentile(values: List[float], p: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(p * len(ordered)) - 1))]
+
+
+def server_parameters() -> StdioServerParameters:
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": ROOT,
+        "CHATGPT_MCP_OSASCRIPT": os.path.join(HERE, "fake_osascript.py"),
+        "CHATGPT_MCP_OSACOMPILE": os.path.join(HERE, "fake_osacompile.py"),
+        "CHATGPT_MCP_SCRIPT_CACHE": os.path.join(WORK, "scripts"),
+    })
+    return StdioServerParameters(command=sys.executable, args=["-m", "chatgpt_mcp"], env=env, cwd=ROOT)
+
+
+class Counters:
+    """Script runs and executable spawns seen by the simulated app"""
+
+    def __init__(self, simulator: SimulatedChatGPT):
+        self.simulator = simulator
+        self.calls = self.spawns = 0
+
+    def mark(self):
+        self.calls = sum(self.simulator.call_counts().values())
+        self.spawns = self.simulator.spawn_counts().get("osascript", 0)
+
+    def delta(self):
+        calls, spawns = self.calls, self.spawns
+        self.mark()
+        return self.calls - calls, self.spawns - spawns
+
+
+async def scenario(name: str, counters: Counters, calls: List, concurrency: int = 1) -> Dict[str, float]:
+    latencies = []
+    errors = 0
+
+    async def timed(call):
+        nonlocal errors
+        start = time.perf_counter()
+        result = await call()
+        latencies.append(time.perf_counter() - start)
+        errors += bool(result.isError)
+
+    counters.mark()
+    start = time.perf_counter()
+    for i in range(0, len(calls), concurrency):
+        await asyncio.gather(*(timed(call) for call in calls[i:i + concurrency]))
+    elapsed = time.perf_counter() - start
+    scripts, spawns = counters.delta()
+    requests = len(calls)
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "throughput": requests / elapsed,
+        "spawns_per_request": spawns / requests,
+        "scripts_per_request": scripts / requests,
+    }
+
+
+async def run_suite(requests: int, concurrency: int) -> Dict[str, Dict[str, float]]:
+    simulator = SimulatedChatGPT()
+    simulator.reset()
+    counters = Counters(simulator)
+    results = {}
+
+    with open(os.path.join(WORK, "server.log"), "w") as errlog:
+        async with stdio_client(server_parameters(), errlog=errlog) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+
+                def ask(prompt):
+                    return lambda: session.call_tool("ask_chatgpt_tool", {"prompt": prompt})
+
+                # Warm-up: worker start and script compilation are not counted
+                await ask("Warm-up question?")()
+
+                results["sequential"] = await scenario("sequential", counters, [
+                    ask(f"Sequential question number {i}?") for i in range(requests)])
+                results["new_chat"] = await scenario("new_chat", counters, [
+                    lambda: session.call_tool("new_chat_tool", {}) for _ in range(max(1, requests // 4))])
+                results["concurrent"] = await scenario("concurrent", counters, [
+                    ask(f"Concurrent question number {i}?") for i in range(requests)], concurrency)
+    return results
+
+
+def check(results: Dict[str, Dict[str, float]], thresholds: Dict[str, Dict[str, float]]) -> List[str]:
+    """Limits exceeded: max_<metric> caps a metric, min_throughput is a floor"""
+    failures = []
+    for name, limits in thresholds.items():
+        measured = results.get(name)
+        if measured is None:
+            continue
+        for key, limit in limits.items():
+            if key == "min_throughput":
+                if measured["throughput"] < limit:
+                    failures.append(f"{name}: throughput {measured['throughput']:.2f}/s below {limit:.2f}/s")
+            elif key.startswith("max_"):
+                metric = key[len("max_"):]
+                if measured[metric] > limit:
+                    failures.append(f"{name}: {metric} {measured[metric]:.3f} above {limit:.3f}")
+    return failures
+
+
+def thresholds_from(results: Dict[str, Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    return {
+        name: {
+            "max_p95": round(max(measured["p95"] * MARGIN, measured["p95"] + MIN_SLACK), 2),
+            "max_p99": round(max(measured["p99"] * MARGIN, measured["p99"] + MIN_SLACK), 2),
+            "max_errors": 0,
+            "max_spawns_per_request": round(measured["spawns_per_request"] + 0.1, 2),
+            "max_scripts_per_request": round(measured["scripts_per_request"] * MARGIN, 1),
+            "min_throughput": round(measured["throughput"] / (2 * MARGIN), 3),
+        }
+        for name, measured in results.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--thresholds", default=DEFAULT_THRESHOLDS)
+    parser.add_argument("--write-thresholds", action="store_true",
+                        help=f"write this run's results (with {MARGIN}x headroom) as the thresholds")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_suite(args.requests, args.concurrency))
+    print(f"{'scenario':11s} {'requests':>8s} {'errors':>6s} {'p50':>7s} {'p95':>7s} {'p99':>7s} "
+          f"{'req/s':>6s} {'spawns/req':>10s} {'scripts/req':>11s}")
+    for name, m in results.items():
+        print(f"{name:11s} {m['requests']:8d} {m['errors']:6d} {m['p50']:6.2f}s {m['p95']:6.2f}s {m['p99']:6.2f}s "
+              f"{m['throughput']:6.2f} {m['spawns_per_request']:10.2f} {m['scripts_per_request']:11.1f}")
+
+    if args.write_thresholds:
+        with open(args.thresholds, "w") as f:
+            json.dump(thresholds_from(results), f, indent=2)
+            f.write("\n")
+        print(f"thresholds written to {args.thresholds}")
+        return 0
+
+    if not os.path.exists(args.thresholds):
+        print(f"no thresholds file at {args.thresholds}; run with --write-thresholds to create one")
+        return 0
+    with open(args.thresholds) as f:
+        failures = check(results, json.load(f))
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    print("within thresholds" if not failures else f"{len(failures)} threshold(s) exceeded")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+Per-phase latency breakdown and the cost of recording it.
+
+Measures the overhead of a span (empty block, sync and decorated coroutine),
+then runs N ask_chatgpt_tool calls (default 10) and one new_chat_tool call
+against the simulated app through the real FastMCP server, prints the
+breakdown from the chatgpt://metrics resource and fetches the same data from
+the Prometheus endpoint:
+
+    python benchmarks/bench_metrics.py [requests]
+"""
+
+import asyncio
+import json
+import os
+import socket
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+os.environ.setdefault("CHATGPT_MCP_OSASCRIPT", os.path.join(HERE, "fake_osascript.py"))
+os.environ.setdefault("FAKE_CHATGPT_STATE", os.path.join(tempfile.mkdtemp(), "state.json"))
+os.environ.setdefault("FAKE_CHATGPT_START_DELAY", "0.2")
+os.environ.setdefault("FAKE_CHATGPT_SPEED", "2000")
+os.environ.setdefault("FAKE_CHATGPT_RESPONSE_LENGTH", "400")
+
+from mcp.shared.memory import create_connected_server_and_client_session  # noqa: E402
+from simulated_chatgpt import SimulatedChatGPT  # noqa: E402
+from chatgpt_mcp import metrics  # noqa: E402
+from chatgpt_mcp.chatgpt_mcp import mcp  # noqa: E402
+
+ITERATIONS = 200_000
+
+
+def span_overhead() -> float:
+    """Seconds per empty span, net of the loop"""
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        pass
+    baseline = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        with metrics.span("bench.sync"):
+            pass
+    return (time.perf_counter() - start - baseline) / ITERATIONS
+
+
+async def timed_overhead() -> float:
+    """Seconds added by @timed to an awaited coroutine"""
+    async def plain():
+        return None
+
+    decorated = metrics.timed("bench.async")(plain)
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        await plain()
+    baseline = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        await decorated()
+    return (time.perf_counter() - start - baseline) / ITERATIONS
+
+
+async def scrape(port: int) -> str:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(b"GET /metrics HTTP/1.0\r\n\r\n")
+    await writer.drain()
+    response = (await reader.read()).decode()
+    writer.close()
+    return response.split("\r\n\r\n", 1)[1]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def run(requests: int):
+    sync_cost = span_overhead()
+    async_cost = await timed_overhead()
+    metrics.get_metrics().reset()
+    print(f"span overhead: {sync_cost * 1e6:.2f} us (with), {async_cost * 1e6:.2f} us (@timed coroutine)")
+
+    simulator = SimulatedChatGPT()
+    simulator.reset()
+    port = free_port()
+
+    async with metrics.metrics_endpoint(port):
+        async with create_connected_server_and_client_session(mcp._mcp_server) as session:
+            start = time.perf_counter()
+            for i in range(requests):
+                await session.call_tool("ask_chatgpt_tool", {"prompt": f"Metrics question number {i}?"})
+            elapsed = time.perf_counter() - start
+            await session.call_tool("new_chat_tool", {})
+            snapshot = json.loads((await session.read_resource("chatgpt://metrics")).contents[0].text)
+        exposition = await scrape(port)
+
+    spans = snapshot["spans"]
+    recorded = sum(h["count"] for h in spans.values())
+    print(f"{requests} ask_chatgpt_tool calls: {elapsed / requests:.2f}s per call, "
+          f"{recorded / requests:.0f} spans per call, "
+          f"recording cost {recorded * async_cost / elapsed * 100:.4f}% of the run")
+    print(f"{'span':40s} {'count':>5s} {'mean':>8s} {'p50':>8s} {'p95':>8s} {'max':>8s}")
+    for name, h in spans.items():
+        print(f"{name:40s} {h['count']:5d} {h['mean']:7.3f}s {h['p50']:7.3f}s {h['p95']:7.3f}s {h['max']:7.3f}s")
+    print("counters:", json.dumps(snapshot["counters"]))
+    samples = [line for line in exposition.splitlines() if line and not line.startswith("#")]
+    print(f"/metrics: {len(samples)} samples, e.g.")
+    for line in samples[:1] + [line for line in samples if line.startswith("chatgpt_mcp_span_seconds_count")][:3]:
+        print(f"  {line}")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 10))
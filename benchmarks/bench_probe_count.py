@@ -0,0 +1,82 @@
+"""
+osascript invocations per ask_chatgpt call, counted by the simulated app.
+
+Runs ask_chatgpt against the fake osascript (see simulated_chatgpt.py) and
+prints how many times each script was run by the current tree and by the
+tree before the combined status probe (the parent of the commit that added
+it, extracted with git archive). Each tree answers its prompts in its own
+process against the same simulated app, after one unmeasured request that
+warms the locator cache and the script worker:
+
+    python benchmarks/bench_probe_count.py [requests] [baseline-commit]
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+BASELINE = "a328ba7^"
+
+os.environ.setdefault("CHATGPT_MCP_OSASCRIPT", os.path.join(HERE, "fake_osascript.py"))
+os.environ.setdefault("FAKE_CHATGPT_STATE", os.path.join(tempfile.mkdtemp(), "state.json"))
+
+
+def child(tree: str, requests: int, offset: int):
+    """Answer the prompts with the package from ``tree`` and print the counts"""
+    sys.path.insert(0, HERE)
+    sys.path.insert(0, tree)
+    from simulated_chatgpt import SimulatedChatGPT
+    from chatgpt_mcp.mcp_tools import ask_chatgpt
+
+    async def run(count: int, start: int):
+        for i in range(count):
+            await ask_chatgpt(f"Benchmark question number {start + i}?")
+
+    simulator = SimulatedChatGPT()
+    asyncio.run(run(1, offset - 1))
+    before = simulator.call_counts()
+    asyncio.run(run(requests, offset))
+    after = simulator.call_counts()
+    counts = {name: total - before.get(name, 0) for name, total in after.items() if total > before.get(name, 0)}
+    print(json.dumps(counts))
+
+
+def count(tree: str, requests: int, offset: int):
+    """Invocations per script while ``tree`` answers ``requests`` prompts"""
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", tree, str(requests), str(offset)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    commit = sys.argv[2] if len(sys.argv) > 2 else BASELINE
+    sys.path.insert(0, HERE)
+    from simulated_chatgpt import SimulatedChatGPT
+    SimulatedChatGPT().reset()
+
+    with tempfile.TemporaryDirectory() as baseline_tree:
+        archive = subprocess.run(["git", "-C", ROOT, "archive", commit, "chatgpt_mcp"],
+                                 check=True, capture_output=True).stdout
+        subprocess.run(["tar", "-x", "-C", baseline_tree], input=archive, check=True)
+        baseline = count(baseline_tree, requests, 0)
+    combined = count(ROOT, requests, 100)
+
+    print(f"{'script':24s} {commit:>16s} {'current':>13s}  (per request)")
+    for name in sorted(set(baseline) | set(combined), key=lambda name: -baseline.get(name, 0)):
+        print(f"{name:24s} {baseline.get(name, 0) / requests:16.1f} {combined.get(name, 0) / requests:13.1f}")
+    print(f"{'total':24s} {sum(baseline.values()) / requests:16.1f} {sum(combined.values()) / requests:13.1f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]))
+    else:
+        main()
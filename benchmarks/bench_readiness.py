@@ -0,0 +1,73 @@
+"""
+Fixed delays removed from the critical path by the condition-based waits.
+
+Runs ask_chatgpt_tool N times (default 10), new_chat_tool once and the
+ask_chatgpt_simple fallback once against the simulated app, through the real
+FastMCP server. For every phase it compares the time actually spent waiting
+(from the ``phases`` section of chatgpt://scheduler/stats) with the fixed
+sleeps and AppleScript delays the same waits used to be:
+
+    python benchmarks/bench_readiness.py [requests]
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+os.environ.setdefault("CHATGPT_MCP_OSASCRIPT", os.path.join(HERE, "fake_osascript.py"))
+os.environ.setdefault("FAKE_CHATGPT_STATE", os.path.join(tempfile.mkdtemp(), "state.json"))
+os.environ.setdefault("FAKE_CHATGPT_START_DELAY", "0.2")
+os.environ.setdefault("FAKE_CHATGPT_SPEED", "2000")
+os.environ.setdefault("FAKE_CHATGPT_RESPONSE_LENGTH", "400")
+
+from mcp.shared.memory import create_connected_server_and_client_session  # noqa: E402
+from simulated_chatgpt import SimulatedChatGPT  # noqa: E402
+from chatgpt_mcp.chatgpt_mcp import mcp  # noqa: E402
+from chatgpt_mcp.mcp_tools import ask_chatgpt_simple  # noqa: E402
+
+# Fixed delay each wait replaced, in seconds
+LEGACY_DELAYS = {
+    "activate": 1.0,   # asyncio.sleep(1) in activate_chatgpt
+    "paste": 0.6,      # sleep(0.2) before pasting, delay 0.1 + 0.1 + 0.2 in the paste script
+    "render": 1.0,     # sleep(1) "let it render" in ask_chatgpt
+    "new_chat": 2.0,   # delay 0.5 + 0.5 in the New Chat script, sleep(1) afterwards
+    "response": 5.0,   # first sleep(5) in ask_chatgpt_simple (then 5 s per poll)
+}
+
+
+async def run(requests: int):
+    simulator = SimulatedChatGPT()
+    simulator.reset()
+
+    async with create_connected_server_and_client_session(mcp._mcp_server) as session:
+        start = time.perf_counter()
+        for i in range(requests):
+            await session.call_tool("ask_chatgpt_tool", {"prompt": f"Readiness question number {i}?"})
+        ask_elapsed = time.perf_counter() - start
+        await session.call_tool("new_chat_tool", {})
+        await ask_chatgpt_simple("Fallback question without button detection?")
+        stats = json.loads((await session.read_resource("chatgpt://scheduler/stats")).contents[0].text)
+
+    print(f"{requests} ask_chatgpt_tool calls: {ask_elapsed / requests:.2f}s per call")
+    print(f"{'phase':10s} {'waits':>5s} {'fixed before':>13s} {'waited now':>11s} {'removed':>9s} {'timeouts':>9s}")
+    removed_total = 0.0
+    for phase, legacy in LEGACY_DELAYS.items():
+        totals = stats["phases"].get(phase, {"waits": 0, "seconds": 0.0, "timeouts": 0})
+        before = totals["waits"] * legacy
+        removed = before - totals["seconds"]
+        removed_total += removed
+        print(f"{phase:10s} {totals['waits']:5d} {before:12.2f}s {totals['seconds']:10.2f}s "
+              f"{removed:8.2f}s {totals['timeouts']:9d}")
+    print(f"fixed delay removed from the critical path: {removed_total:.2f}s in total, "
+          f"{removed_total / (requests + 2):.2f}s per request")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 10))
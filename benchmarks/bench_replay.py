@@ -0,0 +1,110 @@
+"""
+Record a session against the simulated app, then replay it without osascript.
+
+The record run sends N prompts (default 5) and starts a new chat through the
+real FastMCP server with CHATGPT_MCP_TRACE set. The replay run repeats the
+same tool calls with CHATGPT_MCP_REPLAY pointing at the trace and an
+osascript that does not exist, so every script result comes from the trace.
+Each run is a separate process, as a trace recorded on a Mac would be
+replayed on another machine, and the replay run has other paste and
+activation budgets, which scripts get as arguments, as a differently
+configured server would. The answers and timings of both runs are compared:
+
+    python benchmarks/bench_replay.py [prompts]
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+
+async def session_run(prompts: int):
+    sys.path.insert(0, ROOT)
+    sys.path.insert(0, HERE)
+    from mcp.shared.memory import create_connected_server_and_client_session
+    from chatgpt_mcp.chatgpt_mcp import mcp
+    from chatgpt_mcp.script_runner import get_runner
+
+    if "CHATGPT_MCP_REPLAY" not in os.environ:
+        from simulated_chatgpt import SimulatedChatGPT
+        SimulatedChatGPT().reset()
+
+    answers = []
+    latencies = []
+    async with create_connected_server_and_client_session(mcp._mcp_server) as session:
+        for i in range(prompts):
+            start = time.perf_counter()
+            result = await session.call_tool("ask_chatgpt_tool", {"prompt": f"Replayed question number {i}?"})
+            latencies.append(time.perf_counter() - start)
+            answers.append(result.content[0].text)
+        result = await session.call_tool("new_chat_tool", {})
+        answers.append(result.content[0].text)
+
+    runner = get_runner()
+    print(json.dumps({
+        "answers": [hashlib.sha256(a.encode()).hexdigest()[:12] for a in answers],
+        "latencies": latencies,
+        "calls": runner.stats["calls"],
+        "spawns": runner.stats["spawns"],
+        "replay": runner.replay.stats if runner.replay is not None else None,
+    }))
+
+
+def child(mode: str, trace: str, prompts: int, work: str) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "CHATGPT_MCP_HEARTBEAT": "0",
+        "CHATGPT_MCP_SCRIPT_CACHE": os.path.join(work, "scripts"),
+        "FAKE_CHATGPT_STATE": os.path.join(work, "state.json"),
+        "FAKE_CHATGPT_START_DELAY": "0.2",
+        "FAKE_CHATGPT_SPEED": "2000",
+        "FAKE_CHATGPT_RESPONSE_LENGTH": "400",
+    })
+    if mode == "record":
+        env["CHATGPT_MCP_TRACE"] = trace
+        env["CHATGPT_MCP_OSASCRIPT"] = os.path.join(HERE, "fake_osascript.py")
+    else:
+        env["CHATGPT_MCP_REPLAY"] = trace
+        env["CHATGPT_MCP_OSASCRIPT"] = os.path.join(work, "no-such-osascript")
+        env["CHATGPT_MCP_BUDGET_PASTE"] = "2.5"
+        env["CHATGPT_MCP_BUDGET_ACTIVATE"] = "1.5"
+    output = subprocess.run([sys.executable, __file__, "--child", str(prompts)], env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(prompts: int):
+    work = tempfile.mkdtemp()
+    trace = os.path.join(work, "trace.jsonl")
+    recorded = child("record", trace, prompts, work)
+    with open(trace) as f:
+        entries = [json.loads(line) for line in f]
+    size = os.path.getsize(trace)
+    replayed = child("replay", trace, prompts, work)
+
+    statuses = {}
+    for entry in entries:
+        statuses[entry["status"]] = statuses.get(entry["status"], 0) + 1
+    print(f"trace: {len(entries)} script calls {statuses}, {size / 1024:.1f} KiB, "
+          f"{sum(e['duration'] for e in entries):.2f}s in scripts")
+    print(f"{'run':8s} {'calls':>6s} {'spawns':>6s} {'mean latency':>13s}")
+    for name, run in (("record", recorded), ("replay", replayed)):
+        mean = sum(run["latencies"]) / len(run["latencies"])
+        print(f"{name:8s} {run['calls']:6d} {run['spawns']:6d} {mean:12.3f}s")
+    print(f"replay: {replayed['replay']}")
+    print(f"answers identical: {recorded['answers'] == replayed['answers']}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        asyncio.run(session_run(int(sys.argv[2])))
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,160 @@
+"""
+Prompt-anchored answer extraction vs the line-shape heuristics, on long transcripts.
+
+Builds a synthetic full-window transcript of N static texts (default 100000):
+sidebar labels, then many exchanges with UI labels between messages, then the
+last prompt and its answer. The answer contains a question and a "could you"
+sentence, as real answers often do. Both extraction paths are timed and
+checked against the expected answer:
+
+- get_chatgpt_response: the old list-based label filter that drops the first
+  line, vs process_response_texts with the sent prompt;
+- the improved extractor: the old per-element filter and backwards pattern
+  scan, vs the precompiled noise matcher and the prompt lookup.
+
+    python benchmarks/bench_response_boundary.py [elements]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from chatgpt_mcp.improved_extraction import ImprovedChatGPTExtractor  # noqa: E402
+from chatgpt_mcp.mcp_tools import NO_RESPONSE, filter_response_lines, process_response_texts  # noqa: E402
+from chatgpt_mcp.response_boundary import PromptFingerprint, remember_prompt  # noqa: E402
+
+PROMPT = "Summarize the quarterly revenue figures for region 42 in three short paragraphs"
+ANSWER = [
+    "Revenue for region 42 grew in every quarter of the year.",
+    "The first quarter was the weakest, with sales held back by supply issues.",
+    "What does this mean for next year?",
+    "Growth should continue if the new distribution contracts are signed on time.",
+    "Could you share the cost figures as well, so margins can be compared directly?",
+    "Overall the region ended the year well ahead of its original targets.",
+]
+
+
+def transcript(elements: int):
+    texts = ["ChatGPT", "New chat", "Today", "Yesterday", "Previous 7 Days"]
+    turn = 0
+    while len(texts) < elements - len(ANSWER) - 4:
+        texts.append(f"Please explain item {turn} of the inventory report in detail")
+        texts.extend(f"Line {j} of the explanation for inventory item number {turn} goes here." for j in range(8))
+        texts.extend(["Copy", "Regenerate"])
+        turn += 1
+    texts.append(PROMPT)
+    texts.extend(ANSWER)
+    texts.extend(["Copy", "Regenerate"])
+    return texts
+
+
+# The implementations this benchmark compares against, as they were
+
+def legacy_filter_response_lines(texts):
+    full_text = '\n'.join(texts)
+    ui_elements = ['Regenerate', 'Continue generating', 'Stop generating',
+                   'Copy', '▍', 'ChatGPT', 'Send a message', 'Message ChatGPT',
+                   'Type a message', 'Ask anything']
+    filtered_lines = []
+    for line in full_text.split('\n'):
+        line = line.strip()
+        if not line or line in ui_elements:
+            continue
+        is_ui_element = False
+        for ui_elem in ui_elements:
+            if line == ui_elem:
+                is_ui_element = True
+                break
+        if not is_ui_element:
+            filtered_lines.append(line)
+    return filtered_lines
+
+
+def legacy_process_response_texts(texts):
+    filtered_lines = legacy_filter_response_lines(texts)
+    response_text = '\n'.join(filtered_lines)
+    if len(filtered_lines) > 1:
+        potential_response = '\n'.join(filtered_lines[1:])
+        if potential_response and len(potential_response) > 10:
+            response_text = potential_response
+    return response_text if response_text else NO_RESPONSE
+
+
+def legacy_extract(raw_text):
+    elements = [e.strip() for e in raw_text.split('\n') if e.strip()]
+    ui_elements = {
+        'Regenerate', 'Continue generating', 'Stop generating', 'Copy',
+        'Send message', 'Reply...', 'New chat',
+        '▍', '│', '─', '┌', '┐', '└', '┘',
+        'ChatGPT', 'Today', 'Yesterday', 'Previous 7 Days', 'Previous 30 Days',
+        'Thinking...', 'Typing...', 'ChatGPT is typing...',
+        'You', 'ChatGPT', 'User', 'Assistant'
+    }
+    filtered = []
+    for elem in elements:
+        if elem in ui_elements or len(elem) <= 2:
+            continue
+        if elem.isdigit() or (len(elem.split()) == 1 and len(elem) < 10):
+            continue
+        filtered.append(elem)
+    patterns = [
+        lambda e: e.endswith('?') and len(e) > 10,
+        lambda e: any(e.startswith(cmd) for cmd in [
+            'Please ', 'Can you ', 'Could you ', 'Would you ',
+            'Write ', 'Create ', 'Generate ', 'Make ', 'Build ',
+            'Explain ', 'Describe ', 'List ', 'Show ', 'Tell ',
+            'What ', 'How ', 'Why ', 'When ', 'Where ', 'Who ',
+            'Debug ', 'Fix ', 'Update ', 'Add ', 'Remove ', 'Delete ',
+            'Analyze ', 'Help ', 'Find ', 'Search ', 'Look '
+        ]),
+        lambda e: any(word in e.lower() for word in [
+            'please', 'help', 'need', 'want', 'would like', 'could you',
+            'can you', 'wondering', 'question', 'asking'
+        ]) and len(e) > 20,
+    ]
+    last = -1
+    for i in range(len(filtered) - 1, -1, -1):
+        if any(pattern(filtered[i]) for pattern in patterns):
+            last = i
+            break
+    return '\n'.join(filtered[last + 1:] if 0 <= last < len(filtered) - 1 else filtered).strip()
+
+
+def timed(function, *args, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(elements: int):
+    texts = transcript(elements)
+    raw = '\n'.join(texts)
+    expected = '\n'.join(ANSWER)
+    prompt = remember_prompt(1, PROMPT)
+    extractor = ImprovedChatGPTExtractor()
+
+    rows = [
+        ("get_chatgpt_response, first line dropped", timed(legacy_process_response_texts, texts)),
+        ("get_chatgpt_response, prompt anchored", timed(process_response_texts, texts, prompt)),
+        ("extractor, pattern scan", timed(legacy_extract, raw)),
+        ("extractor, prompt anchored", timed(extractor._process_extracted_text, raw, 1)),
+    ]
+    print(f"{len(texts)} elements, answer of {len(ANSWER)} lines after the last prompt")
+    print(f"{'path':42s} {'time':>9s} {'correct':>8s} {'answer lines':>13s}")
+    for name, (seconds, result) in rows:
+        print(f"{name:42s} {seconds * 1000:7.1f}ms {str(result == expected):>8s} {len(result.splitlines()):13d}")
+
+    # Lookup alone: last occurrence found near the end vs prompt absent (full scan)
+    lines = filter_response_lines(texts)
+    found, _ = timed(prompt.locate, lines)
+    absent, _ = timed(PromptFingerprint("A prompt that was never sent\nover two lines").locate, lines)
+    print(f"prompt lookup: {found * 1e6:.1f}us when present, {absent * 1000:.1f}ms full scan when absent")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
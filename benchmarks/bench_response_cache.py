@@ -0,0 +1,86 @@
+"""
+Repeated and concurrent identical prompts with and without the response cache.
+
+Calls the real FastMCP server through an in-memory client session against the
+simulated app:
+
+- N concurrent calls (default 8) with the same prompt, differing only in
+  whitespace, with ``cache=false`` and then ``cache=true``;
+- a repeat of the prompt after the burst (memory hit);
+- a repeat through a fresh cache backed by the same SQLite file (disk hit).
+
+It reports wall time, how many prompts reached the app and the cache counters:
+
+    python benchmarks/bench_response_cache.py [calls]
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+WORK = tempfile.mkdtemp()
+os.environ.setdefault("CHATGPT_MCP_OSASCRIPT", os.path.join(HERE, "fake_osascript.py"))
+os.environ.setdefault("FAKE_CHATGPT_STATE", os.path.join(WORK, "state.json"))
+os.environ.setdefault("FAKE_CHATGPT_START_DELAY", "0.2")
+os.environ.setdefault("FAKE_CHATGPT_SPEED", "400")
+os.environ.setdefault("FAKE_CHATGPT_RESPONSE_LENGTH", "400")
+os.environ["CHATGPT_MCP_CACHE_DB"] = os.path.join(WORK, "responses.db")
+
+from mcp.shared.memory import create_connected_server_and_client_session  # noqa: E402
+from simulated_chatgpt import SimulatedChatGPT  # noqa: E402
+from chatgpt_mcp import response_cache  # noqa: E402
+from chatgpt_mcp.chatgpt_mcp import mcp  # noqa: E402
+
+PROMPT = "What is the capital of France?"
+
+
+def variants(calls: int):
+    # Same prompt with cosmetic differences the normalizer removes
+    return [PROMPT + " " * (i % 3) + "\n" * (i % 2) for i in range(calls)]
+
+
+def sends(simulator: SimulatedChatGPT) -> int:
+    return sum(1 for e in simulator.events() if e["event"] == "send")
+
+
+async def burst(session, simulator, calls: int, cache: bool):
+    simulator.reset()
+    start = time.perf_counter()
+    results = await asyncio.gather(*(
+        session.call_tool("ask_chatgpt_tool", {"prompt": prompt, "cache": cache})
+        for prompt in variants(calls)))
+    elapsed = time.perf_counter() - start
+    answers = {result.content[0].text for result in results}
+    print(f"cache={str(cache):5s} {calls} concurrent calls  {elapsed:5.2f}s  "
+          f"sent to the app {sends(simulator)}  distinct answers {len(answers)}")
+
+
+async def repeat(session, simulator, label: str):
+    simulator.reset()
+    start = time.perf_counter()
+    await session.call_tool("ask_chatgpt_tool", {"prompt": PROMPT, "cache": True})
+    print(f"{label:34s} {(time.perf_counter() - start) * 1000:7.1f} ms  sent to the app {sends(simulator)}")
+
+
+async def run(calls: int):
+    simulator = SimulatedChatGPT()
+    async with create_connected_server_and_client_session(mcp._mcp_server) as session:
+        await burst(session, simulator, calls, cache=False)
+        await burst(session, simulator, calls, cache=True)
+        await repeat(session, simulator, "repeat, memory tier")
+        response_cache._cache = None
+        await repeat(session, simulator, "repeat after restart, disk tier")
+        stats = json.loads((await session.read_resource("chatgpt://cache/stats")).contents[0].text)
+    print(f"cache stats after restart: hits {stats['hits']} (disk {stats['disk_hits']}), "
+          f"misses {stats['misses']}, coalesced {stats['coalesced']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 8))
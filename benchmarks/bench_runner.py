@@ -0,0 +1,41 @@
+"""
+Calls per second through the script runner: spawn-per-call vs persistent worker.
+
+Runs against the fake osascript in this directory, so it works on any platform:
+
+    python benchmarks/bench_runner.py [calls]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from chatgpt_mcp.button_helper import ChatGPTButtonHelper  # noqa: E402
+from chatgpt_mcp.script_runner import ScriptRunner, set_runner  # noqa: E402
+
+FAKE_OSASCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_osascript.py")
+
+
+def measure(runner: ScriptRunner, calls: int) -> float:
+    set_runner(runner)
+    ChatGPTButtonHelper.find_action_button()  # warm up (starts the worker)
+    start = time.perf_counter()
+    for _ in range(calls):
+        ChatGPTButtonHelper.find_action_button()
+    elapsed = time.perf_counter() - start
+    set_runner(None)
+    return calls / elapsed
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    spawn = measure(ScriptRunner(osascript=FAKE_OSASCRIPT, persistent=False), calls)
+    persistent = measure(ScriptRunner(osascript=FAKE_OSASCRIPT, persistent=True), calls)
+    print(f"spawn per call:    {spawn:8.1f} calls/s")
+    print(f"persistent worker: {persistent:8.1f} calls/s  ({persistent / spawn:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
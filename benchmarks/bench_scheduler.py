@@ -0,0 +1,126 @@
+"""
+Concurrent ask_chatgpt_tool calls against the simulated app.
+
+Fires N concurrent tool calls (default 50) at the real FastMCP server through
+an in-memory client session and checks that:
+
+- the prompts reached the app in submission order;
+- no paste wiped an unsent prompt or landed while an answer was generating;
+- every call got the answer to its own prompt.
+
+It then exercises priorities, deadlines and admission control on a scheduler
+with a small queue, and for comparison runs a few calls without the
+scheduler:
+
+    python benchmarks/bench_scheduler.py [calls]
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+os.environ.setdefault("CHATGPT_MCP_OSASCRIPT", os.path.join(HERE, "fake_osascript.py"))
+os.environ.setdefault("FAKE_CHATGPT_STATE", os.path.join(tempfile.mkdtemp(), "state.json"))
+os.environ.setdefault("FAKE_CHATGPT_START_DELAY", "0.05")
+os.environ.setdefault("FAKE_CHATGPT_SPEED", "5000")
+os.environ.setdefault("FAKE_CHATGPT_RESPONSE_LENGTH", "200")
+
+from mcp.shared.memory import create_connected_server_and_client_session  # noqa: E402
+from simulated_chatgpt import SimulatedChatGPT  # noqa: E402
+from chatgpt_mcp.chatgpt_mcp import mcp  # noqa: E402
+from chatgpt_mcp.mcp_tools import ask_chatgpt  # noqa: E402
+from chatgpt_mcp.scheduler import RequestScheduler, SchedulerBusy  # noqa: E402
+
+
+def check_events(simulator: SimulatedChatGPT, prompts):
+    events = simulator.events()
+    sent = [e["text"] for e in events if e["event"] == "send"]
+    clobbered = sum(1 for e in events if e["event"] == "paste" and (e["overwrote"] or e["while_generating"]))
+    return sent, clobbered
+
+
+async def concurrent_tool_calls(calls: int):
+    simulator = SimulatedChatGPT()
+    simulator.reset()
+    prompts = [f"Concurrent question number {i}?" for i in range(calls)]
+    finished = []
+
+    async with create_connected_server_and_client_session(mcp._mcp_server) as session:
+        async def call(i):
+            result = await session.call_tool("ask_chatgpt_tool", {"prompt": prompts[i]})
+            finished.append(i)
+            return result.content[0].text
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(call(i) for i in range(calls)))
+        elapsed = time.perf_counter() - start
+        stats = json.loads((await session.read_resource("chatgpt://scheduler/stats")).contents[0].text)
+
+    sent, clobbered = check_events(simulator, prompts)
+    own_answers = sum(1 for prompt, text in zip(prompts, results) if prompt in text)
+    print(f"{calls} concurrent calls in {elapsed:.1f}s")
+    print(f"  sent in submission order:  {sent == prompts}")
+    print(f"  completed in order:        {finished == sorted(finished)}")
+    print(f"  clobbered pastes:          {clobbered}")
+    print(f"  answers to own prompt:     {own_answers}/{calls}")
+    print(f"  queue: max depth {stats['max_depth']}, wait p50 {stats['wait_p50']:.1f}s "
+          f"p95 {stats['wait_p95']:.1f}s max {stats['wait_max']:.1f}s, service {stats['service_avg']:.2f}s")
+
+
+async def scheduling_policies():
+    scheduler = RequestScheduler(max_queue=3)
+    order = []
+
+    def job(label, seconds=0.05):
+        async def run():
+            await asyncio.sleep(seconds)
+            order.append(label)
+            return label
+        return run
+
+    blocker = asyncio.ensure_future(scheduler.submit(job("blocker", 0.3)))
+    await asyncio.sleep(0)
+    low = asyncio.ensure_future(scheduler.submit(job("low"), priority=0))
+    high = asyncio.ensure_future(scheduler.submit(job("high"), priority=5))
+    late = asyncio.ensure_future(scheduler.submit(job("late"), timeout=0.1))
+    await asyncio.sleep(0)
+    try:
+        await scheduler.submit(job("rejected"))
+        rejection = "accepted"
+    except SchedulerBusy as e:
+        rejection = str(e)
+    await asyncio.gather(blocker, low, high, late, return_exceptions=True)
+
+    print("scheduling policies (queue limit 3)")
+    print(f"  run order:       {order}")
+    print(f"  deadline:        {'expired' if isinstance(late.exception(), asyncio.TimeoutError) else 'ran'}")
+    print(f"  fourth in queue: {rejection}")
+
+
+async def unscheduled(calls: int):
+    simulator = SimulatedChatGPT()
+    simulator.reset()
+    prompts = [f"Unscheduled question number {i}?" for i in range(calls)]
+    results = await asyncio.gather(*(ask_chatgpt(p) for p in prompts), return_exceptions=True)
+    _, clobbered = check_events(simulator, prompts)
+    own_answers = sum(1 for p, r in zip(prompts, results) if isinstance(r, str) and p in r)
+    print(f"without the scheduler, {calls} concurrent calls")
+    print(f"  clobbered pastes:          {clobbered}")
+    print(f"  answers to own prompt:     {own_answers}/{calls}")
+
+
+async def run(calls: int):
+    await concurrent_tool_calls(calls)
+    await scheduling_policies()
+    await unscheduled(5)
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 50))
@@ -0,0 +1,51 @@
+"""
+Compile-per-call vs compile-once for registered scripts.
+
+Uses the fake osascript/osacompile in this directory with a simulated compile
+cost, running each call as its own osascript process so the difference comes
+only from the compiled-script cache:
+
+    python benchmarks/bench_script_cache.py [calls] [compile_cost_seconds]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    os.environ["FAKE_OSASCRIPT_COMPILE_COST"] = sys.argv[2] if len(sys.argv) > 2 else "0.05"
+
+    from chatgpt_mcp.ui_backend import FIND_ACTION_BUTTON_SCRIPT
+    from chatgpt_mcp.script_registry import ScriptCache
+    from chatgpt_mcp.script_runner import ScriptRunner
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        results = {}
+        for label, osacompile in [("compile per call", "/nonexistent/osacompile"),
+                                  ("compile once", os.path.join(HERE, "fake_osacompile.py"))]:
+            runner = ScriptRunner(
+                osascript=os.path.join(HERE, "fake_osascript.py"),
+                persistent=False,
+                cache=ScriptCache(cache_dir=cache_dir, osacompile=osacompile),
+            )
+            runner.run(FIND_ACTION_BUTTON_SCRIPT, ["1"])  # first call compiles
+            start = time.perf_counter()
+            for _ in range(calls):
+                runner.run(FIND_ACTION_BUTTON_SCRIPT, ["1"])
+            results[label] = (time.perf_counter() - start) / calls
+            print(f"{label:17s} {results[label] * 1000:7.1f} ms/call  cache={runner.cache.stats}")
+            runner.close()
+
+    saved = results["compile per call"] - results["compile once"]
+    print(f"saved per call:   {saved * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Per-request setup cost with and without the warm session.
+
+Against the simulated app, compares the setup every request used to do
+(``check_chatgpt_access`` plus ``activate_chatgpt`` with its fixed sleep) with
+``ChatGPTSession.ensure_ready`` while the heartbeat keeps the app's state
+fresh, and after the user switched to another app:
+
+    python benchmarks/bench_session.py [requests]
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+os.environ.setdefault("CHATGPT_MCP_OSASCRIPT", os.path.join(HERE, "fake_osascript.py"))
+os.environ.setdefault("FAKE_CHATGPT_STATE", os.path.join(tempfile.mkdtemp(), "state.json"))
+
+from simulated_chatgpt import SimulatedChatGPT  # noqa: E402
+from chatgpt_mcp.chatgpt_automation import AsyncChatGPTAutomation, check_chatgpt_access  # noqa: E402
+from chatgpt_mcp.session import ChatGPTSession  # noqa: E402
+
+
+async def measure(label: str, simulator: SimulatedChatGPT, requests: int, setup, between=None):
+    simulator.reset()
+    total = 0.0
+    for _ in range(requests):
+        if between is not None:
+            between()
+        start = time.perf_counter()
+        await setup()
+        total += time.perf_counter() - start
+        # Time between requests, during which the heartbeat runs
+        await asyncio.sleep(0.5)
+    calls = sum(simulator.call_counts().values())
+    print(f"{label:36s} {total / requests * 1000:7.1f} ms/request  {calls / requests:4.1f} scripts/request")
+
+
+async def run(requests: int):
+    simulator = SimulatedChatGPT()
+
+    async def legacy():
+        await check_chatgpt_access()
+        await AsyncChatGPTAutomation().activate_chatgpt()
+
+    await measure("check + activate on every request", simulator, requests, legacy)
+
+    session = ChatGPTSession(heartbeat=1.0)
+    session.start()
+    await measure("warm session", simulator, requests, session.ensure_ready)
+    await measure("warm session, user switched apps", simulator, requests, session.ensure_ready,
+                  between=lambda: simulator.set_frontmost(False))
+    await session.stop()
+    print(f"session counters: {session.stats}")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 10))
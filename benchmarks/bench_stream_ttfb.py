@@ -0,0 +1,64 @@
+"""
+Time to first byte of ask_chatgpt_tool with and without streaming.
+
+Calls the real FastMCP server through an in-memory client session against the
+simulated app, whose answers grow at FAKE_CHATGPT_SPEED characters per
+second. With ``stream=true`` the deltas arrive as progress notifications and
+are checked to add up to the final result:
+
+    python benchmarks/bench_stream_ttfb.py [response_length]
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+os.environ.setdefault("CHATGPT_MCP_OSASCRIPT", os.path.join(HERE, "fake_osascript.py"))
+os.environ.setdefault("FAKE_CHATGPT_STATE", os.path.join(tempfile.mkdtemp(), "state.json"))
+os.environ.setdefault("FAKE_CHATGPT_SPEED", "200")
+os.environ["FAKE_CHATGPT_RESPONSE_LENGTH"] = sys.argv[1] if len(sys.argv) > 1 else "1200"
+
+from mcp.shared.memory import create_connected_server_and_client_session  # noqa: E402
+from simulated_chatgpt import SimulatedChatGPT  # noqa: E402
+from chatgpt_mcp.chatgpt_mcp import mcp  # noqa: E402
+
+
+async def call(session, stream: bool):
+    deltas = []
+    start = time.perf_counter()
+    first = None
+
+    async def on_progress(progress, total, message):
+        nonlocal first
+        if first is None:
+            first = time.perf_counter() - start
+        deltas.append(message or "")
+
+    result = await session.call_tool(
+        "ask_chatgpt_tool",
+        {"prompt": f"Streaming benchmark question, stream={stream}?", "stream": stream},
+        progress_callback=on_progress if stream else None,
+    )
+    total = time.perf_counter() - start
+    return first or total, total, deltas, result.content[0].text
+
+
+async def run():
+    SimulatedChatGPT().reset()
+    async with create_connected_server_and_client_session(mcp._mcp_server) as session:
+        for stream in (False, True):
+            first, total, deltas, text = await call(session, stream)
+            line = f"stream={str(stream):5s}  first text {first:5.2f}s  complete {total:5.2f}s"
+            if stream:
+                line += f"  deltas {len(deltas)}  reassembled == result: {''.join(deltas) == text}"
+            print(line)
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -0,0 +1,109 @@
+"""
+AppleScript vs JXA UI backend: Python cost of turning script output into results.
+
+Each backend's three queries (locate every control, query one element, scan
+for the action button) are run with a stub runner that returns the output
+the simulated app gives that backend's scripts, so only the Python side is
+measured: tab-separated records and regex-parsed pseudo-JSON for AppleScript,
+one json.loads for JXA. The benchmark then checks that both backends return
+equal typed results, shows what happens to a help text containing quotes,
+and runs both backends end to end through the persistent worker of the
+fake osascript:
+
+    python benchmarks/bench_ui_backend.py [calls]
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+os.environ.setdefault("FAKE_CHATGPT_STATE", os.path.join(tempfile.mkdtemp(), "state.json"))
+
+from simulated_chatgpt import ACTION_PATH, SimulatedChatGPT  # noqa: E402
+from chatgpt_mcp.script_runner import ScriptRunner, set_runner  # noqa: E402
+from chatgpt_mcp.ui_backend import AppleScriptBackend, JXABackend  # noqa: E402
+from chatgpt_mcp.ui_locator import UILocator  # noqa: E402
+
+QUOTED_HELP = '"Research" mode: Send message'
+
+
+def stub_runner(outputs):
+    """Runner answering every script with its canned output"""
+    async def run(script, args=None, **kwargs):
+        return subprocess.CompletedProcess([script.name], 0, outputs[script.name], "")
+    return run
+
+
+def canned_outputs(simulator: SimulatedChatGPT, backend) -> dict:
+    scripts = [(backend.locate_controls_script, ["1"]),
+               (backend.query_element_script, ["1", ACTION_PATH]),
+               (backend.find_action_button_script, ["1"])]
+    return {script.name: simulator.handle(script.name, args) for script, args in scripts}
+
+
+async def queries(backend):
+    return (await backend.locate_controls(1),
+            await backend.query_element(1, ACTION_PATH),
+            await backend.find_action_button(1))
+
+
+async def per_call(backend, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        await queries(backend)
+    return (time.perf_counter() - start) / (3 * calls)
+
+
+async def end_to_end(backend, calls: int) -> float:
+    locator = UILocator(1, backend)
+    await locator.scan()
+    start = time.perf_counter()
+    for _ in range(calls):
+        await locator.action_button()
+    return (time.perf_counter() - start) / calls
+
+
+async def main(calls: int):
+    simulator = SimulatedChatGPT()
+    simulator.reset()
+    backends = {}
+    for backend_class in (AppleScriptBackend, JXABackend):
+        outputs = canned_outputs(simulator, backend_class)
+        backends[backend_class.name] = (backend_class(stub_runner(outputs)), outputs)
+
+    print(f"{'backend':12s} {'parse per query':>16s} {'output bytes':>13s}")
+    for name, (backend, outputs) in backends.items():
+        seconds = await per_call(backend, calls)
+        size = sum(len(output.encode()) for output in outputs.values())
+        print(f"{name:12s} {seconds * 1e6:14.1f}us {size:13d}")
+
+    results = [await queries(backend) for backend, _ in backends.values()]
+    print(f"same typed results from both backends: {results[0] == results[1]}")
+
+    # A help text with quotes, as each find_action_button script would print it
+    applescript = ('{"x":1180,"y":860,"width":46,"height":46,'
+                   f'"help":"{QUOTED_HELP}","enabled":true,"description":null}}')
+    jxa = json.dumps({"role": "AXButton", "path": None, "x": 1180, "y": 860, "width": 46, "height": 46,
+                      "help": QUOTED_HELP, "enabled": True, "description": None})
+    for name, output in (("applescript", applescript), ("jxa", jxa)):
+        button = backends[name][0].parse_button(output)
+        print(f"{name:12s} help {QUOTED_HELP!r} read as {button.help!r} (state {button.state})")
+
+    fake_osascript = os.path.join(HERE, "fake_osascript.py")
+    set_runner(ScriptRunner(osascript=fake_osascript, persistent=True))
+    for backend_class in (AppleScriptBackend, JXABackend):
+        seconds = await end_to_end(backend_class(), max(calls // 10, 10))
+        print(f"{backend_class.name:12s} action button through the worker: {seconds * 1000:.2f}ms per lookup")
+    set_runner(None)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000))
@@ -0,0 +1,75 @@
+"""
+Throughput of concurrent ask_chatgpt_tool calls with one and several windows.
+
+Fires N concurrent tool calls (default 12) at the real FastMCP server through
+an in-memory client session against the simulated app, once per pool size,
+and checks that every call got the answer to its own prompt and that no paste
+landed on a window that was busy:
+
+    python benchmarks/bench_window_pool.py [calls] [sizes...]
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+os.environ.setdefault("CHATGPT_MCP_OSASCRIPT", os.path.join(HERE, "fake_osascript.py"))
+os.environ.setdefault("FAKE_CHATGPT_STATE", os.path.join(tempfile.mkdtemp(), "state.json"))
+os.environ.setdefault("FAKE_CHATGPT_START_DELAY", "0.2")
+os.environ.setdefault("FAKE_CHATGPT_SPEED", "400")
+os.environ.setdefault("FAKE_CHATGPT_RESPONSE_LENGTH", "400")
+
+from mcp.shared.memory import create_connected_server_and_client_session  # noqa: E402
+from simulated_chatgpt import SimulatedChatGPT  # noqa: E402
+from chatgpt_mcp import scheduler, window_pool  # noqa: E402
+from chatgpt_mcp.chatgpt_mcp import mcp  # noqa: E402
+
+
+async def run_pool(calls: int, size: int):
+    os.environ["CHATGPT_MCP_WINDOWS"] = str(size)
+    window_pool._pool = None
+    scheduler._scheduler = None
+    simulator = SimulatedChatGPT()
+    simulator.reset()
+    prompts = [f"Pool of {size}, question number {i}?" for i in range(calls)]
+
+    async with create_connected_server_and_client_session(mcp._mcp_server) as session:
+        start = time.perf_counter()
+        results = await asyncio.gather(*(
+            session.call_tool("ask_chatgpt_tool", {"prompt": prompt}) for prompt in prompts))
+        elapsed = time.perf_counter() - start
+        stats = json.loads((await session.read_resource("chatgpt://scheduler/stats")).contents[0].text)
+
+    events = simulator.events()
+    clobbered = sum(1 for e in events if e["event"] == "paste" and (e["overwrote"] or e["while_generating"]))
+    per_window = {}
+    for e in events:
+        if e["event"] == "send":
+            per_window[e["window"]] = per_window.get(e["window"], 0) + 1
+    own_answers = sum(1 for prompt, result in zip(prompts, results) if prompt in result.content[0].text)
+    print(f"{size} window(s): {calls} calls in {elapsed:5.1f}s  {calls / elapsed:5.2f} calls/s  "
+          f"own answers {own_answers}/{calls}  clobbered {clobbered}  "
+          f"per window {dict(sorted(per_window.items()))}  lease waits {stats['windows']['waits']}")
+    return elapsed
+
+
+async def run(calls: int, sizes):
+    baseline = None
+    for size in sizes:
+        elapsed = await run_pool(calls, size)
+        baseline = baseline or elapsed
+        if elapsed != baseline:
+            print(f"  speedup over {sizes[0]} window(s): {baseline / elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 12
+    sizes = [int(s) for s in sys.argv[2:]] or [1, 3]
+    asyncio.run(run(calls, sizes))
@@ -0,0 +1,143 @@
+"""
+Peak memory and CPU of reading a large conversation: JSON vs the framed format.
+
+Builds the output the full-window extraction script produces for a
+conversation of N texts (default 50000, a few hundred characters each, with
+quotes, backslashes and line breaks), once as the JSON it used to build and
+once as an RS/US frame, each wrapped in the reply the script worker
+writes. Then reads the answer from each the way the server does
+(get_chatgpt_response's full-window path), reading the reply from a pipe
+line by line as the runner does:
+
+- JSON: the reply is one line, decoded into the script's output as one
+  string, which json.loads turns into a list of texts;
+- frame: the same one-line reply, read_frame over the output string;
+- frame, chunked: the chunked reply the worker writes when the runner asks
+  for ``chunked`` output, a header line and one line per 64 KiB of output;
+  read_frame over the decoded chunks, each dropped once parsed
+  (drain_chunks), so the output is never held whole;
+- all: process_response_texts with the same sent prompt.
+
+All three therefore return the same answer. Peak memory is measured with
+tracemalloc, CPU time with process_time:
+
+    python benchmarks/bench_wire_format.py [texts]
+"""
+
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from chatgpt_mcp.mcp_tools import NO_RESPONSE, process_response_texts  # noqa: E402
+from chatgpt_mcp.response_boundary import PromptFingerprint  # noqa: E402
+from chatgpt_mcp.script_runner import CHUNK_SIZE  # noqa: E402
+from chatgpt_mcp.wire_format import RS, US, drain_chunks, read_frame  # noqa: E402
+
+PROMPT = "Compare the two \"draft\" plans and list the open questions"
+
+
+def conversation(texts: int):
+    out = ["ChatGPT", "New chat", "Today"]
+    for i in range(texts):
+        if i % 10 == 0:
+            out.append(f"Question {i} about the \"{i % 7}\" report, with a path C:\\reports\\{i}?")
+        else:
+            out.append(f"Paragraph {i}: the \"quoted\" figures in C:\\data\\{i} are\nsplit over two lines. " * 3)
+        if i % 10 == 9:
+            out.extend(["Copy", "Regenerate"])
+    out.append(PROMPT)
+    out.extend(f"Open question {j}: who signs off on \"phase {j}\"?" for j in range(5))
+    out.append("Ask anything")
+    return out
+
+
+def worker_reply(output: str) -> bytes:
+    """The line the script worker writes for a call that printed ``output``"""
+    return json.dumps({"id": 1, "ok": True, "output": output}).encode() + b"\n"
+
+
+def chunked_reply(output: str) -> bytes:
+    """The lines the script worker writes for the same call made ``chunked``"""
+    lines = [json.dumps({"id": 1, "ok": True, "chunked": True})]
+    lines.extend(json.dumps(output[start:start + CHUNK_SIZE]) for start in range(0, len(output), CHUNK_SIZE))
+    lines.append("null")
+    return "\n".join(lines).encode() + b"\n"
+
+
+def json_read(reply: bytes, prompt: PromptFingerprint) -> str:
+    line = io.BytesIO(reply).readline()
+    output = json.loads(line)["output"]
+    data = json.loads(output)
+    if data.get("status") != "success":
+        return NO_RESPONSE
+    return process_response_texts(data.get("texts", []), prompt)
+
+
+def framed_read(reply: bytes, prompt: PromptFingerprint) -> str:
+    line = io.BytesIO(reply).readline()
+    output = json.loads(line)["output"]
+    status, _, texts = read_frame(output)
+    if status != "ok":
+        return NO_RESPONSE
+    return process_response_texts(texts, prompt)
+
+
+def chunked_read(reply: bytes, prompt: PromptFingerprint) -> str:
+    # As _Worker.call reads a chunked reply: the header, then chunks up to null
+    pipe = io.BytesIO(reply)
+    json.loads(pipe.readline())
+    chunks = []
+    while True:
+        chunk = json.loads(pipe.readline())
+        if chunk is None:
+            break
+        chunks.append(chunk)
+    status, _, texts = read_frame(drain_chunks(chunks))
+    if status != "ok":
+        return NO_RESPONSE
+    return process_response_texts(texts, prompt)
+
+
+def measure(function, *args):
+    best_cpu = float("inf")
+    for _ in range(3):
+        start = time.process_time()
+        function(*args)
+        best_cpu = min(best_cpu, time.process_time() - start)
+    tracemalloc.start()
+    result = function(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best_cpu, peak, result
+
+
+def main(count: int):
+    texts = conversation(count)
+    json_line = worker_reply(json.dumps({"status": "success", "textCount": len(texts), "texts": texts,
+                                         "indicators": {"conversationComplete": True}}, ensure_ascii=False))
+    frame = RS.join([f"ok{US}true"] + texts)
+    frame_line = worker_reply(frame)
+    frame_chunks = chunked_reply(frame)
+
+    prompt = PromptFingerprint(PROMPT)
+    rows = [
+        ("JSON", json_line, measure(json_read, json_line, prompt)),
+        ("frame", frame_line, measure(framed_read, frame_line, prompt)),
+        ("frame, chunked", frame_chunks, measure(chunked_read, frame_chunks, prompt)),
+    ]
+    print(f"{len(texts)} texts")
+    print(f"{'format':15s} {'reply':>9s} {'peak memory':>12s} {'cpu':>8s} {'answer lines':>13s}")
+    for name, reply, (cpu, peak, result) in rows:
+        print(f"{name:15s} {len(reply) / 2**20:7.1f}MB {peak / 2**20:10.1f}MB "
+              f"{cpu * 1000:6.0f}ms {len(result.splitlines()):13d}")
+    print(f"same answer: {len({row[2][2] for row in rows}) == 1}")
+    print(f"AppleScript escaping passes avoided: {5 * len(texts)} (5 per text)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Stand-in for macOS ``osacompile``: ``fake_osacompile.py [-l <language>] -o <output> -e <source>``.
+
+The "compiled" file is just the source, which ``fake_osascript.py`` knows how to
+run. FAKE_OSASCRIPT_COMPILE_COST adds the same compile delay as the fake osascript.
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from simulated_chatgpt import SimulatedChatGPT  # noqa: E402
+
+
+def main(argv):
+    SimulatedChatGPT().record_spawn("osacompile")
+    output = source = None
+    while argv:
+        flag, value, argv = argv[0], argv[1], argv[2:]
+        if flag == "-o":
+            output = value
+        elif flag == "-l":
+            pass
+        elif flag == "-e":
+            source = value if source is None else f"{source}\n{value}"
+    if output is None or source is None:
+        sys.stderr.write("usage: fake_osacompile.py -o output -e source\n")
+        return 1
+    time.sleep(float(os.environ.get("FAKE_OSASCRIPT_COMPILE_COST", "0")))
+    with open(output, "w") as f:
+        f.write(source)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Stand-in for macOS ``osascript`` so the script runner can be exercised on Linux.
+
+Usage mirrors the real tool:
+    fake_osascript.py -e <script> [argument ...]       run one script and exit
+    fake_osascript.py <file.scpt> [argument ...]        run a compiled script
+    fake_osascript.py -l JavaScript -e <worker source>  act as a persistent worker
+
+Scripts are answered by the simulated app in ``simulated_chatgpt.py``.
+Point the server at it with ``CHATGPT_MCP_OSASCRIPT=/path/to/fake_osascript.py``
+(and ``CHATGPT_MCP_OSACOMPILE`` at ``fake_osacompile.py``).
+
+FAKE_OSASCRIPT_LATENCY adds a fixed delay (seconds) to every script run.
+FAKE_OSASCRIPT_COMPILE_COST adds a delay whenever source has to be compiled.
+"""
+
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from simulated_chatgpt import SimulatedChatGPT, script_name  # noqa: E402
+
+LATENCY = float(os.environ.get("FAKE_OSASCRIPT_LATENCY", "0"))
+COMPILE_COST = float(os.environ.get("FAKE_OSASCRIPT_COMPILE_COST", "0"))
+SIMULATOR = SimulatedChatGPT()
+
+
+def compile_source(source):
+    """Simulate the cost of compiling AppleScript source"""
+    if COMPILE_COST:
+        time.sleep(COMPILE_COST)
+    return source
+
+
+def load_compiled(path):
+    """Compiled scripts written by fake_osacompile.py are plain source"""
+    with open(path) as f:
+        return f.read()
+
+
+def respond(source, args, name=None):
+    """Return what the simulated app prints for a script"""
+    if LATENCY:
+        time.sleep(LATENCY)
+    return SIMULATOR.handle(script_name(source, name), args)
+
+
+def write_chunked(reply, size):
+    """The worker's chunked reply: header, one JSON string per chunk, then null"""
+    output = reply.pop("output")
+    sys.stdout.write(json.dumps(dict(reply, chunked=True)) + "\n")
+    for start in range(0, len(output), size):
+        sys.stdout.write(json.dumps(output[start:start + size]) + "\n")
+    sys.stdout.write("null\n")
+
+
+def serve():
+    compiled = {}
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        key = request.get("path") or request.get("source", "")
+        try:
+            if key not in compiled:
+                if request.get("path"):
+                    try:
+                        compiled[key] = load_compiled(request["path"])
+                    except OSError as e:
+                        reply = {"id": request["id"], "ok": False, "load_error": True, "error": str(e)}
+                        sys.stdout.write(json.dumps(reply) + "\n")
+                        sys.stdout.flush()
+                        continue
+                else:
+                    compiled[key] = compile_source(request["source"])
+            reply = {"id": request["id"], "ok": True,
+                     "output": respond(compiled[key], request.get("args", []), request.get("name"))}
+        except Exception as e:
+            reply = {"id": request["id"], "ok": False, "error": str(e)}
+        if reply["ok"] and request.get("chunk"):
+            write_chunked(reply, request["chunk"])
+        else:
+            sys.stdout.write(json.dumps(reply) + "\n")
+        sys.stdout.flush()
+
+
+def main(argv):
+    SIMULATOR.record_spawn("osascript")
+    language = "AppleScript"
+    if argv[:1] == ["-l"]:
+        language, argv = argv[1], argv[2:]
+    if not argv:
+        sys.stderr.write("usage: fake_osascript.py [-l language] [-e script | file] [argument ...]\n")
+        return 1
+    if argv[0] != "-e":
+        # Compiled scripts are cached as <name>-<digest>.scpt
+        name = os.path.basename(argv[0]).rsplit("-", 1)[0]
+        print(respond(load_compiled(argv[0]), argv[1:], name))
+        return 0
+    source, args = argv[1], argv[2:]
+    if language == "JavaScript" and not args and "NSAppleScript" in source:
+        serve()
+        return 0
+    print(respond(compile_source(source), args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
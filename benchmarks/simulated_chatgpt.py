@@ -0,0 +1,540 @@
+"""
+Simulated ChatGPT desktop app, as seen through the server's scripts.
+
+``fake_osascript.py`` hands every script it is asked to run to
+``SimulatedChatGPT.handle`` together with the script's registered name. The
+simulation is a small state machine per window (idle -> input filled ->
+generating -> idle) whose state lives in a JSON file, so one-shot osascript
+processes and persistent workers all see the same app. Windows are created
+on first use. Each window has its own conversations; its sidebar lists those
+with messages, most recently used first, titled by their first prompt.
+
+Configuration (environment variables):
+    FAKE_CHATGPT_STATE            state file (default: <tmp>/fake-chatgpt-<uid>.json)
+    FAKE_CHATGPT_SPEED            generation speed in characters per second (400)
+    FAKE_CHATGPT_START_DELAY      seconds before the first token appears (0.5)
+    FAKE_CHATGPT_RESPONSE_LENGTH  characters per answer (400)
+    FAKE_CHATGPT_PROMPT_SPEED     characters per second read from a prompt before the
+                                  first token (0: no cost)
+    FAKE_CHATGPT_HISTORY          earlier question/answer pairs in the conversation (0)
+    FAKE_CHATGPT_ELEMENT_COST     seconds per text element a script visits (0)
+    FAKE_CHATGPT_ACTIVATE_DELAY   seconds until the app is frontmost after activation (0.15)
+    FAKE_CHATGPT_SCRIPT_DELAYS    extra seconds for named scripts, e.g. "extract_class_based=12"
+    FAKE_CHATGPT_FAILING_SCRIPTS  comma-separated scripts that answer "ERROR: ..."
+    FAKE_CHATGPT_HUNG_SCRIPTS     scripts whose first calls never return, e.g. "status_probe=1"
+"""
+
+import fcntl
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# Answers of the simulated app stay out of the user's transcript store
+os.environ.setdefault("CHATGPT_MCP_HISTORY_DB", "off")
+
+# Separators of framed script output (see chatgpt_mcp.wire_format)
+RS = "\x1e"
+US = "\x1f"
+
+# How long a hung script blocks (until its process is killed, in practice)
+HANG_SECONDS = 3600
+
+WINDOW_GEOMETRY = (0, 0, 1400, 900)
+BUTTON_POSITION = (1180, 860)
+BUTTON_SIZE = (46, 46)
+
+# Element paths (UI element indexes from the window) of the located controls
+ACTION_PATH = "1/1/3/2"
+INPUT_PATH = "1/1/3/1"
+NEW_CHAT_PATH = "1/2/1/1"
+CONVERSATION_PATH = "1/1/2"
+SIDEBAR_PATH = "1/2"
+SIDEBAR_LIST_PATH = "1/2/2"
+
+SIDEBAR_TEXTS = ["ChatGPT", "New chat", "Today", "Previous 7 Days"]
+FOOTER_TEXTS = ["Ask anything"]
+
+FILLER = (
+    "The quick brown fox jumps over the lazy dog while the simulated assistant "
+    "keeps producing tokens at a steady rate for the benchmark harness. "
+)
+
+# Position of the window index in each script's arguments (default: first)
+WINDOW_ARGUMENT = {"paste_text": 2, "click_at": 2, "start_new_chat": 2}
+
+# Markers used to recognise scripts run from source, where no name is passed
+SCRIPT_MARKERS = [
+    ("open_conversation", "rowTitle("),
+    ("read_turns", "knownSignatures"),
+    ("jxa_locate_controls", "visitScrollArea"),
+    ("jxa_query_element", "found.element"),
+    ("jxa_find_action_button", "candidates.sort"),
+    ("status_probe", "probeMode"),
+    ("locate_controls", "considerButton"),
+    ("query_element", "queryOutput"),
+    ("extract_latest_messages", "scopeOutput"),
+    ("find_action_button", "largeButtons"),
+    ("start_new_chat", "New Chat button"),
+    ("click_at", "click at {clickX, clickY}"),
+    ("paste_text", 'keystroke "v"'),
+    ("get_chatgpt_response", "frameOutput"),
+    ("chatgpt_process_exists", 'application process "ChatGPT" exists'),
+    ("launch_chatgpt", "my waitForWindow("),
+    ("chatgpt_frontmost", "(frontmost of process"),
+    ("session_status", "(count of windows)"),
+    ("activate_chatgpt", 'tell application "ChatGPT" to activate'),
+    ("extract_texts", "entire contents"),
+]
+
+
+def script_name(source: str, name: Optional[str] = None) -> str:
+    """Identify a script by its registered name or by a marker in its source"""
+    if name:
+        return name
+    for candidate, marker in SCRIPT_MARKERS:
+        if marker in source:
+            return candidate
+    return "unknown"
+
+
+def checksum(text: str) -> int:
+    """Same checksum as the status probe script: last 256 characters, mod 65521"""
+    total = 0
+    for char in text[-256:]:
+        total = (total * 31 + ord(char)) % 65521
+    return total
+
+
+def element_record(role: str, path: str, position, size, help_text: Optional[str],
+                   description: str = "") -> str:
+    """Tab-separated element record, as written by the locator's describe handler"""
+    return "\t".join([role, path, str(position[0]), str(position[1]), str(size[0]), str(size[1]),
+                      help_text or "", "true", description])
+
+
+def element_object(role: str, path: Optional[str], position, size, help_text: Optional[str],
+                   description: str = "") -> Dict:
+    """Element object, as written by the JXA backend's describe function"""
+    return {"role": role, "path": path, "x": position[0], "y": position[1], "width": size[0],
+            "height": size[1], "help": help_text or None, "enabled": True, "description": description or None}
+
+
+def geometry_line() -> str:
+    return "\t".join(["window", *(str(v) for v in WINDOW_GEOMETRY)])
+
+
+def default_state_path() -> str:
+    return os.environ.get(
+        "FAKE_CHATGPT_STATE",
+        os.path.join(tempfile.gettempdir(), f"fake-chatgpt-{os.getuid()}.json"),
+    )
+
+
+class SimulatedChatGPT:
+    """State machine of the ChatGPT windows"""
+
+    def __init__(self, state_path: Optional[str] = None):
+        self.state_path = state_path or default_state_path()
+        self.speed = float(os.environ.get("FAKE_CHATGPT_SPEED", "400"))
+        self.start_delay = float(os.environ.get("FAKE_CHATGPT_START_DELAY", "0.5"))
+        self.response_length = int(os.environ.get("FAKE_CHATGPT_RESPONSE_LENGTH", "400"))
+        self.prompt_speed = float(os.environ.get("FAKE_CHATGPT_PROMPT_SPEED", "0"))
+        self.history = int(os.environ.get("FAKE_CHATGPT_HISTORY", "0"))
+        self.element_cost = float(os.environ.get("FAKE_CHATGPT_ELEMENT_COST", "0"))
+        self.script_delays = {
+            name: float(seconds) for name, seconds in
+            (item.split("=") for item in os.environ.get("FAKE_CHATGPT_SCRIPT_DELAYS", "").split(",") if item)
+        }
+        self.hung_scripts = {
+            name: int(calls) for name, calls in
+            (item.split("=") for item in os.environ.get("FAKE_CHATGPT_HUNG_SCRIPTS", "").split(",") if item)
+        }
+        self.failing_scripts = set(filter(None, os.environ.get("FAKE_CHATGPT_FAILING_SCRIPTS", "").split(",")))
+        self.activate_delay = float(os.environ.get("FAKE_CHATGPT_ACTIVATE_DELAY", "0.15"))
+        self.visited = 0
+        self.window = "1"
+        self.events_log: List[Dict] = []
+        self.app: Dict = {}
+
+    # -- state file --------------------------------------------------------
+
+    def fresh_state(self) -> Dict:
+        return {"windows": {}, "calls": {}, "events": [], "app": {"frontmost": False}}
+
+    def fresh_window(self) -> Dict:
+        messages = []
+        for i in range(self.history):
+            messages.append({"role": "user", "text": f"Earlier question number {i + 1}?"})
+            messages.append({"role": "assistant", "text": self.answer_for(f"earlier {i + 1}"),
+                             "started_at": 0, "shown": None})
+        return {"input": "", "conversations": [messages], "current": 0, "recent": [0] if messages else []}
+
+    def window_state(self, state: Dict, window: str) -> Dict:
+        """State of one window, created on first use"""
+        if window not in state["windows"]:
+            state["windows"][window] = self.fresh_window()
+        return state["windows"][window]
+
+    def record(self, event: Dict):
+        self.events_log.append({**event, "window": self.window})
+
+    def reset(self):
+        state = self.fresh_state()
+        self.window_state(state, "1")
+        with open(self.state_path, "w") as f:
+            json.dump(state, f)
+
+    @contextmanager
+    def state(self):
+        with open(self.state_path, "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0)
+            raw = f.read()
+            state = json.loads(raw) if raw else self.fresh_state()
+            yield state
+            f.seek(0)
+            f.truncate()
+            json.dump(state, f)
+
+    def set_frontmost(self, frontmost: bool):
+        """Simulate the user switching to another app (False) or back"""
+        with self.state() as state:
+            state.setdefault("app", {})["frontmost"] = frontmost
+
+    def record_spawn(self, tool: str):
+        """Count one start of a stand-in executable (osascript, osacompile)"""
+        with self.state() as state:
+            spawns = state.setdefault("spawns", {})
+            spawns[tool] = spawns.get(tool, 0) + 1
+
+    def spawn_counts(self) -> Dict[str, int]:
+        with self.state() as state:
+            return dict(state.get("spawns", {}))
+
+    def call_counts(self) -> Dict[str, int]:
+        with self.state() as state:
+            return dict(state["calls"])
+
+    def is_generating(self, window: str = "1") -> bool:
+        """Whether a window is still generating an answer"""
+        with self.state() as state:
+            return self.generating(self.window_state(state, window), time.time())
+
+    def events(self) -> List[Dict]:
+        """Pastes and sends in the order the app saw them"""
+        with self.state() as state:
+            return list(state["events"])
+
+    # -- model -------------------------------------------------------------
+
+    def answer_for(self, prompt: str) -> str:
+        text = f"Here is the answer to: {prompt.strip()[:80]}. "
+        while len(text) < self.response_length:
+            text += FILLER
+        return text[:self.response_length]
+
+    def visible(self, message: Dict, now: float) -> str:
+        """Part of an assistant message that has been rendered so far"""
+        if message.get("shown") is not None:
+            return message["text"][:message["shown"]]
+        elapsed = now - message["started_at"] - self.start_delay
+        if elapsed <= 0:
+            return ""
+        return message["text"][:int(elapsed * self.speed)]
+
+    def generating(self, win: Dict, now: float) -> bool:
+        messages = win["conversations"][win["current"]]
+        if not messages or messages[-1]["role"] != "assistant":
+            return False
+        last = messages[-1]
+        return last.get("shown") is None and len(self.visible(last, now)) < len(last["text"])
+
+    def message_texts(self, message: Dict, now: float) -> List[str]:
+        """Static texts inside one message container"""
+        text = message["text"] if message["role"] == "user" else self.visible(message, now)
+        return [line for line in text.split("\n") if line]
+
+    def sidebar_rows(self, win: Dict) -> List[tuple]:
+        """(conversation index, title) of each sidebar row, most recently used first"""
+        return [(index, win["conversations"][index][0]["text"][:40]) for index in win.setdefault("recent", [])]
+
+    def texts(self, win: Dict, now: float) -> List[str]:
+        texts = list(SIDEBAR_TEXTS)
+        texts.extend(title for _, title in self.sidebar_rows(win))
+        for message in win["conversations"][win["current"]]:
+            texts.extend(self.message_texts(message, now))
+        texts += FOOTER_TEXTS
+        self.visited += len(texts)
+        return texts
+
+    def tail_texts(self, win: Dict, now: float, first_index: int):
+        """Same as the tailTexts AppleScript handler: (count, first index, texts)"""
+        messages = win["conversations"][win["current"]]
+        count = len(messages)
+        if first_index < 1 or first_index > count:
+            first_index = count - 1
+        first_index = max(first_index, 1)
+        texts = []
+        for message in messages[first_index - 1:]:
+            texts.extend(self.message_texts(message, now))
+        self.visited += len(texts)
+        return count, first_index, texts
+
+    def button(self, win: Dict, now: float) -> Dict:
+        if self.generating(win, now):
+            help_text = "Stop streaming"
+        elif win["input"]:
+            help_text = "Send message"
+        else:
+            help_text = "Start voice mode"
+        return {"x": BUTTON_POSITION[0], "y": BUTTON_POSITION[1],
+                "width": BUTTON_SIZE[0], "height": BUTTON_SIZE[1],
+                "help": help_text, "enabled": True, "description": None}
+
+    def controls(self, win: Dict, now: float) -> Dict[str, tuple]:
+        """(role, path, position, size, help, description) of the controls, keyed by element path"""
+        button = self.button(win, now)
+        return {
+            ACTION_PATH: ("AXButton", ACTION_PATH, BUTTON_POSITION, BUTTON_SIZE, button["help"]),
+            INPUT_PATH: ("AXTextArea", INPUT_PATH, (300, 850), (860, 60), None),
+            NEW_CHAT_PATH: ("AXButton", NEW_CHAT_PATH, (340, 180), (44, 40), None, "New chat"),
+            CONVERSATION_PATH: ("AXScrollArea", CONVERSATION_PATH, (260, 60), (1140, 760), None),
+        }
+
+    def elements(self, win: Dict, now: float) -> Dict[str, str]:
+        """Element records of the controls, keyed by element path"""
+        return {path: element_record(*control) for path, control in self.controls(win, now).items()}
+
+    def element_objects(self, win: Dict, now: float) -> Dict[str, Dict]:
+        """Element objects of the controls (JXA backend), keyed by element path"""
+        return {path: element_object(*control) for path, control in self.controls(win, now).items()}
+
+    def send(self, win: Dict, now: float):
+        prompt, win["input"] = win["input"], ""
+        self.record({"event": "send", "text": prompt,
+                                "while_generating": self.generating(win, now)})
+        messages = win["conversations"][win["current"]]
+        recent = win.setdefault("recent", [])
+        if win["current"] in recent:
+            recent.remove(win["current"])
+        recent.insert(0, win["current"])
+        messages.append({"role": "user", "text": prompt})
+        messages.append({"role": "assistant", "text": self.answer_for(prompt),
+                         "started_at": now + (len(prompt) / self.prompt_speed if self.prompt_speed else 0),
+                         "shown": None})
+
+    # -- scripts -----------------------------------------------------------
+
+    def handle(self, name: str, args: List[str]) -> str:
+        """Return what the real app would make the named script print"""
+        now = time.time()
+        self.visited = 0
+        self.pause = 0.0
+        self.error = None
+        with self.state() as state:
+            state["calls"][name] = calls = state["calls"].get(name, 0) + 1
+            index = WINDOW_ARGUMENT.get(name, 0)
+            window = args[index] if len(args) > index and args[index].isdigit() else "1"
+            self.window, self.events_log = window, state["events"]
+            self.app = state.setdefault("app", {"frontmost": False})
+            win = self.window_state(state, window)
+            handler = getattr(self, f"script_{name}", None)
+            output = handler(win, now, args) if handler else ""
+        if self.pause:
+            time.sleep(self.pause)
+        if self.error:
+            # A script that fails with an AppleScript error
+            raise RuntimeError(self.error)
+        if self.element_cost and self.visited:
+            # Accessibility queries cost time per element walked
+            time.sleep(self.visited * self.element_cost)
+        if name in self.script_delays:
+            time.sleep(self.script_delays[name])
+        if calls <= self.hung_scripts.get(name, 0):
+            time.sleep(HANG_SECONDS)
+        if name in self.failing_scripts:
+            return "ERROR: simulated failure"
+        return output
+
+    def script_chatgpt_process_exists(self, win, now, args):
+        return "true"
+
+    def frontmost(self, now: float) -> bool:
+        return self.app.get("frontmost", False) and now >= self.app.get("ready_at", 0)
+
+    def script_session_status(self, win, now, args):
+        return f"true {str(self.frontmost(now)).lower()} 1"
+
+    def script_chatgpt_frontmost(self, win, now, args):
+        return str(self.frontmost(now)).lower()
+
+    def script_activate_chatgpt(self, win, now, args):
+        if not self.frontmost(now):
+            self.app["frontmost"] = True
+            self.app["ready_at"] = now + self.activate_delay
+        return ""
+
+    script_launch_chatgpt = script_activate_chatgpt
+
+    def script_find_action_button(self, win, now, args):
+        return json.dumps(self.button(win, now), separators=(",", ":"))
+
+    def script_locate_controls(self, win, now, args):
+        elements = self.elements(win, now)
+        return "\n".join([
+            geometry_line(),
+            f"action\t{elements[ACTION_PATH]}",
+            f"input\t{elements[INPUT_PATH]}",
+            f"newchat\t{elements[NEW_CHAT_PATH]}",
+            f"conversation\t{elements[CONVERSATION_PATH]}",
+        ])
+
+    def script_jxa_find_action_button(self, win, now, args):
+        role, _, position, size, help_text = self.controls(win, now)[ACTION_PATH]
+        # The split group scan does not report element paths
+        return json.dumps(element_object(role, None, position, size, help_text))
+
+    def script_jxa_locate_controls(self, win, now, args):
+        objects = self.element_objects(win, now)
+        return json.dumps({"window": list(WINDOW_GEOMETRY), "controls": {
+            "action": objects[ACTION_PATH],
+            "input": objects[INPUT_PATH],
+            "newchat": objects[NEW_CHAT_PATH],
+            "conversation": objects[CONVERSATION_PATH],
+        }})
+
+    def script_jxa_query_element(self, win, now, args):
+        path = args[1] if len(args) > 1 else ""
+        return json.dumps({"window": list(WINDOW_GEOMETRY),
+                           "element": self.element_objects(win, now).get(path)})
+
+    def script_read_turns(self, win, now, args):
+        if len(args) < 2 or args[1] != CONVERSATION_PATH:
+            return f"error{US}conversation not found"
+        known = args[2].split(" ") if len(args) > 2 else []
+        messages = win["conversations"][win["current"]]
+        signatures, records = [], []
+        for index, message in enumerate(messages, 1):
+            texts = self.message_texts(message, now)
+            # Frame size: full width, one 24 pixel row per 100 characters
+            rows = sum(-(-len(text) // 100) for text in texts)
+            signature = f"1100x{24 * rows + 16}"
+            signatures.append(signature)
+            if index == len(messages) or index > len(known) or known[index - 1] != signature:
+                self.visited += len(texts)
+                records.append(f"{index}{US}" + "\n".join(texts))
+        return RS.join([US.join(["ok", str(len(messages)), *signatures]), *records])
+
+    def script_extract_latest_messages(self, win, now, args):
+        if len(args) < 3 or args[1] != CONVERSATION_PATH:
+            return "missing"
+        count, first_index, texts = self.tail_texts(win, now, int(args[2]))
+        return "\n".join([f"{count} {first_index}", *texts])
+
+    def script_query_element(self, win, now, args):
+        path = args[1] if len(args) > 1 else ""
+        if not path:
+            return geometry_line()
+        return geometry_line() + "\n" + self.elements(win, now).get(path, "missing")
+
+    def script_status_probe(self, win, now, args):
+        mode = args[1] if len(args) > 1 else "fingerprint"
+        lines = [self.elements(win, now)[ACTION_PATH]]
+        if mode == "state":
+            return lines[0] + "\n"
+        message_count = -1
+        if len(args) > 4 and args[3] == CONVERSATION_PATH:
+            message_count, _, texts = self.tail_texts(win, now, int(args[4]))
+        else:
+            texts = self.texts(win, now)
+        last = texts[-1] if texts else ""
+        lines.append(f"{len(texts)} {len(last)} {checksum(last)} {message_count}")
+        if mode == "text":
+            lines.extend(texts)
+        return "\n".join(lines)
+
+    def come_forward(self, now: float, wait: float) -> Optional[float]:
+        """What a focus-stealing script does before typing or clicking: bring the
+        app forward and wait up to ``wait`` seconds for it; returns the time it
+        is in front, or None (the script then sends nothing)"""
+        if self.frontmost(now):
+            return now
+        if not self.app.get("frontmost"):
+            self.app["frontmost"] = True
+            self.app["ready_at"] = now + self.activate_delay
+        self.pause = min(self.app["ready_at"] - now, wait)
+        return self.app["ready_at"] if self.app["ready_at"] - now <= wait else None
+
+    def script_click_at(self, win, now, args):
+        now = self.come_forward(now, float(args[3]) if len(args) > 3 else 0.0)
+        if now is None:
+            self.error = "ChatGPT did not come forward"
+            return ""
+        if self.generating(win, now):
+            last = win["conversations"][win["current"]][-1]
+            last["shown"] = len(self.visible(last, now))
+        elif win["input"]:
+            self.send(win, now)
+        return ""
+
+    def script_paste_text(self, win, now, args):
+        now = self.come_forward(now, float(args[5]) if len(args) > 5 else 0.0)
+        if now is None:
+            return "timeout frontmost"
+        self.record({"event": "paste", "text": args[0] if args else "",
+                                "overwrote": bool(win["input"]),
+                                "while_generating": self.generating(win, now)})
+        win["input"] = args[0] if args else ""
+        if len(args) > 1 and args[1] == "true":
+            self.send(win, now)
+        return "ok"
+
+    def script_start_new_chat(self, win, now, args):
+        if self.come_forward(now, float(args[3]) if len(args) > 3 else 0.0) is None:
+            self.error = "ChatGPT did not come forward"
+            return ""
+        win["conversations"].append([])
+        win["current"] = len(win["conversations"]) - 1
+        win["input"] = ""
+        return ""
+
+    def script_open_conversation(self, win, now, args):
+        sidebar_path, list_path, hint, title = args[1], args[2], int(args[3]), args[4]
+        if list_path != SIDEBAR_LIST_PATH:
+            if sidebar_path not in (SIDEBAR_PATH, ""):
+                return f"error{US}sidebar not found"
+            list_path = SIDEBAR_LIST_PATH
+        rows = self.sidebar_rows(win)
+        found, how = 0, "selected"
+        if not title:
+            found = next((row for row, (index, _) in enumerate(rows, 1) if index == win["current"]), 0)
+        elif 1 <= hint <= len(rows) and rows[hint - 1][1] == title:
+            self.visited += 1
+            found, how = hint, "hint"
+        else:
+            self.visited += len(rows)
+            found = next((row for row, (_, row_title) in enumerate(rows, 1) if row_title == title), 0)
+            how = "search"
+        if not found:
+            return f"missing{US}{list_path}"
+        if title:
+            if self.come_forward(now, float(args[5]) if len(args) > 5 else 0.0) is None:
+                return f"error{US}ChatGPT did not come forward"
+            win["current"] = rows[found - 1][0]
+            win["input"] = ""
+        return US.join(["ok", list_path, str(found), rows[found - 1][1], how])
+
+    def script_get_chatgpt_response(self, win, now, args):
+        # Frame: header record, then one record per text (see wire_format)
+        header = f"ok{US}" + ("false" if self.generating(win, now) else "true")
+        return RS.join([header] + self.texts(win, now))
+
+    def script_extract_texts(self, win, now, args):
+        return "\n".join(self.texts(win, now))
+
+    script_extract_class_based = script_extract_texts
+    script_extract_group_hierarchical = script_extract_texts
+    script_extract_static_text = script_extract_texts
@@ -1,238 +1,202 @@
-import subprocess
-import re
-import time
-from typing import Optional, Dict
+import asyncio
+import logging
+from typing import Optional
 
+from chatgpt_mcp.metrics import timed
+from chatgpt_mcp.readiness import WAIT_HANDLERS, configured_budgets
+from chatgpt_mcp.script_registry import register
+from chatgpt_mcp.script_runner import run_script_async, run_sync
+from chatgpt_mcp.ui_backend import get_backend
+from chatgpt_mcp.ui_locator import ButtonInfo, LocatorError, get_locator
+from chatgpt_mcp.window_pool import RAISE_HANDLERS, focus_lock
 
-class ChatGPTButtonHelper:
-    """Helper class to find and interact with ChatGPT's main action button dynamically"""
+logger = logging.getLogger(__name__)
+
+
+# argv: x, y, window index, seconds to wait for the app to come forward.
+# Fails without clicking if the app does not come forward.
+CLICK_AT_SCRIPT = register("click_at", '''
+on run argv
+    set clickX to (item 1 of argv) as integer
+    set clickY to (item 2 of argv) as integer
+    set windowIndex to (item 3 of argv) as integer
+    set waitSeconds to (item 4 of argv) as real
+    tell application "System Events"
+        tell process "ChatGPT"
+            set frontmost to true
+            my raiseWindow(windowIndex)
+        end tell
+    end tell
+    if not my waitForFrontmost(waitSeconds) then
+        my restoreWindowOrder(windowIndex)
+        error "ChatGPT did not come forward"
+    end if
+    tell application "System Events" to tell process "ChatGPT" to click at {clickX, clickY}
+    my restoreWindowOrder(windowIndex)
+end run
+''' + WAIT_HANDLERS + RAISE_HANDLERS)
+
+
+class AsyncChatGPTButtonHelper:
+    """Async helper to find and interact with ChatGPT's main action button.
+    
+    Scripts run through the shared script runner and waits use asyncio.sleep,
+    so the event loop keeps serving other requests while a probe is running.
+    Cancelling a call kills the script that is in flight. State checks and
+    waits are served by the shared ButtonObserver of the window, so they do
+    not probe the UI again when a fresh sample is available.
+    """
     
     @staticmethod
-    def find_action_button() -> Optional[Dict[str, any]]:
+    @timed("button.find_action_button")
+    async def find_action_button(window: int = 1) -> Optional[ButtonInfo]:
         """
         Find the main action button (submit/stop/voice) in ChatGPT.
         The button is identified by its large size (45+ pixels).
         
+        The window's UILocator answers from its cached element path and
+        rescans only when the layout changed.
+        
+        Args:
+            window: Index of the ChatGPT window to inspect
+        
         Returns:
-            Dictionary with button info including:
+            ButtonInfo with:
             - x, y: Position coordinates
             - width, height: Button dimensions
             - help: Help text (contains state info)
             - enabled: Whether button is enabled
             - state: 'submit', 'stop', 'waveform', or 'unknown'
         """
-        script = '''
-        tell application "System Events"
-            tell process "ChatGPT"
-                tell window 1
-                    tell group 1
-                        tell UI element 1  -- Split group
-                            set largeButtons to {}
-                            
-                            repeat with grp in UI elements
-                                if role of grp is "AXGroup" then
-                                    repeat with elem in UI elements of grp
-                                        try
-                                            if role of elem is "AXButton" then
-                                                set btnSize to size of elem
-                                                
-                                                -- Look for large buttons (45+ pixels)
-                                                if (item 1 of btnSize) > 45 and (item 2 of btnSize) > 45 then
-                                                    set btnPos to position of elem
-                                                    set btnInfo to "{"
-                                                    set btnInfo to btnInfo & "\\"x\\":" & (item 1 of btnPos) & ","
-                                                    set btnInfo to btnInfo & "\\"y\\":" & (item 2 of btnPos) & ","
-                                                    set btnInfo to btnInfo & "\\"width\\":" & (item 1 of btnSize) & ","
-                                                    set btnInfo to btnInfo & "\\"height\\":" & (item 2 of btnSize) & ","
-                                                    
-                                                    -- Get help text (contains state info)
-                                                    try
-                                                        set helpText to help of elem
-                                                        set btnInfo to btnInfo & "\\"help\\":\\"" & helpText & "\\","
-                                                    on error
-                                                        set btnInfo to btnInfo & "\\"help\\":null,"
-                                                    end try
-                                                    
-                                                    -- Get enabled state
-                                                    set btnInfo to btnInfo & "\\"enabled\\":" & (enabled of elem) & ","
-                                                    
-                                                    -- Get description
-                                                    try
-                                                        set btnDesc to description of elem
-                                                        set btnInfo to btnInfo & "\\"description\\":\\"" & btnDesc & "\\""
-                                                    on error
-                                                        set btnInfo to btnInfo & "\\"description\\":null"
-                                                    end try
-                                                    
-                                                    set btnInfo to btnInfo & "}"
-                                                    set end of largeButtons to btnInfo
-                                                end if
-                                            end if
-                                        end try
-                                    end repeat
-                                end if
-                            end repeat
-                            
-                            -- Return the rightmost large button (typically our action button)
-                            if (count of largeButtons) > 0 then
-                                -- If multiple large buttons, return the rightmost one
-                                set rightmostButton to item 1 of largeButtons
-                                set maxX to 0
-                                
-                                repeat with btnStr in largeButtons
-                                    -- Extract X position
-                                    set xStart to offset of "\\"x\\":" in btnStr
-                                    set xEnd to offset of "," in (text (xStart + 5) thru -1 of btnStr)
-                                    set xValue to (text (xStart + 5) thru (xStart + 3 + xEnd) of btnStr) as number
-                                    
-                                    if xValue > maxX then
-                                        set maxX to xValue
-                                        set rightmostButton to btnStr
-                                    end if
-                                end repeat
-                                
-                                return rightmostButton
-                            else
-                                return "null"
-                            end if
-                        end tell
-                    end tell
-                end tell
-            end tell
-        end tell
-        '''
-        
         try:
-            result = subprocess.run(
-                ['osascript', '-e', script],
-                capture_output=True,
-                text=True
-            )
-            
-            if result.returncode != 0 or result.stdout.strip() == "null":
-                return None
-            
-            # Parse the pseudo-JSON response
-            button_str = result.stdout.strip()
-            button_info = {}
-            
-            # Extract values using regex
-            x_match = re.search(r'"x":(\d+)', button_str)
-            y_match = re.search(r'"y":(\d+)', button_str)
-            width_match = re.search(r'"width":(\d+)', button_str)
-            height_match = re.search(r'"height":(\d+)', button_str)
-            help_match = re.search(r'"help":"([^"]*)"', button_str)
-            enabled_match = re.search(r'"enabled":(true|false)', button_str)
-            desc_match = re.search(r'"description":"([^"]*)"', button_str)
-            
-            if x_match and y_match:
-                button_info = {
-                    'x': int(x_match.group(1)),
-                    'y': int(y_match.group(1)),
-                    'width': int(width_match.group(1)) if width_match else 0,
-                    'height': int(height_match.group(1)) if height_match else 0,
-                    'help': help_match.group(1) if help_match else None,
-                    'enabled': enabled_match.group(1) == 'true' if enabled_match else False,
-                    'description': desc_match.group(1) if desc_match else None
-                }
-                
-                # Determine state based on help text
-                if button_info['help']:
-                    help_text = button_info['help']
-                    if 'Send message' in help_text:
-                        button_info['state'] = 'submit'
-                    elif 'Stop' in help_text:
-                        button_info['state'] = 'stop'
-                    elif 'Start voice' in help_text or 'voice conversation' in help_text:
-                        button_info['state'] = 'voice'
-                    else:
-                        # Unknown help text
-                        button_info['state'] = 'unknown'
-                else:
-                    # No help text
-                    button_info['state'] = 'waveform'
-                
-                return button_info
-            
+            return await get_locator(window).action_button()
+        except asyncio.CancelledError:
+            raise
+        except LocatorError as e:
+            logger.debug(f"Locator failed, scanning for the action button: {e}")
+        except Exception:
             return None
-            
+        
+        try:
+            return await get_backend().find_action_button(window)
+        except asyncio.CancelledError:
+            raise
         except Exception:
             return None
     
     @staticmethod
-    def click_action_button() -> bool:
+    @timed("button.click_action_button")
+    async def click_action_button(window: int = 1) -> bool:
         """
         Click the main action button regardless of its current state.
         
+        Args:
+            window: Index of the ChatGPT window
+        
         Returns:
             True if successful, False otherwise
         """
-        button_info = ChatGPTButtonHelper.find_action_button()
+        button_info = await AsyncChatGPTButtonHelper.find_action_button(window)
         if not button_info:
             return False
         
-        script = f'''
-        tell application "System Events"
-            tell process "ChatGPT"
-                set frontmost to true
-                delay 0.1
-                click at {{{button_info['x']}, {button_info['y']}}}
-            end tell
-        end tell
-        '''
-        
         try:
-            result = subprocess.run(
-                ['osascript', '-e', script],
-                capture_output=True,
-                text=True
-            )
+            async with focus_lock():
+                result = await run_script_async(CLICK_AT_SCRIPT, [
+                    str(button_info.x), str(button_info.y), str(window),
+                    str(configured_budgets()["activate"])])
             return result.returncode == 0
+        except asyncio.CancelledError:
+            raise
         except Exception:
             return False
     
     @staticmethod
-    def wait_for_button_state(target_state: str, timeout: int = 10) -> bool:
+    @timed("button.wait_for_button_state")
+    async def wait_for_button_state(target_state: str, timeout: int = 10, window: int = 1) -> bool:
         """
         Wait for the button to reach a specific state.
         
         Args:
             target_state: 'submit', 'stop', 'voice', 'waveform', or 'unknown'
             timeout: Maximum seconds to wait
+            window: Index of the ChatGPT window
             
         Returns:
             True if target state reached, False if timeout
         """
-        start_time = time.time()
-        
-        while time.time() - start_time < timeout:
-            button_info = ChatGPTButtonHelper.find_action_button()
-            if button_info and button_info.get('state') == target_state:
-                return True
-            time.sleep(0.5)
+        from chatgpt_mcp.button_observer import get_observer
         
-        return False
+        try:
+            await get_observer(window).wait_for_state(target_state, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
     
     @staticmethod
-    def is_processing() -> bool:
+    @timed("button.is_processing")
+    async def is_processing(window: int = 1) -> bool:
         """
         Check if ChatGPT is currently processing (button is in 'stop' state).
         
+        Args:
+            window: Index of the ChatGPT window
+        
         Returns:
             True if processing, False otherwise
         """
-        button_info = ChatGPTButtonHelper.find_action_button()
-        return button_info and button_info.get('state') == 'stop'
+        from chatgpt_mcp.button_observer import get_observer
+        
+        button_info = await get_observer(window).current()
+        return bool(button_info and button_info.state == 'stop')
     
     @staticmethod
-    def can_send_message() -> bool:
+    @timed("button.can_send_message")
+    async def can_send_message(window: int = 1) -> bool:
         """
         Check if a message can be sent (button is in 'submit' state and enabled).
         
+        Args:
+            window: Index of the ChatGPT window
+        
         Returns:
             True if can send, False otherwise
         """
-        button_info = ChatGPTButtonHelper.find_action_button()
-        return (button_info and 
-                button_info.get('state') == 'submit' and 
-                button_info.get('enabled', False))
\ No newline at end of file
+        from chatgpt_mcp.button_observer import get_observer
+        
+        button_info = await get_observer(window).current()
+        return bool(button_info and
+                    button_info.state == 'submit' and
+                    button_info.enabled)
+
+
+class ChatGPTButtonHelper:
+    """Helper class to find and interact with ChatGPT's main action button dynamically
+    
+    Synchronous wrapper around AsyncChatGPTButtonHelper; see that class for details.
+    """
+    
+    @staticmethod
+    def find_action_button(window: int = 1) -> Optional[ButtonInfo]:
+        """Find the main action button; see AsyncChatGPTButtonHelper.find_action_button"""
+        return run_sync(AsyncChatGPTButtonHelper.find_action_button(window))
+    
+    @staticmethod
+    def click_action_button(window: int = 1) -> bool:
+        """Click the main action button regardless of its current state"""
+        return run_sync(AsyncChatGPTButtonHelper.click_action_button(window))
+    
+    @staticmethod
+    def wait_for_button_state(target_state: str, timeout: int = 10, window: int = 1) -> bool:
+        """Wait for the button to reach a specific state"""
+        return run_sync(AsyncChatGPTButtonHelper.wait_for_button_state(target_state, timeout, window))
+    
+    @staticmethod
+    def is_processing(window: int = 1) -> bool:
+        """Check if ChatGPT is currently processing (button is in 'stop' state)"""
+        return run_sync(AsyncChatGPTButtonHelper.is_processing(window))
+    
+    @staticmethod
+    def can_send_message(window: int = 1) -> bool:
+        """Check if a message can be sent (button is in 'submit' state and enabled)"""
+        return run_sync(AsyncChatGPTButtonHelper.can_send_message(window))
@@ -0,0 +1,258 @@
+"""
+Shared observer of the ChatGPT action button.
+
+One background task per ChatGPT window samples the action button at a fixed
+rate and keeps the latest ``ButtonInfo`` with a timestamp. Any number of
+consumers can read the latest sample or await a state or transition (for
+example ``stop`` -> ``submit``) through an asyncio condition, so concurrent
+waiters share a single probe stream instead of each polling the UI.
+
+Once the button's element path is cached, each sample is one status probe
+(see status_probe): with the conversation area known it also fingerprints
+the latest message, so waits for the text to settle read the same samples
+instead of probing again. Until then the locator finds the button.
+
+The sampling task runs only while consumers are waiting, lingering for
+``idle_timeout`` seconds after the last one so back-to-back waits reuse it.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple, Union
+
+from chatgpt_mcp.button_helper import AsyncChatGPTButtonHelper
+from chatgpt_mcp.deadline import detached
+from chatgpt_mcp.message_scope import get_scope
+from chatgpt_mcp.status_probe import MODE_FINGERPRINT, MODE_STATE, probe_status
+from chatgpt_mcp.ui_locator import ACTION_BUTTON, ButtonInfo, get_locator
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 0.2
+DEFAULT_IDLE_TIMEOUT = 0.5
+
+Sample = Optional[ButtonInfo]
+
+
+class ButtonObserver:
+    """Samples the action button of one ChatGPT window in the background"""
+
+    def __init__(self, window: int = 1, interval: float = DEFAULT_INTERVAL,
+                 idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
+        self.window = window
+        self.interval = interval
+        self.idle_timeout = idle_timeout
+
+        self.latest: Sample = None
+        # Fingerprint of the latest message taken with the latest sample, if any
+        self.fingerprint: Optional[Tuple[int, int, int]] = None
+        self.updated_at = 0.0
+        self.sequence = 0
+        self.probes = 0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._condition: Optional[asyncio.Condition] = None
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: Optional[asyncio.Future] = None
+        self._last_demand = 0.0
+        self._waiters = 0
+
+    @property
+    def state(self) -> Optional[str]:
+        """State of the latest sample ('submit', 'stop', ...), or None"""
+        return self.latest.state if self.latest else None
+
+    @property
+    def age(self) -> float:
+        """Seconds since the latest sample was taken"""
+        return time.monotonic() - self.updated_at if self.updated_at else float('inf')
+
+    # -- consumers -------------------------------------------------------
+
+    async def current(self, max_age: Optional[float] = None) -> Sample:
+        """Return the latest sample if it is fresh enough, otherwise probe once.
+
+        Args:
+            max_age: Maximum acceptable age in seconds (default: one interval)
+        """
+        self._bind()
+        max_age = self.interval if max_age is None else max_age
+        if self.age <= max_age:
+            return self.latest
+        if self._task is not None and not self._task.done():
+            return await self.next_sample()
+        return await self._sample()
+
+    async def next_sample(self, timeout: Optional[float] = None) -> Sample:
+        """Wait for the next sample taken after this call"""
+        sequence = self.sequence
+        await self._wait(lambda: self.sequence > sequence, timeout)
+        return self.latest
+
+    async def wait_for(self, predicate: Callable[[Sample], bool],
+                       timeout: Optional[float] = None) -> Sample:
+        """Wait until a sample satisfies ``predicate``.
+
+        Returns:
+            The matching sample
+
+        Raises:
+            asyncio.TimeoutError: if no sample matched within ``timeout``
+        """
+        self._bind()
+        if self.age <= self.interval and predicate(self.latest):
+            return self.latest
+        sequence = self.sequence
+        await self._wait(lambda: self.sequence > sequence and predicate(self.latest), timeout)
+        return self.latest
+
+    async def wait_for_state(self, states: Union[str, Iterable[str]],
+                             timeout: Optional[float] = None) -> Sample:
+        """Wait until the button is in one of ``states``"""
+        states = {states} if isinstance(states, str) else set(states)
+        return await self.wait_for(lambda info: bool(info) and info.state in states, timeout)
+
+    async def wait_for_transition(self, from_state: str, to_state: Optional[str] = None,
+                                  timeout: Optional[float] = None) -> Sample:
+        """Wait until the button leaves ``from_state`` after having been in it.
+
+        Args:
+            from_state: State that must be observed first, e.g. 'stop'
+            to_state: State to wait for afterwards; any other state if None
+            timeout: Maximum seconds to wait
+        """
+        seen = self.state == from_state
+
+        def predicate(info: Sample) -> bool:
+            nonlocal seen
+            state = info.state if info else None
+            if state == from_state:
+                seen = True
+                return False
+            if not seen or state is None:
+                return False
+            return to_state is None or state == to_state
+
+        return await self.wait_for(predicate, timeout)
+
+    # -- sampling --------------------------------------------------------
+
+    def _bind(self):
+        """Attach to the running loop on first use.
+
+        The observer stays on that loop until it is closed; its condition,
+        sampling task and in-flight probe belong to it, and waiters there
+        would be orphaned by new ones. Synchronous callers reach it through
+        ``run_sync``.
+
+        Raises:
+            RuntimeError: if used from another loop while its loop is open
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            if self._loop is not None and not self._loop.is_closed():
+                raise RuntimeError(f"The button observer for window {self.window} is bound to another "
+                                   f"event loop; use it from the server loop (run_sync routes "
+                                   f"synchronous callers there)")
+            self._loop = loop
+            self._condition = asyncio.Condition()
+            self._task = None
+            self._inflight = None
+        self._last_demand = time.monotonic()
+
+    async def _wait(self, predicate: Callable[[], bool], timeout: Optional[float]):
+        self._bind()
+        self._ensure_running()
+
+        async def wait():
+            async with self._condition:
+                while not predicate():
+                    self._ensure_running()
+                    await self._condition.wait()
+
+        self._waiters += 1
+        try:
+            await asyncio.wait_for(wait(), timeout)
+        finally:
+            self._waiters -= 1
+            self._last_demand = time.monotonic()
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._task = detached(self._run())
+
+    async def _run(self):
+        try:
+            while self._waiters or time.monotonic() - self._last_demand < self.idle_timeout:
+                await self._sample()
+                await asyncio.sleep(self.interval)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Button observer for window {self.window} stopped: {e}")
+
+    async def _sample(self) -> Sample:
+        """Take one sample; concurrent callers share the probe in flight"""
+        inflight = self._inflight
+        if inflight is not None:
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+                # The probe's owner was cancelled; take a sample ourselves
+
+        inflight = self._inflight = asyncio.get_running_loop().create_future()
+        try:
+            self.probes += 1
+            info, fingerprint = await self._probe()
+        except BaseException:
+            inflight.cancel()
+            raise
+        finally:
+            self._inflight = None
+
+        self.latest = info
+        self.fingerprint = fingerprint
+        self.updated_at = time.monotonic()
+        self.sequence += 1
+        inflight.set_result(info)
+        async with self._condition:
+            self._condition.notify_all()
+        return info
+
+    async def _probe(self) -> Tuple[Sample, Optional[Tuple[int, int, int]]]:
+        """Button state and, when the conversation area is known, the message fingerprint"""
+        locator = get_locator(self.window)
+        if not locator.path(ACTION_BUTTON):
+            return await AsyncChatGPTButtonHelper.find_action_button(self.window), None
+        mode = MODE_FINGERPRINT if get_scope(self.window).conversation_path else MODE_STATE
+        probe = await probe_status(self.window, mode)
+        if probe is None:
+            return None, None
+        if probe.button is None or not probe.button.path:
+            # The cached path no longer leads to the button; locate it again
+            locator.invalidate()
+        return probe.button, probe.fingerprint
+
+    async def stop(self):
+        """Stop the sampling task"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+
+_observers: Dict[int, ButtonObserver] = {}
+
+
+def get_observer(window: int = 1) -> ButtonObserver:
+    """Return the shared observer for a ChatGPT window"""
+    observer = _observers.get(window)
+    if observer is None:
+        observer = _observers[window] = ButtonObserver(window)
+    return observer
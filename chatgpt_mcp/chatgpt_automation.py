@@ -1,131 +1,270 @@
-import subprocess
-import time
+import logging
 try:
-    from chatgpt_mcp.button_helper import ChatGPTButtonHelper
+    from chatgpt_mcp.button_helper import AsyncChatGPTButtonHelper, ChatGPTButtonHelper
+    from chatgpt_mcp.script_registry import register
+    from chatgpt_mcp.readiness import WAIT_HANDLERS, configured_budgets, wait_until
+    from chatgpt_mcp.script_runner import run_script_async, run_sync
+    from chatgpt_mcp.ui_locator import ELEMENT_HANDLERS, INPUT_FIELD, NEW_CHAT, LocatorError, get_locator
+    from chatgpt_mcp.window_pool import RAISE_HANDLERS, focus_lock
 except ImportError:
-    from button_helper import ChatGPTButtonHelper
+    from button_helper import AsyncChatGPTButtonHelper, ChatGPTButtonHelper
+    from script_registry import register
+    from readiness import WAIT_HANDLERS, configured_budgets, wait_until
+    from script_runner import run_script_async, run_sync
+    from ui_locator import ELEMENT_HANDLERS, INPUT_FIELD, NEW_CHAT, LocatorError, get_locator
+    from window_pool import RAISE_HANDLERS, focus_lock
 
 
-class ChatGPTAutomation:
+# Where the New Chat button usually sits in the sidebar, used when the
+# locator cannot find the control
+NEW_CHAT_POSITION = (362, 200)
+
+logger = logging.getLogger(__name__)
+
+ACTIVATE_SCRIPT = register("activate_chatgpt", '''
+tell application "ChatGPT" to activate
+''')
+
+# Returns once the app has a window, or after 10 seconds
+LAUNCH_SCRIPT = register("launch_chatgpt", '''
+tell application "ChatGPT" to activate
+my waitForWindow(10)
+''' + WAIT_HANDLERS)
+
+FRONTMOST_SCRIPT = register("chatgpt_frontmost", '''
+tell application "System Events" to return (exists process "ChatGPT") and (frontmost of process "ChatGPT")
+''')
+
+PROCESS_EXISTS_SCRIPT = register("chatgpt_process_exists", '''
+tell application "System Events" to return application process "ChatGPT" exists
+''')
+
+# argv: x, y, window index, seconds to wait for the app to come forward.
+# Fails without clicking if the app does not come forward.
+NEW_CHAT_SCRIPT = register("start_new_chat", '''
+on run argv
+    set clickX to (item 1 of argv) as integer
+    set clickY to (item 2 of argv) as integer
+    set windowIndex to (item 3 of argv) as integer
+    set waitSeconds to (item 4 of argv) as real
+    tell application "System Events"
+        tell process "ChatGPT"
+            set frontmost to true
+            my raiseWindow(windowIndex)
+        end tell
+    end tell
+    if not my waitForFrontmost(waitSeconds) then
+        my restoreWindowOrder(windowIndex)
+        error "ChatGPT did not come forward"
+    end if
+    
+    -- Click on the New Chat button position
+    tell application "System Events" to tell process "ChatGPT" to click at {clickX, clickY}
+    my restoreWindowOrder(windowIndex)
+end run
+''' + WAIT_HANDLERS + RAISE_HANDLERS)
+
+# argv: text to paste, "true" to press Enter afterwards, window index,
+# input field path ("" for the focused element), seconds to wait for the field,
+# seconds to wait for the app to come forward.
+# Prints "ok"; "timeout frontmost" if the app did not come forward (nothing is
+# typed), "timeout clear"/"timeout paste" if the field did not follow (Enter
+# is not pressed).
+PASTE_TEXT_SCRIPT = register("paste_text", '''
+on run argv
+    set pastedText to item 1 of argv
+    set the clipboard to pastedText
+    set windowIndex to (item 3 of argv) as integer
+    set inputPath to item 4 of argv
+    set waitSeconds to (item 5 of argv) as real
+    set frontSeconds to (item 6 of argv) as real
+    set outcome to "ok"
+    tell application "System Events"
+        tell process "ChatGPT"
+            set frontmost to true
+            my raiseWindow(windowIndex)
+        end tell
+    end tell
+    -- Keystrokes go to whichever app is in front
+    if not my waitForFrontmost(frontSeconds) then
+        my restoreWindowOrder(windowIndex)
+        return "timeout frontmost"
+    end if
+    set inputField to my inputElement(windowIndex, inputPath)
+    
+    -- Clear any existing text with Cmd+A and Delete
+    tell application "System Events"
+        keystroke "a" using command down
+        key code 51 -- delete
+    end tell
+    if not my waitForInput(inputField, "", waitSeconds / 2) then set outcome to "timeout clear"
+    
+    -- Paste text from clipboard and wait until it shows up in the field
+    tell application "System Events" to keystroke "v" using command down
+    set wanted to ""
+    if pastedText is not "" then set wanted to paragraph 1 of pastedText
+    if length of wanted > 20 then set wanted to text 1 thru 20 of wanted
+    if not my waitForInput(inputField, wanted, waitSeconds / 2) then set outcome to "timeout paste"
+    
+    if (item 2 of argv) is "true" and outcome is "ok" then
+        -- Press Enter key to send
+        tell application "System Events" to key code 36
+    end if
+    my restoreWindowOrder(windowIndex)
+    return outcome
+end run
+
+on inputElement(windowIndex, inputPath)
+    tell application "System Events"
+        tell process "ChatGPT"
+            if inputPath is not "" then
+                try
+                    return my resolvePath(window windowIndex, inputPath)
+                end try
+            end if
+            return value of attribute "AXFocusedUIElement"
+        end tell
+    end tell
+end inputElement
+''' + ELEMENT_HANDLERS + WAIT_HANDLERS + RAISE_HANDLERS)
+
+
+class AsyncChatGPTAutomation:
+    """Drives the ChatGPT desktop app without blocking the event loop"""
+    
     def __init__(self):
-        self.button_helper = ChatGPTButtonHelper()
+        self.button_helper = AsyncChatGPTButtonHelper()
         
-    def activate_chatgpt(self):
-        """Activate ChatGPT Desktop app"""
-        subprocess.run(['osascript', '-e', 'tell application "ChatGPT" to activate'])
-        time.sleep(1)
+    async def activate_chatgpt(self, timeout=None):
+        """Activate ChatGPT Desktop app and wait until it is frontmost"""
+        await run_script_async(ACTIVATE_SCRIPT)
+        if timeout is None:
+            timeout = configured_budgets()["activate"]
+        return bool(await wait_until(self.is_frontmost, timeout))
+    
+    async def is_frontmost(self):
+        """Whether ChatGPT is the frontmost app"""
+        result = await run_script_async(FRONTMOST_SCRIPT)
+        return result.stdout.strip() == "true"
 
-    def send_message_with_keystroke(self, message):
+    async def send_message_with_keystroke(self, message, window=1, timeout=None):
         """Send message using clipboard paste for speed and reliability"""
-        time.sleep(0.2)  # Reduced delay since pasting is faster
-        # Paste the message and press Enter
-        self._type_with_applescript(message, press_enter=True)
+        # Paste the message and press Enter; the script waits for the input field
+        return await self._type_with_applescript(message, press_enter=True, window=window, timeout=timeout)
     
-    
-    def send_message_with_button(self, message):
+    async def send_message_with_button(self, message, window=1, timeout=None):
         """Send message using the submit button instead of Enter key"""
-        time.sleep(0.5)
-        
         # Type the message
-        self._type_with_applescript(message, press_enter=False)
+        await self._type_with_applescript(message, press_enter=False, window=window, timeout=timeout)
         
         # Wait for button to be in submit state
-        if self.button_helper.wait_for_button_state('submit', timeout=5):
+        if await self.button_helper.wait_for_button_state('submit', timeout=5, window=window):
             # Click the submit button
-            return self.button_helper.click_action_button()
+            return await self.button_helper.click_action_button(window)
         else:
-            print("Submit button not ready")
+            logger.warning("Submit button not ready")
             return False
     
-    def stop_generation(self):
+    async def stop_generation(self, window=1):
         """Stop the current generation if ChatGPT is processing"""
-        if self.button_helper.is_processing():
-            return self.button_helper.click_action_button()
+        if await self.button_helper.is_processing(window):
+            return await self.button_helper.click_action_button(window)
         return False
     
-    def get_button_state(self):
+    async def get_button_state(self, window=1):
         """Get the current state of the action button"""
-        button_info = self.button_helper.find_action_button()
+        button_info = await self.button_helper.find_action_button(window)
         if button_info:
-            return button_info.get('state', 'unknown')
+            return button_info.state
         return None
     
-    def start_new_chat(self):
+    async def start_new_chat(self, window=1):
         """Start a new chat conversation in ChatGPT"""
-        # The New Chat button is consistently at this position in the sidebar
-        script = '''
-        tell application "System Events"
-            tell process "ChatGPT"
-                set frontmost to true
-                delay 0.5
-                
-                -- Click on the New Chat button position
-                -- Based on UI analysis, it's centered in the sidebar around x:362, y:200
-                click at {362, 200}
-                
-                delay 0.5
-            end tell
-        end tell
-        '''
-        
-        result = subprocess.run(['osascript', '-e', script], capture_output=True, text=True)
+        x, y = NEW_CHAT_POSITION
+        try:
+            control = await get_locator(window).locate(NEW_CHAT)
+            if control:
+                x, y = control.center
+        except LocatorError:
+            pass
+        wait_seconds = configured_budgets()["activate"]
+        async with focus_lock():
+            result = await run_script_async(NEW_CHAT_SCRIPT, [str(x), str(y), str(window), str(wait_seconds)])
         return result.returncode == 0
     
-    def _type_with_applescript(self, text, press_enter=False):
-        """Type text using clipboard and paste for speed and reliability"""
-        # First, copy text to clipboard
-        process = subprocess.Popen(['pbcopy'], stdin=subprocess.PIPE, text=True)
-        process.communicate(input=text)
-        
-        # Then paste using Cmd+V
-        script = '''
-        tell application "System Events"
-            tell process "ChatGPT"
-                -- Clear any existing text with Cmd+A and Delete
-                keystroke "a" using command down
-                delay 0.1
-                key code 51  -- delete
-                delay 0.1
-                
-                -- Paste text from clipboard
-                keystroke "v" using command down
-                delay 0.2
-        '''
-        
-        if press_enter:
-            script += '''
-                -- Press Enter key to send
-                key code 36
-            '''
+    async def _type_with_applescript(self, text, press_enter=False, window=1, timeout=None):
+        """Type text using clipboard and paste for speed and reliability
         
-        script += '''
-            end tell
-        end tell
-        '''
+        Returns:
+            True if the input field was seen cleared and then holding the
+            text; Enter is only pressed then
+        """
+        # The text is handed to the script as an argument and placed on the
+        # clipboard there, so no separate pbcopy process is needed
+        budgets = configured_budgets()
+        if timeout is None:
+            timeout = budgets["paste"]
+        input_path = get_locator(window).path(INPUT_FIELD) or ""
+        async with focus_lock():
+            result = await run_script_async(PASTE_TEXT_SCRIPT, [
+                text, "true" if press_enter else "false", str(window), input_path, str(timeout),
+                str(budgets["activate"])])
+        outcome = result.stdout.strip()
+        if outcome == "timeout frontmost":
+            logger.warning("ChatGPT did not come forward; nothing was typed")
+        elif outcome.startswith("timeout"):
+            logger.warning(f"Input field did not follow the paste ({outcome}); the prompt was not sent")
+        return outcome == "ok"
+
+
+class ChatGPTAutomation:
+    """Synchronous wrapper around AsyncChatGPTAutomation"""
+    
+    def __init__(self):
+        self.button_helper = ChatGPTButtonHelper()
+        self._automation = AsyncChatGPTAutomation()
         
-        subprocess.run(['osascript', '-e', script], capture_output=True, text=True)
+    def activate_chatgpt(self):
+        """Activate ChatGPT Desktop app"""
+        run_sync(self._automation.activate_chatgpt())
+
+    def send_message_with_keystroke(self, message, window=1):
+        """Send message using clipboard paste for speed and reliability"""
+        run_sync(self._automation.send_message_with_keystroke(message, window))
+    
+    def send_message_with_button(self, message, window=1):
+        """Send message using the submit button instead of Enter key"""
+        return run_sync(self._automation.send_message_with_button(message, window))
+    
+    def stop_generation(self, window=1):
+        """Stop the current generation if ChatGPT is processing"""
+        return run_sync(self._automation.stop_generation(window))
+    
+    def get_button_state(self, window=1):
+        """Get the current state of the action button"""
+        return run_sync(self._automation.get_button_state(window))
+    
+    def start_new_chat(self, window=1):
+        """Start a new chat conversation in ChatGPT"""
+        return run_sync(self._automation.start_new_chat(window))
+    
+    def _type_with_applescript(self, text, press_enter=False, window=1):
+        """Type text using clipboard and paste for speed and reliability"""
+        run_sync(self._automation._type_with_applescript(text, press_enter, window))
 
 
 async def check_chatgpt_access() -> bool:
     """Check if ChatGPT app is installed and running"""
     try:
         # Check if ChatGPT is running
-        result = subprocess.run(
-            ["osascript", "-e", 'tell application "System Events" to return application process "ChatGPT" exists'],
-            capture_output=True,
-            text=True
-        )
+        result = await run_script_async(PROCESS_EXISTS_SCRIPT)
         
         if result.stdout.strip() != "true":
-            print("ChatGPT app is not running, attempting to launch...")
-            try:
-                subprocess.run(
-                    ["osascript", "-e", 'tell application "ChatGPT" to activate', "-e", "delay 2"],
-                    check=True
-                )
-            except subprocess.CalledProcessError:
+            logger.info("ChatGPT app is not running, attempting to launch...")
+            result = await run_script_async(LAUNCH_SCRIPT)
+            if result.returncode != 0:
                 raise Exception("Could not activate ChatGPT app. Please start it manually.")
         
         return True
     except Exception as e:
-        raise Exception(f"Cannot access ChatGPT app. Please make sure ChatGPT is installed and properly configured. Error: {str(e)}")
\ No newline at end of file
+        raise Exception(f"Cannot access ChatGPT app. Please make sure ChatGPT is installed and properly configured. Error: {str(e)}")
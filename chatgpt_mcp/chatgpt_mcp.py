@@ -1,5 +1,6 @@
 import sys
 import logging
+from contextlib import asynccontextmanager
 
 # Set up logging to stderr for debugging
 logging.basicConfig(stream=sys.stderr, level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -9,11 +10,23 @@ logger.debug("Starting ChatGPT MCP imports...")
 
 from mcp.server.fastmcp import FastMCP
 from chatgpt_mcp.mcp_tools import setup_mcp_tools
+from chatgpt_mcp.metrics import metrics_endpoint
+from chatgpt_mcp.script_runner import set_home_loop
+from chatgpt_mcp.session import session_lifespan
+from chatgpt_mcp.transcript_store import transcript_lifespan
 
 logger.debug("Imports successful, creating FastMCP instance...")
 
+@asynccontextmanager
+async def server_lifespan(server):
+    """Warm session and transcript store, plus the Prometheus endpoint if CHATGPT_MCP_METRICS_PORT is set"""
+    # Synchronous wrappers run their coroutines here, next to the window pool
+    set_home_loop()
+    async with metrics_endpoint(), transcript_lifespan(), session_lifespan(server) as state:
+        yield state
+
 # Initialize the MCP server
-mcp = FastMCP("chatgpt")
+mcp = FastMCP("chatgpt", lifespan=server_lifespan)
 
 logger.debug("FastMCP instance created, setting up tools...")
 
@@ -0,0 +1,273 @@
+"""
+Turn-indexed model of the conversation shown in a ChatGPT window.
+
+Instead of flattening every static text of the window into one list, the
+conversation is kept as a list of turns, one per message container of the
+conversation scroll area: role, 1-based index, text and a hash of the text.
+The model lives between calls and is updated incrementally. One script call
+reports a layout signature (the frame size) of every container, fetched with
+a single Accessibility query, and reads the text only of the containers that
+are new or whose signature changed, plus the last one, which may still be
+streaming. Reading the latest answer or turn N is then a lookup in the model.
+
+Roles alternate, starting with the user. When the prompt last sent to the
+window is found in a turn, that turn anchors the alternation instead.
+"""
+
+import asyncio
+import logging
+import uuid
+import zlib
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from chatgpt_mcp.message_scope import MESSAGE_HANDLERS
+from chatgpt_mcp.metrics import increment
+from chatgpt_mcp.response_boundary import sent_prompt
+from chatgpt_mcp.script_registry import register
+from chatgpt_mcp.script_runner import run_script_async
+from chatgpt_mcp.ui_locator import CONVERSATION, ELEMENT_HANDLERS, LocatorError, get_locator
+from chatgpt_mcp.window_pool import window_read_lock
+from chatgpt_mcp.wire_format import APPLESCRIPT_SEPARATORS, US, drain_chunks, read_frame
+
+logger = logging.getLogger(__name__)
+
+USER = "user"
+ASSISTANT = "assistant"
+
+# argv: window index, conversation path, space-separated signatures of the
+# turns already known (one per message, in order)
+# Output: a frame (see wire_format) whose header is "ok", the message count
+# and the signature of every message, followed by one "index US text" record
+# per message read; "error US <message>" if the conversation is not found.
+TURNS_SCRIPT = register("read_turns", r'''
+on run argv
+    set windowIndex to (item 1 of argv) as integer
+    set conversationPath to item 2 of argv
+    set AppleScript's text item delimiters to " "
+    set knownSignatures to text items of (item 3 of argv)
+    set AppleScript's text item delimiters to ""
+
+    tell application "System Events"
+        tell process "ChatGPT"
+            if not (exists window windowIndex) then return "error" & unitSeparator & "window not found"
+            set win to window windowIndex
+        end tell
+    end tell
+
+    try
+        set msgList to my messageList(win, conversationPath)
+        tell application "System Events"
+            set messages to UI elements of msgList
+            set messageSizes to size of UI elements of msgList
+        end tell
+    on error
+        return "error" & unitSeparator & "conversation not found"
+    end try
+
+    set messageCount to count of messages
+    set signatures to {}
+    set turnRecords to {}
+    repeat with i from 1 to messageCount
+        set msgSize to item i of messageSizes
+        set signature to ((item 1 of msgSize) as integer as text) & "x" & ((item 2 of msgSize) as integer as text)
+        set end of signatures to signature
+        if i is messageCount or i > (count of knownSignatures) or item i of knownSignatures is not signature then
+            set AppleScript's text item delimiters to linefeed
+            set end of turnRecords to (i as text) & unitSeparator & (my messageTexts(item i of messages) as text)
+            set AppleScript's text item delimiters to ""
+        end if
+    end repeat
+
+    set AppleScript's text item delimiters to unitSeparator
+    set headerRecord to ({"ok", messageCount as text} & signatures) as text
+    set AppleScript's text item delimiters to recordSeparator
+    set turnsOutput to ({headerRecord} & turnRecords) as text
+    set AppleScript's text item delimiters to ""
+    return turnsOutput
+end run
+''' + ELEMENT_HANDLERS + MESSAGE_HANDLERS + APPLESCRIPT_SEPARATORS)
+
+
+def text_hash(text: str) -> int:
+    """Cheap content hash of a turn's text"""
+    return zlib.crc32(text.encode("utf-8"))
+
+
+@dataclass(slots=True)
+class Turn:
+    """One message of the conversation"""
+    role: str
+    index: int
+    text: str
+    hash: int
+
+    @property
+    def lines(self) -> List[str]:
+        return [line.strip() for line in self.text.split('\n') if line.strip()]
+
+    def to_dict(self) -> Dict[str, object]:
+        return {"role": self.role, "index": self.index, "text": self.text, "hash": self.hash}
+
+
+class ConversationModel:
+    """The turns of one window's conversation, kept up to date incrementally"""
+
+    def __init__(self, window: int = 1):
+        self.window = window
+        # Identifies the conversation in the transcript store; changes with the conversation
+        self.conversation_id = uuid.uuid4().hex[:12]
+        self.turns: List[Turn] = []
+        self.signatures: List[str] = []
+        # Turns whose index has this parity are the user's
+        self.user_parity = 1
+        self.stats = {"refreshes": 0, "turns_read": 0, "turns_reused": 0}
+        self._lock: Optional[asyncio.Lock] = None
+
+    @property
+    def message_count(self) -> int:
+        return len(self.turns)
+
+    def turn(self, index: int) -> Optional[Turn]:
+        """Turn by 1-based index; negative indexes count from the end (-1 is the last)"""
+        if index < 0:
+            index += len(self.turns) + 1
+        if 1 <= index <= len(self.turns):
+            return self.turns[index - 1]
+        return None
+
+    def latest(self, role: str = ASSISTANT) -> Optional[Turn]:
+        """The last turn of a role"""
+        for turn in reversed(self.turns):
+            if turn.role == role:
+                return turn
+        return None
+
+    def exchange_texts(self) -> List[str]:
+        """Texts of the latest exchange: the last user turn and everything after it"""
+        if not self.turns:
+            return []
+        user = self.latest(USER)
+        first = user.index if user is not None else max(len(self.turns) - 1, 1)
+        return [turn.text for turn in self.turns[first - 1:]]
+
+    def reset(self, conversation_id: Optional[str] = None):
+        """Forget every turn, e.g. after switching conversations.
+
+        Args:
+            conversation_id: Id of the conversation now shown (default: a new one)
+        """
+        self.conversation_id = conversation_id or uuid.uuid4().hex[:12]
+        self.turns = []
+        self.signatures = []
+        self.user_parity = 1
+
+    async def refresh(self) -> Optional[List[Turn]]:
+        """Bring the model up to date with the window, reading only changed turns.
+
+        Returns:
+            The turns, or None if the conversation area could not be located
+            or resolved
+        """
+        locator = get_locator(self.window)
+        path = locator.path(CONVERSATION)
+        if not path:
+            try:
+                element = await locator.locate(CONVERSATION)
+            except LocatorError as e:
+                logger.debug(f"Conversation area not located: {e}")
+                return None
+            if element is None:
+                return None
+            path = element.path
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            status, fields, records = await self._read(path)
+            if status == "ok" and int(fields[0]) < len(self.turns):
+                # The conversation got shorter: another chat is shown
+                self.reset()
+                status, fields, records = await self._read(path)
+            if status != "ok":
+                if status == "error":
+                    # The path went stale; let the locator find the area again
+                    get_locator(self.window).invalidate()
+                return None
+            self.apply(int(fields[0]), fields[1:], records)
+            return self.turns
+
+    async def _read(self, path: str):
+        try:
+            async with window_read_lock():
+                result = await run_script_async(
+                    TURNS_SCRIPT, [str(self.window), path, " ".join(self.signatures)], chunked=True)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.debug(f"Reading turns failed: {e}")
+            return "", [], iter(())
+        if result.returncode != 0:
+            logger.debug(f"Reading turns failed: {result.stderr.strip()}")
+            return "", [], iter(())
+        status, fields, records = read_frame(drain_chunks(result.stdout))
+        if status == "ok" and not (fields and fields[0].isdigit()):
+            return "error", fields, records
+        return status, fields, records
+
+    def apply(self, count: int, signatures: List[str], records):
+        """Merge a read into the model.
+
+        Args:
+            count: Number of messages in the conversation
+            signatures: Layout signature of every message
+            records: "index US text" records of the messages that were read
+        """
+        self.stats["refreshes"] += 1
+        read: Dict[int, str] = {}
+        for record in records:
+            index, _, text = record.partition(US)
+            read[int(index)] = text
+
+        turns = []
+        for index in range(1, count + 1):
+            text = read.get(index)
+            if text is None and index <= len(self.turns):
+                turns.append(self.turns[index - 1])
+                self.stats["turns_reused"] += 1
+                continue
+            text = text or ""
+            turns.append(Turn(self._role(index), index, text, text_hash(text)))
+            self.stats["turns_read"] += 1
+        increment("conversation.turns_read", len(read))
+
+        self.turns = turns
+        self.signatures = list(signatures[:count])
+        self._anchor_roles(read)
+
+    def _role(self, index: int) -> str:
+        return USER if index % 2 == self.user_parity % 2 else ASSISTANT
+
+    def _anchor_roles(self, read: Dict[int, str]):
+        """Align the alternation with the turn holding the last sent prompt"""
+        prompt = sent_prompt(self.window)
+        if prompt is None or not prompt.lines:
+            return
+        for index in sorted(read, reverse=True):
+            turn = self.turns[index - 1]
+            if turn.lines == prompt.lines:
+                if self._role(index) != USER:
+                    self.user_parity = index % 2
+                    for other in self.turns:
+                        other.role = self._role(other.index)
+                return
+
+
+_models: Dict[int, ConversationModel] = {}
+
+
+def get_conversation(window: int = 1) -> ConversationModel:
+    """Return the shared conversation model for a ChatGPT window"""
+    model = _models.get(window)
+    if model is None:
+        model = _models[window] = ConversationModel(window)
+    return model
@@ -0,0 +1,361 @@
+"""
+Named conversations: routing prompts to ChatGPT sidebar conversations by key.
+
+A client that keeps several threads going passes a conversation key with its
+prompt instead of starting a new chat and pasting its whole context again.
+The first prompt with a key starts a new chat. Once it is answered, the router
+remembers the conversation's sidebar entry: the title of the selected row,
+its index and the path of the sidebar list. Later prompts with the same key
+select that row again before they are sent, so the context already in the
+thread is not sent again.
+
+The app moves a conversation to the top of the sidebar when it is used and
+may rename it after the first answer, so the entry is read back after every
+exchange; if it cannot be read back, the conversation's next prompt fails
+rather than starting a new chat in its place. Selecting a row tries the
+remembered index first and checks its title; only if the title no longer
+matches are the rows searched for it, which the script reports.
+
+A conversation stays in the window it was started in. Prompts with the same
+key are sent one at a time, and a window that already shows the conversation
+is not switched at all.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from chatgpt_mcp.readiness import WAIT_HANDLERS, configured_budgets
+from chatgpt_mcp.script_registry import register
+from chatgpt_mcp.script_runner import run_script_async
+from chatgpt_mcp.ui_locator import ELEMENT_HANDLERS, NEW_CHAT, LocatorError, get_locator
+from chatgpt_mcp.window_pool import RAISE_HANDLERS, focus_lock, window_read_lock
+from chatgpt_mcp.wire_format import APPLESCRIPT_SEPARATORS, read_frame
+
+logger = logging.getLogger(__name__)
+
+# Read-backs of the selected row after an exchange; the app may list a new
+# conversation in the sidebar a moment after its first answer
+READBACK_ATTEMPTS = 3
+READBACK_DELAY = 0.3
+
+# argv: window index, sidebar path, path of the conversation list ("" to search
+# the sidebar for it), row to try first (0 for none), title of the row to
+# select ("" to only report the selected row), seconds to wait for the app to
+# come forward.
+# Output: "ok US list path US row US title US how" for the selected row, where
+# how is "hint" (the row tried first matched), "search" (the rows were searched)
+# or "selected" (only reported); "missing US list path" if no row matches,
+# "error US <message>" without a list or if the app did not come forward.
+OPEN_CONVERSATION_SCRIPT = register("open_conversation", r'''
+on run argv
+    set windowIndex to (item 1 of argv) as integer
+    set sidebarPath to item 2 of argv
+    set listPath to item 3 of argv
+    set rowHint to (item 4 of argv) as integer
+    set wantedTitle to item 5 of argv
+    set waitSeconds to (item 6 of argv) as real
+
+    tell application "System Events"
+        tell process "ChatGPT"
+            if not (exists window windowIndex) then return "error" & unitSeparator & "window not found"
+            set win to window windowIndex
+        end tell
+    end tell
+
+    set conversationList to missing value
+    if listPath is not "" then
+        try
+            set conversationList to my resolvePath(win, listPath)
+            tell application "System Events" to set listRole to role of conversationList
+            if listRole is not in {"AXOutline", "AXList", "AXTable"} then set conversationList to missing value
+        on error
+            set conversationList to missing value
+        end try
+    end if
+    if conversationList is missing value then
+        set found to my findList(win, sidebarPath)
+        if found is missing value then return "error" & unitSeparator & "sidebar not found"
+        set conversationList to item 1 of found
+        set listPath to item 2 of found
+    end if
+
+    tell application "System Events" to set conversationRows to rows of conversationList
+    set rowCount to count of conversationRows
+    set rowIndex to 0
+    set foundBy to "selected"
+    if wantedTitle is "" then
+        repeat with i from 1 to rowCount
+            tell application "System Events" to set isSelected to selected of item i of conversationRows
+            if isSelected then
+                set rowIndex to i
+                exit repeat
+            end if
+        end repeat
+    else
+        if rowHint >= 1 and rowHint <= rowCount then
+            if my rowTitle(item rowHint of conversationRows) is wantedTitle then
+                set rowIndex to rowHint
+                set foundBy to "hint"
+            end if
+        end if
+        if rowIndex is 0 then
+            set foundBy to "search"
+            repeat with i from 1 to rowCount
+                if my rowTitle(item i of conversationRows) is wantedTitle then
+                    set rowIndex to i
+                    exit repeat
+                end if
+            end repeat
+        end if
+        if rowIndex > 0 then
+            tell application "System Events"
+                tell process "ChatGPT"
+                    set frontmost to true
+                    my raiseWindow(windowIndex)
+                end tell
+                set rowPos to position of item rowIndex of conversationRows
+                set rowSize to size of item rowIndex of conversationRows
+            end tell
+            if not my waitForFrontmost(waitSeconds) then
+                my restoreWindowOrder(windowIndex)
+                return "error" & unitSeparator & "ChatGPT did not come forward"
+            end if
+            set clickX to (item 1 of rowPos) + (item 1 of rowSize) div 2
+            set clickY to (item 2 of rowPos) + (item 2 of rowSize) div 2
+            tell application "System Events" to tell process "ChatGPT" to click at {clickX, clickY}
+            my restoreWindowOrder(windowIndex)
+        end if
+    end if
+    if rowIndex is 0 then return "missing" & unitSeparator & listPath
+
+    set AppleScript's text item delimiters to unitSeparator
+    set openOutput to {"ok", listPath, rowIndex as text, my rowTitle(item rowIndex of conversationRows), foundBy} as text
+    set AppleScript's text item delimiters to ""
+    return openOutput
+end run
+
+-- Breadth-first search below the sidebar for the list of conversations;
+-- returns {list, path} or missing value
+on findList(win, sidebarPath)
+    set root to win
+    if sidebarPath is not "" then
+        try
+            set root to my resolvePath(win, sidebarPath)
+        on error
+            set sidebarPath to ""
+        end try
+    end if
+    set pending to {{root, sidebarPath}}
+    repeat 5 times
+        set nextLevel to {}
+        repeat with pendingItem in pending
+            set parentElem to item 1 of pendingItem
+            set parentPath to item 2 of pendingItem
+            tell application "System Events" to set children to UI elements of parentElem
+            repeat with i from 1 to count of children
+                set child to item i of children
+                if parentPath is "" then
+                    set childPath to i as text
+                else
+                    set childPath to parentPath & "/" & i
+                end if
+                tell application "System Events" to set childRole to role of child
+                if childRole is in {"AXOutline", "AXList", "AXTable"} then return {child, childPath}
+                set end of nextLevel to {child, childPath}
+            end repeat
+        end repeat
+        set pending to nextLevel
+    end repeat
+    return missing value
+end findList
+
+on rowTitle(theRow)
+    tell application "System Events"
+        repeat with elem in (entire contents of theRow)
+            try
+                if role of elem is "AXStaticText" then
+                    set titleText to value of elem
+                    if titleText is not missing value then return titleText as text
+                end if
+            end try
+        end repeat
+    end tell
+    return ""
+end rowTitle
+''' + ELEMENT_HANDLERS + WAIT_HANDLERS + RAISE_HANDLERS + APPLESCRIPT_SEPARATORS)
+
+
+@dataclass(slots=True)
+class SidebarEntry:
+    """Where a named conversation is in the sidebar"""
+    key: str
+    window: int
+    title: Optional[str] = None
+    list_path: str = ""
+    row: int = 0
+    # Turns the conversation had after its last exchange
+    turns: int = 0
+    # The row could not be read back after an exchange, so it cannot be found
+    lost: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"window": self.window, "title": self.title, "row": self.row, "turns": self.turns,
+                "lost": self.lost}
+
+
+class ConversationRouter:
+    """Maps conversation keys to sidebar entries and tracks what each window shows"""
+
+    def __init__(self):
+        self.entries: Dict[str, SidebarEntry] = {}
+        # Key of the named conversation each window shows (None: not a named one)
+        self.shown: Dict[int, Optional[str]] = {}
+        self.stats = {"created": 0, "switches": 0, "stayed": 0, "searched": 0, "lost": 0}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def lock(self, key: str) -> asyncio.Lock:
+        """Lock held while a prompt is sent to the conversation"""
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        return lock
+
+    def window_for(self, key: str) -> Optional[int]:
+        """The window a conversation lives in, or None if it has not been started"""
+        entry = self.entries.get(key)
+        return entry.window if entry is not None else None
+
+    def showing(self, window: int) -> Optional[str]:
+        return self.shown.get(window)
+
+    def known(self, key: str) -> bool:
+        """Whether the conversation's sidebar entry has been seen"""
+        entry = self.entries.get(key)
+        return entry is not None and bool(entry.title)
+
+    def lost(self, key: str) -> bool:
+        """Whether the conversation was answered but its sidebar row is unknown"""
+        entry = self.entries.get(key)
+        return entry is not None and entry.lost
+
+    def started(self, key: str, window: int):
+        """A new chat was opened in ``window`` for the conversation"""
+        self.entries[key] = SidebarEntry(key, window)
+        self.shown[window] = key
+        self.stats["created"] += 1
+
+    def cleared(self, window: int):
+        """The window no longer shows a named conversation, e.g. after New Chat"""
+        self.shown[window] = None
+
+    def forget(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is not None and self.shown.get(entry.window) == key:
+            self.shown[entry.window] = None
+
+    async def open(self, key: str, window: int) -> bool:
+        """Select the conversation's row in the sidebar.
+
+        Returns:
+            False if the sidebar or the row could not be found
+        """
+        entry = self.entries[key]
+        wait_seconds = configured_budgets()["activate"]
+        sidebar = await self._sidebar_path(window)
+        async with focus_lock():
+            status, fields = await self._run(window, entry, sidebar, entry.title, wait_seconds)
+        if status != "ok":
+            logger.warning(f"Conversation '{key}' ({entry.title!r}) not found in the sidebar: {status} {fields}")
+            self.stats["lost"] += 1
+            return False
+        if fields[3:4] == ["search"]:
+            self.stats["searched"] += 1
+        self._update(entry, fields)
+        self.shown[window] = key
+        self.stats["switches"] += 1
+        return True
+
+    async def remember(self, key: str, window: int, turns: int):
+        """Read back the selected sidebar row after an exchange in the conversation.
+
+        If the row cannot be read back, a conversation whose title is not
+        known yet is marked lost: its next prompt fails instead of silently
+        starting a new chat.
+        """
+        entry = self.entries.get(key)
+        if entry is None or entry.window != window:
+            entry = self.entries[key] = SidebarEntry(key, window)
+        entry.turns = turns
+        previous = entry.row
+        for attempt in range(READBACK_ATTEMPTS):
+            if attempt:
+                await asyncio.sleep(READBACK_DELAY)
+            sidebar = await self._sidebar_path(window)
+            async with window_read_lock():
+                status, fields = await self._run(window, entry, sidebar, "", 0)
+            if status == "ok":
+                break
+        else:
+            logger.warning(f"Conversation '{key}' not found in the sidebar after {READBACK_ATTEMPTS} "
+                           f"read-backs: {status} {fields}")
+            entry.lost = not entry.title
+            return
+        entry.lost = False
+        self._update(entry, fields)
+        if entry.row == 1:
+            # The conversation moved to the top; the rows above its old place moved down
+            for other in self.entries.values():
+                if other is not entry and other.window == window and other.row and (
+                        not previous or other.row < previous):
+                    other.row += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Known conversations, what each window shows, and counters"""
+        return {"conversations": {key: entry.to_dict() for key, entry in self.entries.items()},
+                "shown": dict(self.shown), **self.stats}
+
+    # -- internals -------------------------------------------------------
+
+    async def _sidebar_path(self, window: int) -> str:
+        """Path of the sidebar: two levels above the New Chat control"""
+        locator = get_locator(window)
+        path = locator.path(NEW_CHAT)
+        if not path:
+            try:
+                element = await locator.locate(NEW_CHAT)
+            except LocatorError as e:
+                logger.debug(f"New Chat control not located: {e}")
+                return ""
+            path = element.path if element is not None else ""
+        return "/".join(path.split("/")[:-2]) if path else ""
+
+    async def _run(self, window: int, entry: SidebarEntry, sidebar: str, title: str, wait_seconds: float):
+        # The caller holds the focus lock (selecting a row) or the read lock (reading it back)
+        result = await run_script_async(OPEN_CONVERSATION_SCRIPT, [
+            str(window), sidebar, entry.list_path, str(entry.row), title, str(wait_seconds)])
+        if result.returncode != 0:
+            return "error", [result.stderr.strip()]
+        status, fields, _ = read_frame(result.stdout)
+        if status == "ok" and not (len(fields) >= 3 and fields[1].isdigit()):
+            return "error", fields
+        if status == "missing" and fields:
+            # The list was found; keep its path for the next search
+            entry.list_path = fields[0]
+        return status, fields
+
+    @staticmethod
+    def _update(entry: SidebarEntry, fields):
+        entry.list_path, entry.row, entry.title = fields[0], int(fields[1]), fields[2]
+
+
+_router: Optional[ConversationRouter] = None
+
+
+def get_router() -> ConversationRouter:
+    """Return the conversation router shared by all tools"""
+    global _router
+    if _router is None:
+        _router = ConversationRouter()
+    return _router
@@ -0,0 +1,86 @@
+"""
+Per-request deadlines.
+
+A tool call's deadline is set once, when its job starts running
+(``deadline_scope``), and kept in a context variable, so every probe, wait
+and extraction underneath sees it without being handed it: the script runner
+cuts each call's timeout to the time left and refuses to start a call once
+it has passed, and the polling waits stop at it. asyncio copies the variable
+into tasks started by the request, such as the racing extraction methods.
+
+Long-lived tasks (the button observer, the session heartbeat) are started
+with ``detached`` so they do not inherit the deadline of whichever request
+happened to start them.
+
+Configuration (environment variables):
+    CHATGPT_MCP_REQUEST_TIMEOUT  deadline in seconds for an ask_chatgpt or batch call
+                                 that does not pass a timeout (600; 0 for none)
+"""
+
+import asyncio
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+from typing import Coroutine, Iterator, Optional
+
+DEFAULT_REQUEST_TIMEOUT = 600.0
+
+# time.monotonic() by which the current request must be finished
+_deadline: contextvars.ContextVar = contextvars.ContextVar("chatgpt_mcp_deadline", default=None)
+
+
+def request_timeout(timeout: Optional[float] = None) -> Optional[float]:
+    """The timeout a request runs with: its own, else CHATGPT_MCP_REQUEST_TIMEOUT"""
+    if timeout is not None:
+        return timeout
+    configured = float(os.environ.get("CHATGPT_MCP_REQUEST_TIMEOUT", DEFAULT_REQUEST_TIMEOUT))
+    return configured if configured > 0 else None
+
+
+def current_deadline() -> Optional[float]:
+    """The current request's deadline (``time.monotonic()`` based), if any"""
+    return _deadline.get()
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[float]) -> Iterator[Optional[float]]:
+    """Run the block under a deadline, replacing any inherited one.
+
+    Args:
+        deadline: ``time.monotonic()`` value, or None for no deadline
+    """
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the deadline (0 once it has passed), or None without one"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def expired() -> bool:
+    """Whether the current request has run out of time"""
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def bound(timeout: Optional[float]) -> Optional[float]:
+    """``timeout`` cut to the time left before the deadline"""
+    left = remaining()
+    if left is None:
+        return timeout
+    return left if timeout is None else min(timeout, left)
+
+
+def detached(coro: Coroutine) -> asyncio.Task:
+    """Start a background task outside of the current request's deadline"""
+    context = contextvars.copy_context()
+    context.run(_deadline.set, None)
+    return context.run(asyncio.get_running_loop().create_task, coro)
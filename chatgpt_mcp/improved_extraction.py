@@ -1,104 +1,308 @@
 """
 Improved ChatGPT response extraction based on UI investigation findings.
 This module provides a more robust approach to extracting responses.
+
+By default the extraction methods race: they run at the same time, each
+full-window walk in an osascript process of its own, and the first result
+that looks like a response wins while the others are cancelled and their
+processes killed. The server keeps track of which method succeeds; once one
+has, it starts first and the others only join if it has not finished after
+HEDGE_DELAY seconds. In sequential mode the methods are tried one after
+another, most successful first.
+
+Configuration (environment variables):
+    CHATGPT_MCP_EXTRACTION  ``race`` (default) or ``sequential``
 """
 
 import subprocess
 import asyncio
 import logging
-from typing import Optional, List, Tuple
+import os
+import re
+import time
+from typing import Any, Dict, Optional, List, Sequence, Tuple, Union
+
+from chatgpt_mcp.deadline import expired
+from chatgpt_mcp.message_scope import get_scope
+from chatgpt_mcp.metrics import increment, timed
+from chatgpt_mcp.response_boundary import EXTRACTOR_NOISE, PromptFingerprint, sent_prompt
+from chatgpt_mcp.script_registry import RegisteredScript, register
+from chatgpt_mcp.script_runner import run_script, run_script_async
+from chatgpt_mcp.window_pool import window_read_lock
 
 logger = logging.getLogger(__name__)
 
+# Seconds the other methods give the most successful one before joining the race
+HEDGE_DELAY = 0.5
+
+# Shortest text accepted as a response
+MIN_RESPONSE_LENGTH = 6
+
+
+METHOD_1_SCRIPT = register("extract_class_based", '''
+on run argv
+    set windowIndex to (item 1 of argv) as integer
+    tell application "System Events"
+        tell process "ChatGPT"
+            if not (exists window windowIndex) then
+                return "ERROR: No ChatGPT window found"
+            end if
+            
+            tell window windowIndex
+                set allTexts to {}
+                set allElements to entire contents
+                
+                repeat with elem in allElements
+                    try
+                        if class of elem is static text then
+                            set textContent to missing value
+                            
+                            -- Try multiple extraction methods
+                            -- Method 1: value property
+                            try
+                                set textContent to value of elem
+                            end try
+                            
+                            -- Method 2: name property
+                            if textContent is missing value then
+                                try
+                                    set textContent to name of elem
+                                end try
+                            end if
+                            
+                            -- Method 3: description property
+                            if textContent is missing value then
+                                try
+                                    set textContent to description of elem
+                                end try
+                            end if
+                            
+                            -- Method 4: title property
+                            if textContent is missing value then
+                                try
+                                    set textContent to title of elem
+                                end try
+                            end if
+                            
+                            -- Add to results if we got text
+                            if textContent is not missing value then
+                                set textStr to textContent as string
+                                if length of textStr > 0 then
+                                    set end of allTexts to textStr
+                                end if
+                            end if
+                        end if
+                    end try
+                end repeat
+                
+                -- Return results
+                if (count of allTexts) > 0 then
+                    set AppleScript's text item delimiters to linefeed
+                    return (allTexts as text)
+                else
+                    return "ERROR: No text extracted"
+                end if
+            end tell
+        end tell
+    end tell
+end run
+''')
+
+
+METHOD_2_SCRIPT = register("extract_group_hierarchical", '''
+on run argv
+    set windowIndex to (item 1 of argv) as integer
+    tell application "System Events"
+        tell process "ChatGPT"
+            if not (exists window windowIndex) then
+                return "ERROR: No window"
+            end if
+            
+            tell window windowIndex
+                set allTexts to {}
+                
+                -- Navigate through groups
+                repeat with grp in UI elements
+                    if role of grp is "AXGroup" then
+                        -- Check each group for text content
+                        repeat with subelem in entire contents of grp
+                            try
+                                if role of subelem is "AXStaticText" then
+                                    set textContent to description of subelem
+                                    if textContent is missing value then
+                                        set textContent to value of subelem
+                                    end if
+                                    
+                                    if textContent is not missing value then
+                                        set textStr to textContent as string
+                                        if length of textStr > 0 then
+                                            set end of allTexts to textStr
+                                        end if
+                                    end if
+                                end if
+                            end try
+                        end repeat
+                    end if
+                end repeat
+                
+                if (count of allTexts) > 0 then
+                    set AppleScript's text item delimiters to linefeed
+                    return (allTexts as text)
+                else
+                    return "ERROR: No text in groups"
+                end if
+            end tell
+        end tell
+    end tell
+end run
+''')
+
+
+METHOD_3_SCRIPT = register("extract_static_text", '''
+on run argv
+    set windowIndex to (item 1 of argv) as integer
+    tell application "System Events"
+        tell process "ChatGPT"
+            if not (exists window windowIndex) then
+                return "ERROR: No window"
+            end if
+            
+            tell window windowIndex
+                set allTexts to {}
+                
+                -- Try using class instead of role
+                repeat with elem in entire contents
+                    try
+                        if class of elem is static text then
+                            set textContent to value of elem
+                            if textContent is missing value then
+                                set textContent to name of elem
+                            end if
+                            
+                            if textContent is not missing value then
+                                set textStr to textContent as string
+                                if length of textStr > 0 then
+                                    set end of allTexts to textStr
+                                end if
+                            end if
+                        end if
+                    end try
+                end repeat
+                
+                if (count of allTexts) > 0 then
+                    set AppleScript's text item delimiters to linefeed
+                    return (allTexts as text)
+                else
+                    return "ERROR: No static text elements"
+                end if
+            end tell
+        end tell
+    end tell
+end run
+''')
+
+
+# Heuristics used when the sent prompt is not found in the extracted text
+PROMPT_PREFIXES = re.compile("|".join(re.escape(prefix) for prefix in [
+    'Please ', 'Can you ', 'Could you ', 'Would you ',
+    'Write ', 'Create ', 'Generate ', 'Make ', 'Build ',
+    'Explain ', 'Describe ', 'List ', 'Show ', 'Tell ',
+    'What ', 'How ', 'Why ', 'When ', 'Where ', 'Who ',
+    'Debug ', 'Fix ', 'Update ', 'Add ', 'Remove ', 'Delete ',
+    'Analyze ', 'Help ', 'Find ', 'Search ', 'Look ',
+]))
+REQUEST_WORDS = re.compile("|".join(re.escape(word) for word in [
+    'please', 'help', 'need', 'want', 'would like', 'could you',
+    'can you', 'wondering', 'question', 'asking',
+]), re.IGNORECASE)
+ASSISTANT_PREFIXES = re.compile("|".join(re.escape(prefix) for prefix in [
+    'I\'ll', 'I can', 'I\'d', 'I would', 'I think',
+    'Here\'s', 'Here are', 'Here is',
+    'Based on', 'According to', 'To ',
+    'The ', 'This ', 'That ', 'These ', 'Those ',
+    'Yes,', 'No,', 'Sure,', 'Certainly,',
+    'Let me', 'Let\'s',
+]))
+
+
+# Attempts, successes and seconds per method since the server started
+_method_stats: Dict[str, Dict[str, float]] = {}
+
+
+def record_method(name: str, success: bool, seconds: float):
+    """Record the outcome of one finished extraction attempt"""
+    stats = _method_stats.setdefault(name, {"attempts": 0, "successes": 0, "seconds": 0.0})
+    stats["attempts"] += 1
+    stats["successes"] += int(success)
+    stats["seconds"] += seconds
+
+
+def method_rank(name: str) -> Tuple[float, float]:
+    """Sort key: likeliest to succeed first, then fastest"""
+    stats = _method_stats.get(name)
+    if not stats:
+        return (-0.5, 0.0)
+    # Laplace-smoothed success rate, so one early failure is not final
+    rate = (stats["successes"] + 1) / (stats["attempts"] + 2)
+    return (-rate, stats["seconds"] / stats["attempts"])
+
+
+def method_stats() -> Dict[str, Dict[str, Any]]:
+    """Attempts, successes and mean seconds per extraction method"""
+    return {
+        name: {"attempts": stats["attempts"], "successes": stats["successes"],
+               "mean": stats["seconds"] / stats["attempts"] if stats["attempts"] else 0.0}
+        for name, stats in _method_stats.items()
+    }
+
 
 class ImprovedChatGPTExtractor:
     """Improved extraction methods for ChatGPT responses"""
     
+    def __init__(self, race: Optional[bool] = None):
+        if race is None:
+            race = os.environ.get("CHATGPT_MCP_EXTRACTION", "race") != "sequential"
+        self.race = race
+    
     @staticmethod
-    def run_applescript(script: str) -> Tuple[bool, str]:
+    def run_applescript(script: Union[str, RegisteredScript], args: Sequence[str] = ()) -> Tuple[bool, str]:
         """Run AppleScript and return success status and output"""
         try:
-            result = subprocess.run(
-                ["osascript", "-e", script],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
+            result = run_script(script, args, timeout=10)
             return result.returncode == 0, result.stdout.strip()
         except subprocess.TimeoutExpired:
             return False, "Script timed out"
         except Exception as e:
             return False, str(e)
     
-    async def extract_response_method_1(self) -> Optional[str]:
-        """Method 1: Enhanced extraction using class-based search"""
-        script = '''
-        tell application "System Events"
-            tell process "ChatGPT"
-                if not (exists window 1) then
-                    return "ERROR: No ChatGPT window found"
-                end if
-                
-                tell window 1
-                    set allTexts to {}
-                    set allElements to entire contents
-                    
-                    repeat with elem in allElements
-                        try
-                            if class of elem is static text then
-                                set textContent to missing value
-                                
-                                -- Try multiple extraction methods
-                                -- Method 1: value property
-                                try
-                                    set textContent to value of elem
-                                end try
-                                
-                                -- Method 2: name property
-                                if textContent is missing value then
-                                    try
-                                        set textContent to name of elem
-                                    end try
-                                end if
-                                
-                                -- Method 3: description property
-                                if textContent is missing value then
-                                    try
-                                        set textContent to description of elem
-                                    end try
-                                end if
-                                
-                                -- Method 4: title property
-                                if textContent is missing value then
-                                    try
-                                        set textContent to title of elem
-                                    end try
-                                end if
-                                
-                                -- Add to results if we got text
-                                if textContent is not missing value then
-                                    set textStr to textContent as string
-                                    if length of textStr > 0 then
-                                        set end of allTexts to textStr
-                                    end if
-                                end if
-                            end if
-                        end try
-                    end repeat
-                    
-                    -- Return results
-                    if (count of allTexts) > 0 then
-                        set AppleScript's text item delimiters to linefeed
-                        return (allTexts as text)
-                    else
-                        return "ERROR: No text extracted"
-                    end if
-                end tell
-            end tell
-        end tell
-        '''
+    @staticmethod
+    async def run_applescript_async(script: Union[str, RegisteredScript], args: Sequence[str] = (),
+                                    spawn: bool = False) -> Tuple[bool, str]:
+        """Run AppleScript without blocking the event loop, in its own process if ``spawn``"""
+        try:
+            async with window_read_lock():
+                result = await run_script_async(script, args, timeout=10, spawn=spawn)
+            return result.returncode == 0, result.stdout.strip()
+        except subprocess.TimeoutExpired:
+            return False, "Script timed out"
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            return False, str(e)
+    
+    @timed("extractor.extract_latest_messages")
+    async def extract_latest_messages(self, window: int = 1) -> Optional[str]:
+        """Scoped extraction: only the latest messages of the conversation"""
+        scoped = await get_scope(window).read()
+        if scoped is None or not scoped.texts:
+            return None
         
-        success, result = self.run_applescript(script)
+        return self._process_extracted_text('\n'.join(scoped.texts), window)
+    
+    @timed("extractor.extract_response_method_1")
+    async def extract_response_method_1(self, window: int = 1) -> Optional[str]:
+        """Method 1: Enhanced extraction using class-based search"""
+        success, result = await self.run_applescript_async(METHOD_1_SCRIPT, [str(window)], spawn=self.race)
         if not success:
             logger.error(f"AppleScript failed: {result}")
             return None
@@ -107,210 +311,59 @@ class ImprovedChatGPTExtractor:
             logger.warning(f"Extraction error: {result}")
             return None
         
-        return self._process_extracted_text(result)
+        return self._process_extracted_text(result, window)
     
-    async def extract_response_method_2(self) -> Optional[str]:
+    @timed("extractor.extract_response_method_2")
+    async def extract_response_method_2(self, window: int = 1) -> Optional[str]:
         """Method 2: Group-based hierarchical extraction"""
-        script = '''
-        tell application "System Events"
-            tell process "ChatGPT"
-                if not (exists window 1) then
-                    return "ERROR: No window"
-                end if
-                
-                tell window 1
-                    set allTexts to {}
-                    
-                    -- Navigate through groups
-                    repeat with grp in UI elements
-                        if role of grp is "AXGroup" then
-                            -- Check each group for text content
-                            repeat with subelem in entire contents of grp
-                                try
-                                    if role of subelem is "AXStaticText" then
-                                        set textContent to description of subelem
-                                        if textContent is missing value then
-                                            set textContent to value of subelem
-                                        end if
-                                        
-                                        if textContent is not missing value then
-                                            set textStr to textContent as string
-                                            if length of textStr > 0 then
-                                                set end of allTexts to textStr
-                                            end if
-                                        end if
-                                    end if
-                                end try
-                            end repeat
-                        end if
-                    end repeat
-                    
-                    if (count of allTexts) > 0 then
-                        set AppleScript's text item delimiters to linefeed
-                        return (allTexts as text)
-                    else
-                        return "ERROR: No text in groups"
-                    end if
-                end tell
-            end tell
-        end tell
-        '''
-        
-        success, result = self.run_applescript(script)
+        success, result = await self.run_applescript_async(METHOD_2_SCRIPT, [str(window)], spawn=self.race)
         if not success or result.startswith("ERROR:"):
             return None
         
-        return self._process_extracted_text(result)
+        return self._process_extracted_text(result, window)
     
-    async def extract_response_method_3(self) -> Optional[str]:
+    @timed("extractor.extract_response_method_3")
+    async def extract_response_method_3(self, window: int = 1) -> Optional[str]:
         """Method 3: Direct UI element class-based extraction"""
-        script = '''
-        tell application "System Events"
-            tell process "ChatGPT"
-                if not (exists window 1) then
-                    return "ERROR: No window"
-                end if
-                
-                tell window 1
-                    set allTexts to {}
-                    
-                    -- Try using class instead of role
-                    repeat with elem in entire contents
-                        try
-                            if class of elem is static text then
-                                set textContent to value of elem
-                                if textContent is missing value then
-                                    set textContent to name of elem
-                                end if
-                                
-                                if textContent is not missing value then
-                                    set textStr to textContent as string
-                                    if length of textStr > 0 then
-                                        set end of allTexts to textStr
-                                    end if
-                                end if
-                            end if
-                        end try
-                    end repeat
-                    
-                    if (count of allTexts) > 0 then
-                        set AppleScript's text item delimiters to linefeed
-                        return (allTexts as text)
-                    else
-                        return "ERROR: No static text elements"
-                    end if
-                end tell
-            end tell
-        end tell
-        '''
-        
-        success, result = self.run_applescript(script)
+        success, result = await self.run_applescript_async(METHOD_3_SCRIPT, [str(window)], spawn=self.race)
         if not success or result.startswith("ERROR:"):
             return None
         
-        return self._process_extracted_text(result)
+        return self._process_extracted_text(result, window)
     
-    def _process_extracted_text(self, raw_text: str) -> str:
+    def _process_extracted_text(self, raw_text: str, window: int = 1) -> str:
         """Process extracted text to remove UI elements and format properly"""
         if not raw_text:
             return ""
         
-        # Split into lines
-        elements = [e.strip() for e in raw_text.split('\n') if e.strip()]
-        
-        # Enhanced UI element list based on investigation
-        ui_elements = {
-            # Buttons and controls
-            'Regenerate', 'Continue generating', 'Stop generating', 'Copy',
-            'Send message', 'Reply...', 'New chat',
-            # UI indicators
-            '▍', '│', '─', '┌', '┐', '└', '┘',
-            # Navigation elements
-            'ChatGPT', 'Today', 'Yesterday', 'Previous 7 Days', 'Previous 30 Days',
-            # Status messages
-            'Thinking...', 'Typing...', 'ChatGPT is typing...',
-            # Common UI labels
-            'You', 'ChatGPT', 'User', 'Assistant'
-        }
-        
-        # Filter out UI elements
-        filtered_elements = []
-        for elem in elements:
-            # Skip if it's a known UI element
-            if elem in ui_elements:
-                continue
-            
-            # Skip very short elements (likely UI)
-            if len(elem) <= 2:
-                continue
-            
-            # Skip elements that are just numbers or single words (likely UI)
-            if elem.isdigit() or (len(elem.split()) == 1 and len(elem) < 10):
-                continue
-            
-            filtered_elements.append(elem)
+        # Split into lines, skipping UI elements, very short elements,
+        # numbers and single short words (see response_boundary.EXTRACTOR_NOISE)
+        is_noise = EXTRACTOR_NOISE.fullmatch
+        stripped = (e.strip() for e in raw_text.split('\n'))
+        filtered_elements = [e for e in stripped if e and not is_noise(e)]
         
         if not filtered_elements:
             return ""
         
         # Try to identify message boundaries
-        return self._extract_assistant_response(filtered_elements)
+        return self._extract_assistant_response(filtered_elements, sent_prompt(window))
     
-    def _extract_assistant_response(self, elements: List[str]) -> str:
-        """Extract the assistant's response from filtered elements"""
-        # Enhanced prompt patterns
-        user_prompt_patterns = [
-            # Question patterns
-            lambda e: e.endswith('?') and len(e) > 10,
-            # Command patterns
-            lambda e: any(e.startswith(cmd) for cmd in [
-                'Please ', 'Can you ', 'Could you ', 'Would you ',
-                'Write ', 'Create ', 'Generate ', 'Make ', 'Build ',
-                'Explain ', 'Describe ', 'List ', 'Show ', 'Tell ',
-                'What ', 'How ', 'Why ', 'When ', 'Where ', 'Who ',
-                'Debug ', 'Fix ', 'Update ', 'Add ', 'Remove ', 'Delete ',
-                'Analyze ', 'Help ', 'Find ', 'Search ', 'Look '
-            ]),
-            # Contains request keywords
-            lambda e: any(word in e.lower() for word in [
-                'please', 'help', 'need', 'want', 'would like', 'could you',
-                'can you', 'wondering', 'question', 'asking'
-            ]) and len(e) > 20,
-        ]
-        
-        # Find the last user prompt
-        last_prompt_index = -1
-        for i in range(len(elements) - 1, -1, -1):
-            elem = elements[i]
-            if any(pattern(elem) for pattern in user_prompt_patterns):
-                last_prompt_index = i
-                break
+    def _extract_assistant_response(self, elements: List[str],
+                                    prompt: Optional[PromptFingerprint] = None) -> str:
+        """Extract the assistant's response from filtered elements
         
-        # Extract response after the prompt
-        if last_prompt_index >= 0 and last_prompt_index < len(elements) - 1:
-            response_elements = elements[last_prompt_index + 1:]
+        The response follows the last occurrence of the prompt that was sent.
+        If it is not found, the last element that looks like a request is
+        taken as the prompt instead.
+        """
+        start = prompt.locate(elements, EXTRACTOR_NOISE) if prompt is not None else None
+        if start is not None:
+            # Empty if nothing follows the prompt yet
+            response_elements = elements[start:]
         else:
-            # No clear prompt found - look for assistant response patterns
-            assistant_start_index = -1
-            assistant_patterns = [
-                'I\'ll', 'I can', 'I\'d', 'I would', 'I think',
-                'Here\'s', 'Here are', 'Here is',
-                'Based on', 'According to', 'To ',
-                'The ', 'This ', 'That ', 'These ', 'Those ',
-                'Yes,', 'No,', 'Sure,', 'Certainly,',
-                'Let me', 'Let\'s'
-            ]
-            
-            for i, elem in enumerate(elements):
-                if any(elem.startswith(pattern) for pattern in assistant_patterns):
-                    assistant_start_index = i
-                    break
-            
-            if assistant_start_index >= 0:
-                response_elements = elements[assistant_start_index:]
-            else:
-                # Return all elements as fallback
-                response_elements = elements
+            if prompt is not None:
+                increment("boundary.prompt_not_found")
+            response_elements = self._guess_response_elements(elements)
         
         # Join response elements
         response = '\n'.join(response_elements)
@@ -330,24 +383,107 @@ class ImprovedChatGPTExtractor:
         
         return '\n'.join(cleaned_lines).strip()
     
-    async def extract_with_fallback(self) -> str:
+    def _guess_response_elements(self, elements: List[str]) -> List[str]:
+        """Elements after the last one that looks like a user prompt"""
+        # Find the last user prompt
+        last_prompt_index = -1
+        for i in range(len(elements) - 1, -1, -1):
+            elem = elements[i]
+            if ((elem.endswith('?') and len(elem) > 10) or PROMPT_PREFIXES.match(elem)
+                    or (len(elem) > 20 and REQUEST_WORDS.search(elem))):
+                last_prompt_index = i
+                break
+        
+        # Extract response after the prompt
+        if last_prompt_index >= 0 and last_prompt_index < len(elements) - 1:
+            return elements[last_prompt_index + 1:]
+        
+        # No clear prompt found - look for assistant response patterns
+        for i, elem in enumerate(elements):
+            if ASSISTANT_PREFIXES.match(elem):
+                return elements[i:]
+        
+        # Return all elements as fallback
+        return elements
+    
+    async def _attempt(self, method, window: int) -> Optional[str]:
+        """Run one method; its result if it looks like a response"""
+        started = time.monotonic()
+        try:
+            result = await method(window)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.debug(f"Method {method.__name__} failed: {e}")
+            result = None
+        success = bool(result) and len(result) >= MIN_RESPONSE_LENGTH
+        if not success and expired():
+            # The request ran out of time; that says nothing about the method
+            return None
+        record_method(method.__name__, success, time.monotonic() - started)
+        increment(f"extractor.{method.__name__}.{'success' if success else 'empty'}")
+        return result if success else None
+    
+    async def race_methods(self, methods, window: int = 1) -> Optional[str]:
+        """Run the methods concurrently and return the first response.
+        
+        The first method (the most successful so far) gets a head start of
+        HEDGE_DELAY seconds if it has succeeded before. The methods still
+        running when a response arrives are cancelled, which kills their
+        osascript processes.
+        """
+        leader_done = asyncio.Event()
+        head_start = HEDGE_DELAY if _method_stats.get(methods[0].__name__, {}).get("successes") else 0.0
+        
+        async def leader():
+            try:
+                return await self._attempt(methods[0], window)
+            finally:
+                leader_done.set()
+        
+        async def follower(method):
+            if head_start:
+                try:
+                    await asyncio.wait_for(leader_done.wait(), head_start)
+                except asyncio.TimeoutError:
+                    pass
+            return await self._attempt(method, window)
+        
+        tasks = [asyncio.ensure_future(leader())] + [asyncio.ensure_future(follower(m)) for m in methods[1:]]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                result = await finished
+                if result:
+                    return result
+            return None
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    
+    async def extract_with_fallback(self, window: int = 1) -> str:
         """Try multiple extraction methods with fallback"""
-        # Try each method in order
+        # The scoped read is cheap and usually right; the full-window walks
+        # are the fallback. Methods that have succeeded before go first.
         methods = [
-            ("Enhanced description-based", self.extract_response_method_1),
-            ("Group hierarchical", self.extract_response_method_2),
-            ("Class-based", self.extract_response_method_3),
+            self.extract_latest_messages,
+            self.extract_response_method_1,
+            self.extract_response_method_2,
+            self.extract_response_method_3,
         ]
+        methods.sort(key=lambda method: method_rank(method.__name__))
         
-        for method_name, method in methods:
-            logger.debug(f"Trying extraction method: {method_name}")
-            try:
-                result = await method()
-                if result and len(result) > 5:  # Ensure we got meaningful content
-                    logger.debug(f"Successfully extracted using {method_name}")
+        if self.race:
+            result = await self.race_methods(methods, window)
+            if result:
+                return result
+        else:
+            for method in methods:
+                logger.debug(f"Trying extraction method: {method.__name__}")
+                result = await self._attempt(method, window)
+                if result:
+                    logger.debug(f"Successfully extracted using {method.__name__}")
                     return result
-            except Exception as e:
-                logger.debug(f"Method {method_name} failed: {e}")
         
         # All methods failed
         logger.warning("All extraction methods failed")
@@ -355,10 +491,11 @@ class ImprovedChatGPTExtractor:
 
 
 # Standalone function that can be used as a drop-in replacement
-async def get_chatgpt_response_improved() -> str:
+async def get_chatgpt_response_improved(window: int = 1) -> str:
     """Improved ChatGPT response extraction using multiple methods with fallback"""
+    increment("fallback.improved_extraction")
     extractor = ImprovedChatGPTExtractor()
-    return await extractor.extract_with_fallback()
+    return await extractor.extract_with_fallback(window)
 
 
 # Synchronous version for compatibility
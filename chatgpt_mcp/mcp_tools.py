@@ -1,40 +1,78 @@
-import subprocess
 import asyncio
 import json
-from mcp.server.fastmcp import FastMCP
-from chatgpt_mcp.chatgpt_automation import ChatGPTAutomation, check_chatgpt_access
-from chatgpt_mcp.button_helper import ChatGPTButtonHelper
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from mcp.server.fastmcp import Context, FastMCP
+from chatgpt_mcp.button_observer import get_observer
+from chatgpt_mcp.conversation_model import USER, Turn, get_conversation
+from chatgpt_mcp.conversation_router import get_router
+from chatgpt_mcp.deadline import current_deadline, deadline_scope, expired, request_timeout
+from chatgpt_mcp.message_scope import get_scope
+from chatgpt_mcp.metrics import get_metrics, increment, observe, span, timed
+from chatgpt_mcp.readiness import WAIT_HANDLERS, LatencyBudget, phase_stats
+from chatgpt_mcp.response_boundary import (
+    RESPONSE_NOISE, PromptFingerprint, forget_prompt, remember_prompt, sent_prompt,
+)
+from chatgpt_mcp.response_cache import get_cache
+from chatgpt_mcp.response_stream import STREAM_INTERVAL, DeltaCallback, ResponseStream, context_emitter
+from chatgpt_mcp.scheduler import get_scheduler
+from chatgpt_mcp.session import get_session
+from chatgpt_mcp.script_registry import register
+from chatgpt_mcp.script_runner import run_script_async
+from chatgpt_mcp.status_probe import MODE_TEXT, ProbeResult, probe_status
+from chatgpt_mcp.transcript_store import get_store
+from chatgpt_mcp.window_pool import get_pool, window_read_lock
+from chatgpt_mcp.wire_format import APPLESCRIPT_SEPARATORS, RS, drain_chunks, read_frame
 
+logger = logging.getLogger(__name__)
 
+NO_RESPONSE = "No response received from ChatGPT."
 
-async def get_chatgpt_response() -> str:
-    """Get the latest response from ChatGPT after sending a message.
-    
-    Returns:
-        ChatGPT's latest response text
-    """
-    try:
-        # Use the new comprehensive text extraction AppleScript
-        applescript = '''
-on run
+# While the button stays in 'stop' past the initial timeout, the latest message
+# is fingerprinted every STUCK_CHECK_INTERVAL seconds; if it has not changed for
+# STUCK_STABLE_SECONDS the button is assumed stuck and the answer is read.
+STUCK_CHECK_INTERVAL = 2
+STUCK_STABLE_SECONDS = 10
+
+# Seconds between full reads while ask_chatgpt_simple waits for the answer
+RESPONSE_POLL_INTERVAL = 1.0
+
+# Seconds allowed for stopping the generation of an abandoned request
+STOP_TIMEOUT = 5.0
+
+# Error reported for batch prompts not answered by the batch's deadline
+BATCH_DEADLINE_ERROR = "Batch deadline passed before the response was complete"
+
+# Raised when the paste script did not send the prompt: ChatGPT did not come
+# forward, or the input field did not show the prompt
+PASTE_ERROR = "The prompt could not be pasted into ChatGPT and was not sent"
+
+
+# Comprehensive text extraction script. Its output is a frame (see
+# wire_format): a header with the status, then one record per text.
+RESPONSE_SCRIPT = register("get_chatgpt_response", r'''
+on run argv
+    set windowIndex to (item 1 of argv) as integer
     tell application "System Events"
         -- Check if ChatGPT process exists
         if not (exists process "ChatGPT") then
-            return "{\"status\": \"error\", \"message\": \"ChatGPT process not found\"}"
+            return "error" & my unitSeparator & "ChatGPT process not found"
         end if
         
         tell process "ChatGPT"
             -- Activate ChatGPT
             set frontmost to true
-            delay 0.5
+            my waitForFrontmost(1)
             
             -- Check if window exists
-            if not (exists window 1) then
-                return "{\"status\": \"error\", \"message\": \"No ChatGPT window found\"}"
+            if not (exists window windowIndex) then
+                return "error" & my unitSeparator & "No ChatGPT window found"
             end if
             
             -- Get entire contents
-            set allElements to entire contents of window 1
+            set allElements to entire contents of window windowIndex
             
             -- Collect texts and buttons for completion detection
             set allTexts to {}
@@ -115,141 +153,329 @@ on run
                 end repeat
             end if
             
-            -- Build simplified JSON result
-            set jsonResult to "{\"status\": \"success\", "
-            
-            -- Add text count and texts
-            set textCount to count of allTexts
-            set jsonResult to jsonResult & "\"textCount\": " & textCount & ", \"texts\": ["
-            
-            repeat with i from 1 to textCount
-                set currentText to item i of allTexts
-                -- Escape JSON characters
-                set currentText to my escapeJSON(currentText)
-                
-                set jsonResult to jsonResult & "\"" & currentText & "\""
-                if i < textCount then
-                    set jsonResult to jsonResult & ", "
-                end if
-            end repeat
-            
-            set jsonResult to jsonResult & "], "
-            
-            -- Add only the essential indicator
-            set jsonResult to jsonResult & "\"indicators\": {"
-            set jsonResult to jsonResult & "\"conversationComplete\": " & conversationComplete
-            set jsonResult to jsonResult & "}}"
+            -- Header with the essential indicator, then one record per text.
+            -- The separators never occur in UI text, so nothing is escaped.
+            set frameOutput to "ok" & my unitSeparator & (conversationComplete as text)
+            if (count of allTexts) > 0 then
+                set AppleScript's text item delimiters to my recordSeparator
+                set frameOutput to frameOutput & my recordSeparator & (allTexts as text)
+                set AppleScript's text item delimiters to ""
+            end if
             
-            return jsonResult
+            return frameOutput
         end tell
     end tell
 end run
+''' + WAIT_HANDLERS + APPLESCRIPT_SEPARATORS)
+
+
+def iter_response_lines(texts: Iterable[str]) -> Iterator[str]:
+    """Split static texts into lines as they are read, dropping empty lines and UI labels.
+    
+    Args:
+        texts: Static text values in window order
+    
+    Yields:
+        The remaining lines, stripped
+    """
+    # Skip empty lines and UI elements (see response_boundary.RESPONSE_LABELS)
+    is_noise = RESPONSE_NOISE.fullmatch
+    for text in texts:
+        for line in text.split('\n'):
+            line = line.strip()
+            if line and not is_noise(line):
+                yield line
+
+
+def filter_response_lines(texts: Iterable[str]) -> List[str]:
+    """Split static texts into lines, dropping empty lines and UI labels.
+    
+    Args:
+        texts: Static text values in window order
+    
+    Returns:
+        The remaining lines, stripped
+    """
+    return list(iter_response_lines(texts))
+
 
--- JSON escape function
-on escapeJSON(txt)
-    set txt to my replaceText(txt, "\\", "\\\\")
-    set txt to my replaceText(txt, "\"", "\\\"")
-    set txt to my replaceText(txt, return, "\\n")
-    set txt to my replaceText(txt, linefeed, "\\n")
-    set txt to my replaceText(txt, tab, "\\t")
-    return txt
-end escapeJSON
-
--- Text replacement function
-on replaceText(someText, oldItem, newItem)
-    set {tempTID, AppleScript's text item delimiters} to {AppleScript's text item delimiters, oldItem}
-    try
-        set {textItems, AppleScript's text item delimiters} to {text items of someText, newItem}
-        set {someText, AppleScript's text item delimiters} to {textItems as text, tempTID}
-    on error errorMessage number errorNumber
-        set AppleScript's text item delimiters to tempTID
-        error errorMessage number errorNumber
-    end try
-    return someText
-end replaceText
-'''
-        
-        result = subprocess.run(
-            ["osascript", "-e", applescript],
-            capture_output=True,
-            text=True
-        )
+def process_response_texts(texts: Iterable[str], prompt: Optional[PromptFingerprint] = None) -> str:
+    """Turn the static texts read from the ChatGPT window into the response.
+    
+    Args:
+        texts: Static text values in window order
+        prompt: The prompt that was sent; the response is the text after its
+            last occurrence. Without it, or if it is not found, the first
+            line is assumed to be the prompt.
+    
+    Returns:
+        The response text, or NO_RESPONSE if there is none
+    """
+    filtered_lines = filter_response_lines(texts)
+    if not filtered_lines:
+        return NO_RESPONSE
+    
+    if prompt is not None:
+        start = prompt.locate(filtered_lines, RESPONSE_NOISE)
+        if start is not None:
+            response_text = '\n'.join(filtered_lines[start:])
+            return response_text if response_text else NO_RESPONSE
+        increment("boundary.prompt_not_found")
+    
+    # Find the user's prompt and ChatGPT's response
+    # The response typically comes after the user's prompt
+    response_text = '\n'.join(filtered_lines)
+    
+    # Try to identify and extract just ChatGPT's response
+    # This is a heuristic approach - may need refinement
+    if len(filtered_lines) > 1:
+        # Assume the first line might be the user's prompt
+        # and the rest is ChatGPT's response
+        # But only if there's a clear separation
+        potential_response = '\n'.join(filtered_lines[1:])
+        if potential_response and len(potential_response) > 10:
+            response_text = potential_response
+    
+    return response_text if response_text else NO_RESPONSE
+
+
+def located_response(texts: Iterable[str], prompt: Optional[PromptFingerprint]) -> Optional[str]:
+    """The text after the prompt's last occurrence in the window's texts.
+    
+    Unlike process_response_texts there is no first-line fallback: without
+    the prompt in view there is no evidence that an answer follows it.
+    
+    Returns:
+        The response text, or None if the prompt is not found or nothing follows it
+    """
+    if prompt is None:
+        return None
+    filtered_lines = filter_response_lines(texts)
+    start = prompt.locate(filtered_lines, RESPONSE_NOISE)
+    if start is None:
+        return None
+    return '\n'.join(filtered_lines[start:]) or None
+
+
+@timed("get_chatgpt_response")
+async def get_chatgpt_response(window: int = 1) -> str:
+    """Get the latest response from ChatGPT after sending a message.
+    
+    Reads the latest exchange from the window's conversation model, which
+    only re-reads the turns that changed, and walks the whole window when
+    the conversation's scroll area cannot be resolved.
+    
+    Args:
+        window: Index of the ChatGPT window to read
+    
+    Returns:
+        ChatGPT's latest response text
+    """
+    prompt = sent_prompt(window)
+    conversation = get_conversation(window)
+    if await conversation.refresh():
+        get_scope(window).observe(conversation.message_count)
+        response = process_response_texts(conversation.exchange_texts(), prompt)
+        if response != NO_RESPONSE:
+            return response
+    
+    increment("fallback.full_window")
+    try:
+        async with window_read_lock():
+            result = await run_script_async(RESPONSE_SCRIPT, [str(window)], chunked=True)
         
         if result.returncode != 0:
             raise Exception(f"AppleScript error: {result.stderr}")
         
-        # Parse JSON result
-        try:
-            data = json.loads(result.stdout)
-        except json.JSONDecodeError:
-            # Fallback if JSON parsing fails
-            return result.stdout.strip()
+        # Parse the frame chunk by chunk; its texts are filtered as they are read
+        status, fields, texts = read_frame(drain_chunks(result.stdout))
+        if not status:
+            # Fallback if the output is not a frame
+            return RS.join([*fields, *texts]).strip()
         
         # Check for errors
-        if data.get('status') == 'error':
-            raise Exception(data.get('message', 'Unknown error'))
+        if status == 'error':
+            raise Exception(fields[0] if fields else 'Unknown error')
         
-        # Extract texts from JSON
-        texts = data.get('texts', [])
-        if not texts:
-            return "No response received from ChatGPT."
-        
-        # Join all texts with newlines
-        full_text = '\n'.join(texts)
-        
-        # Filter out UI elements and system texts
-        ui_elements = ['Regenerate', 'Continue generating', 'Stop generating', 
-                      'Copy', '▍', 'ChatGPT', 'Send a message', 'Message ChatGPT',
-                      'Type a message', 'Ask anything']
-        
-        # Split text into lines for better filtering
-        lines = full_text.split('\n')
-        filtered_lines = []
-        
-        for line in lines:
-            # Skip empty lines and UI elements
-            line = line.strip()
-            if not line or line in ui_elements:
-                continue
-            
-            # Skip lines that are just UI elements
-            is_ui_element = False
-            for ui_elem in ui_elements:
-                if line == ui_elem:
-                    is_ui_element = True
-                    break
-            
-            if not is_ui_element:
-                filtered_lines.append(line)
-        
-        # Find the user's prompt and ChatGPT's response
-        # The response typically comes after the user's prompt
-        response_text = '\n'.join(filtered_lines)
-        
-        # Try to identify and extract just ChatGPT's response
-        # This is a heuristic approach - may need refinement
-        if len(filtered_lines) > 1:
-            # Assume the first line might be the user's prompt
-            # and the rest is ChatGPT's response
-            # But only if there's a clear separation
-            potential_response = '\n'.join(filtered_lines[1:])
-            if potential_response and len(potential_response) > 10:
-                response_text = potential_response
-        
-        return response_text if response_text else "No response received from ChatGPT."
+        return process_response_texts(texts, prompt)
         
     except Exception as e:
         # Fallback to improved extraction if available
         try:
             from chatgpt_mcp.improved_extraction import get_chatgpt_response_improved
-            return await get_chatgpt_response_improved()
+            return await get_chatgpt_response_improved(window)
         except ImportError:
             pass
         
         raise Exception(f"Failed to get response from ChatGPT: {str(e)}")
 
 
-async def ask_chatgpt(prompt: str) -> str:
+@timed("read_response")
+async def read_response(window: int = 1) -> Tuple[Optional[ProbeResult], str]:
+    """Read the button state and the response text in a single probe.
+    
+    Falls back to the full extraction when the probe returns no text.
+    
+    Args:
+        window: Index of the ChatGPT window to read
+    
+    Returns:
+        The probe result (None if the probe failed) and the response text
+    """
+    probe = await probe_status(window, MODE_TEXT)
+    if probe is not None and probe.texts:
+        response = process_response_texts(probe.texts, sent_prompt(window))
+        if response != NO_RESPONSE:
+            return probe, response
+    return probe, await get_chatgpt_response(window)
+
+
+async def next_fingerprint(window: int) -> Tuple[Optional[str], Optional[Tuple[int, int, int]]]:
+    """Button state and latest-message fingerprint of the window's next observer sample.
+    
+    The observer reads both in one probe once the conversation area is known;
+    until then it reads only the button and the fingerprint is probed here.
+    
+    Returns:
+        The state and the fingerprint, either None if they could not be read
+    """
+    observer = get_observer(window)
+    try:
+        await observer.next_sample(timeout=STUCK_CHECK_INTERVAL)
+    except asyncio.TimeoutError:
+        return None, None
+    if observer.fingerprint is not None:
+        return observer.state, observer.fingerprint
+    probe = await probe_status(window)
+    return (probe.state, probe.fingerprint) if probe is not None else (None, None)
+
+
+@timed("wait_for_render")
+async def wait_for_render(window: int, budget: LatencyBudget,
+                          seen: Optional[Tuple[int, int, int]] = None) -> Optional[Tuple[int, int, int]]:
+    """Wait until the latest message stops changing.
+    
+    Replaces a fixed "let it render" sleep: returns once two observer samples
+    in a row see the same message fingerprint with the button out of 'stop',
+    or when the request's render budget runs out.
+    
+    Args:
+        window: Index of the ChatGPT window to read
+        budget: The request's latency budget
+        seen: Fingerprint read by the caller when it saw the answer complete;
+            it counts as the first of the two samples
+    
+    Returns:
+        The settled fingerprint, or None if the text did not settle in time
+    """
+    previous = seen
+    
+    async def settled():
+        nonlocal previous
+        state, fingerprint = await next_fingerprint(window)
+        if not fingerprint:
+            return None
+        if fingerprint == previous and state != 'stop':
+            return fingerprint
+        previous = fingerprint
+        return None
+    
+    return await budget.wait("render", settled)
+
+
+@timed("prepare_chatgpt")
+async def prepare_chatgpt(window: int = 1):
+    """Make sure the action button of a window is visible, activating ChatGPT again if not.
+    
+    Args:
+        window: Index of the ChatGPT window to use
+    
+    Raises:
+        Exception: if the action button cannot be found
+    """
+    session = get_session()
+    
+    # Check initial button state
+    initial_button = await session.button_helper.find_action_button(window)
+    if not initial_button:
+        # Try activating ChatGPT again; this waits until it is frontmost
+        await session.activate()
+        initial_button = await session.button_helper.find_action_button(window)
+        if not initial_button:
+            raise Exception("Cannot find ChatGPT action button. Make sure ChatGPT is open and visible.")
+
+
+def record_exchange(prompt: str, response: str, asked_at: float, window: int = 1):
+    """Queue an answered prompt for the transcript store (written in the background)"""
+    get_store().record(prompt, response, asked_at, conversation=get_conversation(window).conversation_id,
+                       window=window)
+
+
+def answer_to(turns: List[Turn], prompt: PromptFingerprint, after: int = 0) -> Optional[str]:
+    """The answer to a prompt in a conversation model's turns.
+    
+    Args:
+        turns: The conversation's turns
+        prompt: The prompt; its turn is the first user turn holding its lines
+            after turn ``after``, or the last one if there is none (e.g. the
+            conversation was replaced)
+        after: Number of turns the conversation had before the prompt was sent
+    
+    Returns:
+        The text of the turns between the prompt and the next user turn, or
+        None if the prompt or its answer is not there yet
+    """
+    matches = [turn.index for turn in turns if turn.role == USER and turn.lines == prompt.lines]
+    if not matches:
+        return None
+    start = next((index for index in matches if index > after), matches[-1])
+    texts = [turns[start - 1].text]
+    for turn in turns[start:]:
+        if turn.role == USER:
+            break
+        texts.append(turn.text)
+    response = process_response_texts(texts, prompt)
+    return response if len(texts) > 1 and response != NO_RESPONSE else None
+
+
+@timed("read_answer_turn")
+async def read_answer_turn(window: int, prompt: str, after: int = 0) -> str:
+    """Read the answer to a prompt from the conversation model once it stops changing.
+    
+    Unlike read_response, this does not need the answer to be the latest
+    message, so a batch can read it while its next prompt is already sent.
+    
+    Args:
+        window: Index of the ChatGPT window
+        prompt: The prompt as it was sent
+        after: Number of turns the conversation had before the prompt was sent
+    
+    Returns:
+        The answer
+    """
+    fingerprint = PromptFingerprint(prompt)
+    conversation = get_conversation(window)
+    previous = None
+    
+    async def settled():
+        nonlocal previous
+        turns = await conversation.refresh()
+        response = answer_to(turns or [], fingerprint, after)
+        if response is not None and response == previous:
+            return response
+        previous = response
+        return None
+    
+    response = await LatencyBudget().wait("render", settled, get_observer(window).interval)
+    response = response or previous
+    if not response:
+        raise Exception("Failed to retrieve response from ChatGPT")
+    return response
+
+
+@timed("ask_chatgpt")
+async def ask_chatgpt(prompt: str, on_delta: Optional[DeltaCallback] = None, window: int = 1,
+                      prepared: bool = False, read: bool = True) -> Optional[str]:
     """Send a prompt to ChatGPT and wait for the complete response.
     
     This function handles the entire interaction cycle:
@@ -260,169 +486,380 @@ async def ask_chatgpt(prompt: str) -> str:
     
     Args:
         prompt: The text to send to ChatGPT
+        on_delta: Called with each piece of text appended to the response
+            while it is being generated (see response_stream)
+        window: Index of the ChatGPT window to use
+        prepared: The caller already made the session ready and ran
+            prepare_chatgpt for this window (e.g. earlier in a batch)
+        read: Read the answer. If False, return None as soon as the answer is
+            complete and leave reading it to the caller (see read_answer_turn);
+            an answer read anyway on the way is still returned
     
     Returns:
         ChatGPT's complete response
     """
-    await check_chatgpt_access()
+    asked_at = time.time()
+    session = get_session()
+    budget = LatencyBudget()
+    
+    def answered(response: str) -> str:
+        # However the answer was detected, the next exchange starts after the
+        # messages read so far, and the answer is stored
+        get_scope(window).advance()
+        record_exchange(prompt, response, asked_at, window)
+        return response
     
-    button_helper = ChatGPTButtonHelper()
+    if not prepared:
+        with span("ask_chatgpt.ensure_ready"):
+            await session.ensure_ready(budget)
     
     try:
         # Since we're using clipboard paste, we can keep newlines
         # Just escape any quotes to prevent issues
         cleaned_prompt = prompt.replace('"', "'").strip()
         
-        # Activate ChatGPT and send message
-        chatgpt_automation = ChatGPTAutomation()
-        chatgpt_automation.activate_chatgpt()
+        # Activate ChatGPT if needed and send message
+        chatgpt_automation = session.automation
+        if not prepared:
+            with span("ask_chatgpt.prepare"):
+                await prepare_chatgpt(window)
         
-        # Check initial button state
-        initial_button = button_helper.find_action_button()
-        if not initial_button:
-            # Try activating ChatGPT again
-            chatgpt_automation.activate_chatgpt()
-            await asyncio.sleep(1)
-            initial_button = button_helper.find_action_button()
-            if not initial_button:
-                raise Exception("Cannot find ChatGPT action button. Make sure ChatGPT is open and visible.")
-        
-        # Send the message
-        chatgpt_automation.send_message_with_keystroke(cleaned_prompt)
+        # Send the message; the paste script waits for the input field.
+        # The prompt is fingerprinted first so the answer can be located after it.
+        remember_prompt(window, cleaned_prompt)
+        loop = asyncio.get_running_loop()
+        paste_started = loop.time()
+        pasted = await chatgpt_automation.send_message_with_keystroke(cleaned_prompt, window, budget.remaining("paste"))
+        budget.charge("paste", loop.time() - paste_started, timed_out=not pasted)
+        observe("ask_chatgpt.paste", loop.time() - paste_started)
+        if not pasted:
+            raise Exception(PASTE_ERROR)
         
-        # Wait for ChatGPT to start processing (button changes to 'stop')
+        # Wait for ChatGPT to start processing (button changes to 'stop').
+        # All waits below share the window's observer instead of probing again.
+        observer = get_observer(window)
         started_processing = False
+        answered_quickly = False
         button_states_seen = []
+        checked_fingerprint = None
         
-        for i in range(20):  # Wait up to 10 seconds
-            button_info = button_helper.find_action_button()
-            current_state = button_info.get('state') if button_info else None
-            button_states_seen.append(current_state)
-            
-            if button_helper.is_processing():
-                started_processing = True
-                break
-            
-            # Check if response might already be complete (very quick responses)
-            if current_state in ['submit', 'waveform', 'voice'] and i > 2:
-                # Give it a moment to ensure any response is rendered
-                await asyncio.sleep(1)
-                response = await get_chatgpt_response()
-                if response and response != "No response received from ChatGPT." and len(response) > 1:
-                    return response
-            
-            await asyncio.sleep(0.5)
+        start_waiting = loop.time()
+        start_deadline = start_waiting + budget.remaining("start")
+        
+        try:
+            while loop.time() < start_deadline:
+                try:
+                    button_info = await observer.next_sample(timeout=start_deadline - loop.time())
+                except asyncio.TimeoutError:
+                    break
+                current_state = button_info.state if button_info else None
+                button_states_seen.append(current_state)
+                
+                if current_state == 'stop':
+                    started_processing = True
+                    break
+                
+                # A very quick answer may finish between two samples. Whenever
+                # the latest message changes, look for text after the prompt
+                if current_state in ['submit', 'waveform', 'voice']:
+                    fingerprint = observer.fingerprint
+                    if fingerprint is None:
+                        probe = await probe_status(window)
+                        fingerprint = probe.fingerprint if probe else None
+                    if fingerprint is not None and fingerprint == checked_fingerprint:
+                        continue
+                    checked_fingerprint = fingerprint
+                    probe = await probe_status(window, MODE_TEXT)
+                    if probe is not None and probe.state == 'stop':
+                        started_processing = True
+                        break
+                    if probe is None or not located_response(probe.texts, sent_prompt(window)):
+                        continue
+                    if not read:
+                        # The caller reads the answer once it stops changing
+                        answered_quickly = True
+                        get_scope(window).advance()
+                        return None
+                    # Make sure the response has finished rendering. If it had
+                    # already, the texts just read are the answer
+                    if await wait_for_render(window, budget, probe.fingerprint) == probe.fingerprint:
+                        response = process_response_texts(probe.texts, sent_prompt(window))
+                    else:
+                        probe, response = await read_response(window)
+                    if response and response != NO_RESPONSE and len(response) > 1:
+                        answered_quickly = True
+                        return answered(response)
+        finally:
+            budget.charge("start", loop.time() - start_waiting,
+                          timed_out=not (started_processing or answered_quickly))
+            observe("ask_chatgpt.wait_start", loop.time() - start_waiting)
         
         if not started_processing:
             # Log what states we saw for debugging
-            import logging
-            logger = logging.getLogger(__name__)
             logger.debug(f"Button states seen while waiting: {button_states_seen}")
             
             # Try one more time to get response in case it completed very quickly
-            await asyncio.sleep(1)
-            response = await get_chatgpt_response()
-            if response and response != "No response received from ChatGPT." and len(response) > 1:
-                return response
+            await wait_for_render(window, budget)
+            probe, response = await read_response(window)
+            if response and response != NO_RESPONSE and len(response) > 1:
+                return answered(response)
             
             # If still no response, raise error with more context
-            button_state = button_helper.find_action_button()
-            current_state = button_state.get('state') if button_state else 'not found'
+            current_state = (probe.state if probe else None) or 'not found'
             raise Exception(f"ChatGPT did not start processing the message. Current button state: {current_state}. States seen: {button_states_seen}")
         
         # Wait for processing to complete
-        import time
-        start_time = time.time()
+        start_time = loop.time()
         initial_timeout = 15  # 15 seconds initial timeout
         max_wait = 300  # 5 minutes max for longer responses
+        stream = ResponseStream(cleaned_prompt, on_delta) if on_delta else None
         
-        # Response completion will be checked via the AppleScript JSON response
-        has_copy_extractor = False
+        def finished(info):
+            # If button is no longer in 'stop' state, processing is complete
+            return bool(info) and info.state != 'stop'
+        
+        async def wait_until_finished(timeout):
+            # Wait for the button to leave 'stop', streaming partial text meanwhile
+            if stream is None:
+                await observer.wait_for(finished, timeout=timeout)
+                return
+            deadline = loop.time() + timeout
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                try:
+                    await observer.wait_for(finished, timeout=min(STREAM_INTERVAL, remaining))
+                    return
+                except asyncio.TimeoutError:
+                    pass
+                probe = await probe_status(window, MODE_TEXT)
+                if probe is not None and probe.texts:
+                    await stream.update(filter_response_lines(probe.texts))
         
         # First, wait with the shorter timeout
-        while time.time() - start_time < initial_timeout:
-            button_info = button_helper.find_action_button()
-            button_state = button_info.get('state') if button_info else None
-            
-            # If button is no longer in 'stop' state, processing is complete
-            if button_state and button_state != 'stop':
-                # Wait a bit more to ensure text is fully rendered
-                await asyncio.sleep(1)
-                break
-            
-            await asyncio.sleep(0.2)  # Check more frequently
+        try:
+            await wait_until_finished(initial_timeout)
+            # Make sure the text is fully rendered; the sample that saw the
+            # button come back counts as the first look at the text
+            if read:
+                await wait_for_render(window, budget, observer.fingerprint)
+        except asyncio.TimeoutError:
+            pass
         
-        # If still processing after initial timeout, continue waiting but check for response
-        if button_helper.is_processing():
-            # Try to get response anyway - ChatGPT might have responded but button is stuck
-            try:
-                response = await get_chatgpt_response()
-                if response and response != "No response received from ChatGPT." and len(response) > 10:
-                    return response
-            except:
-                pass
-            
-            # Continue waiting for button state change
-            while time.time() - start_time < max_wait:
-                button_info = button_helper.find_action_button()
-                button_state = button_info.get('state') if button_info else None
-                
-                if button_state and button_state != 'stop':
-                    await asyncio.sleep(1)
+        # If still processing after initial timeout, keep waiting for the button,
+        # but treat a latest message that stops changing as finished in case
+        # the button is stuck in 'stop'
+        if observer.state == 'stop':
+            last_fingerprint = None
+            stable_since = loop.time()
+            while loop.time() - start_time < max_wait:
+                try:
+                    await wait_until_finished(STUCK_CHECK_INTERVAL)
+                    if read:
+                        await wait_for_render(window, budget, observer.fingerprint)
                     break
+                except asyncio.TimeoutError:
+                    pass
                 
-                await asyncio.sleep(0.5)
+                state, fingerprint = await next_fingerprint(window)
+                if not fingerprint:
+                    continue
+                if state and state != 'stop':
+                    break
+                if fingerprint != last_fingerprint:
+                    last_fingerprint = fingerprint
+                    stable_since = loop.time()
+                elif loop.time() - stable_since >= STUCK_STABLE_SECONDS:
+                    logger.debug("Response unchanged while button shows 'stop'; assuming it is complete")
+                    break
+        
+        observe("ask_chatgpt.generate", loop.time() - start_time)
+        
+        if not read:
+            # The next exchange starts after the answer; the caller reads it
+            get_scope(window).advance()
+            return None
         
         # Get the complete response
-        response = await get_chatgpt_response()
+        with span("ask_chatgpt.extract"):
+            probe, response = await read_response(window)
         
-        if not response or response == "No response received from ChatGPT.":
+        if not response or response == NO_RESPONSE:
             raise Exception("Failed to retrieve response from ChatGPT")
         
-        return response
+        if stream is not None and probe is not None and probe.texts:
+            # Deliver whatever was appended since the last poll
+            await stream.update(filter_response_lines(probe.texts))
+        
+        return answered(response)
         
     except Exception as e:
         raise Exception(f"Failed to interact with ChatGPT: {str(e)}")
 
 
-async def ask_chatgpt_simple(prompt: str) -> str:
+@timed("ask_chatgpt_batch")
+async def ask_chatgpt_batch(prompts: List[str], window: int = 1, deadline: Optional[float] = None,
+                            partial: bool = True) -> List[Dict[str, str]]:
+    """Send several prompts to one window, one after another.
+    
+    Access is checked and the window prepared once for the whole batch. The
+    next prompt is sent as soon as an answer is complete; the answer is read
+    from the conversation model in the background meanwhile (see
+    read_answer_turn), so reading it overlaps with sending the next prompt.
+    
+    Args:
+        prompts: The prompts, in the order they are sent
+        window: Index of the ChatGPT window to use
+        deadline: Event loop time by which the batch must finish; prompts not
+            answered by then are reported as failed
+        partial: Return the answers collected so far with an error entry for
+            each failed prompt, instead of raising on the first failure
+    
+    Returns:
+        One entry per prompt with the prompt and either its "response" or an
+        "error"
+    """
+    loop = asyncio.get_running_loop()
+    results = []
+    readers: Dict[int, asyncio.Task] = {}
+    prepared = False
+    
+    def remaining_time() -> Optional[float]:
+        return deadline - loop.time() if deadline is not None else None
+    
+    def failed(index: int, entry: Dict[str, str]):
+        if not partial:
+            raise Exception(f"Prompt {index + 1} of {len(prompts)} failed: {entry['error']}")
+        logger.debug(f"Batch prompt {index + 1} of {len(prompts)} failed: {entry['error']}")
+    
+    async def read_answer(prompt: str, after: int, asked_at: float) -> str:
+        # Sent as ask_chatgpt sends it
+        response = await read_answer_turn(window, prompt.replace('"', "'").strip(), after)
+        record_exchange(prompt, response, asked_at, window)
+        return response
+    
+    try:
+        for index, prompt in enumerate(prompts):
+            entry = {"prompt": prompt}
+            remaining = remaining_time()
+            try:
+                if remaining is not None and remaining <= 0:
+                    raise asyncio.TimeoutError()
+                if not prepared:
+                    with span("ask_chatgpt_batch.ensure_ready"):
+                        await asyncio.wait_for(get_session().ensure_ready(), remaining)
+                    await asyncio.wait_for(prepare_chatgpt(window), remaining)
+                    prepared = True
+                    remaining = remaining_time()
+                after, asked_at = get_scope(window).message_count or 0, time.time()
+                response = await asyncio.wait_for(
+                    ask_chatgpt(prompt, window=window, prepared=True, read=False), remaining)
+                if response is not None:
+                    entry["response"] = response
+                else:
+                    readers[index] = asyncio.create_task(read_answer(prompt, after, asked_at))
+            except asyncio.TimeoutError:
+                entry["error"] = BATCH_DEADLINE_ERROR
+                if remaining is None or remaining > 0:
+                    # The prompt may still be generating; free the window for the next prompt or request
+                    await abort_generation(window)
+            except Exception as e:
+                if deadline is not None and loop.time() >= deadline:
+                    # A script call was cut short by the same deadline
+                    entry["error"] = BATCH_DEADLINE_ERROR
+                    await abort_generation(window)
+                else:
+                    entry["error"] = str(e)
+                # Look at the window again before the next prompt
+                prepared = False
+            
+            if "error" in entry:
+                failed(index, entry)
+            results.append(entry)
+        
+        for index, reader in readers.items():
+            entry = results[index]
+            remaining = remaining_time()
+            try:
+                entry["response"] = await asyncio.wait_for(reader, max(remaining, 0) if remaining is not None else None)
+            except asyncio.TimeoutError:
+                entry["error"] = BATCH_DEADLINE_ERROR
+            except Exception as e:
+                if deadline is not None and loop.time() >= deadline:
+                    # The reader's script calls were cut short by the same deadline
+                    entry["error"] = BATCH_DEADLINE_ERROR
+                else:
+                    entry["error"] = str(e)
+            if "error" in entry:
+                failed(index, entry)
+    finally:
+        for reader in readers.values():
+            reader.cancel()
+    
+    return results
+
+
+@timed("ask_chatgpt_simple")
+async def ask_chatgpt_simple(prompt: str, window: int = 1) -> str:
     """Simpler version of ask_chatgpt that doesn't rely on button detection.
     
     This is a fallback for when button detection fails.
     
     Args:
         prompt: The text to send to ChatGPT
+        window: Index of the ChatGPT window to use
     
     Returns:
         ChatGPT's response
     """
-    await check_chatgpt_access()
+    asked_at = time.time()
+    session = get_session()
+    budget = LatencyBudget()
+    with span("ask_chatgpt_simple.ensure_ready"):
+        await session.ensure_ready(budget)
     
     try:
         # Clean prompt
         cleaned_prompt = prompt.replace('"', "'").strip()
         
-        # Activate ChatGPT and send message
-        chatgpt_automation = ChatGPTAutomation()
-        chatgpt_automation.activate_chatgpt()
+        # The answer already on screen, so it is not mistaken for the new one
+        _, previous = await read_response(window)
         
         # Send the message
-        chatgpt_automation.send_message_with_keystroke(cleaned_prompt)
+        remember_prompt(window, cleaned_prompt)
+        with span("ask_chatgpt_simple.paste"):
+            pasted = await session.automation.send_message_with_keystroke(
+                cleaned_prompt, window, budget.remaining("paste"))
+        if not pasted:
+            raise Exception(PASTE_ERROR)
         
-        # Wait a fixed amount of time for response
-        # This is less sophisticated but more reliable
-        await asyncio.sleep(5)  # Initial wait for ChatGPT to start
+        # Poll the text until a new answer appears and stops changing. This
+        # does not rely on the button, only on the response text.
+        last = None
         
-        # Try to get response periodically
-        for i in range(6):  # Try for up to 30 seconds
-            response = await get_chatgpt_response()
-            if response and response != "No response received from ChatGPT." and len(response) > 1:
+        async def answered():
+            nonlocal last
+            probe, response = await read_response(window)
+            if not response or response == NO_RESPONSE or len(response) <= 1 or response == previous:
+                return None
+            if probe is not None and probe.state == 'stop':
+                last = None
+                return None
+            if response == last:
                 return response
-            await asyncio.sleep(5)
+            last = response
+            return None
         
-        # Final attempt
-        response = await get_chatgpt_response()
-        if response and response != "No response received from ChatGPT.":
+        with span("ask_chatgpt_simple.wait_response"):
+            response = await budget.wait("response", answered, interval=RESPONSE_POLL_INTERVAL)
+        if not response:
+            # Final attempt
+            _, response = await read_response(window)
+        if response and response != NO_RESPONSE:
+            # The next exchange starts after the messages read so far
+            get_scope(window).advance()
+            record_exchange(prompt, response, asked_at, window)
             return response
         
         return "Failed to get response from ChatGPT. Please check if ChatGPT is responding."
@@ -431,31 +868,43 @@ async def ask_chatgpt_simple(prompt: str) -> str:
         raise Exception(f"Failed to interact with ChatGPT: {str(e)}")
 
 
-async def new_chat() -> str:
+@timed("new_chat")
+async def new_chat(window: int = 1) -> str:
     """Start a new chat conversation in ChatGPT.
     
+    Args:
+        window: Index of the ChatGPT window
+    
     Returns:
         Success message or error description
     """
-    await check_chatgpt_access()
+    session = get_session()
+    budget = LatencyBudget()
+    await session.ensure_ready(budget)
     
     try:
-        # Create automation instance and start new chat
-        chatgpt_automation = ChatGPTAutomation()
-        chatgpt_automation.activate_chatgpt()
+        # Start new chat with the session's automation helpers
+        chatgpt_automation = session.automation
         
         # Start new chat
-        success = chatgpt_automation.start_new_chat()
+        with span("new_chat.click"):
+            success = await chatgpt_automation.start_new_chat(window)
         
         if success:
-            # Wait a moment for the UI to update
-            await asyncio.sleep(1)
+            get_scope(window).reset()
+            get_conversation(window).reset()
+            forget_prompt(window)
+            get_router().cleared(window)
             
-            # Verify we're in a new chat by checking button state
-            button_helper = ChatGPTButtonHelper()
-            button_info = button_helper.find_action_button()
+            # Wait until the button shows the empty conversation's state
+            async def ready():
+                info = await session.button_helper.find_action_button(window)
+                return info if info and info.state in ['voice', 'waveform'] else None
             
-            if button_info and button_info.get('state') in ['voice', 'waveform']:
+            with span("new_chat.wait_ready"):
+                button_info = await budget.wait("new_chat", ready)
+            
+            if button_info:
                 return "Successfully started a new chat conversation"
             else:
                 return "New chat started, but state verification unclear"
@@ -466,11 +915,154 @@ async def new_chat() -> str:
         raise Exception(f"Failed to start new chat: {str(e)}")
 
 
+@asynccontextmanager
+async def conversation_lease(conversation: Optional[str] = None):
+    """Lease the window a named conversation lives in (any window if it has none yet).
+    
+    Prompts to the same conversation are sent one at a time.
+    """
+    if conversation is None:
+        async with get_pool().lease() as window:
+            yield window
+        return
+    router = get_router()
+    async with router.lock(conversation):
+        async with get_pool().lease(router.window_for(conversation)) as window:
+            yield window
+
+
+@timed("route_conversation")
+async def route_conversation(conversation: Optional[str], window: int = 1):
+    """Show a named conversation in a window before a prompt is sent to it.
+    
+    The first prompt with a key starts a new chat; later ones select the
+    conversation in the sidebar unless the window already shows it. A prompt
+    without a key gets a new chat if the window shows a named conversation,
+    so it does not end up in that thread.
+    
+    Args:
+        conversation: Key of the conversation, or None
+        window: Index of the ChatGPT window
+    
+    Raises:
+        Exception: if the conversation is no longer in the sidebar, or its
+            row could not be read back after its last answer
+    """
+    router = get_router()
+    if router.showing(window) == conversation:
+        if conversation is not None:
+            increment("conversation.stayed")
+            router.stats["stayed"] += 1
+        return
+    if conversation is not None and router.lost(conversation):
+        router.forget(conversation)
+        router.stats["lost"] += 1
+        raise Exception(f"Conversation '{conversation}' could not be found in the ChatGPT sidebar "
+                        f"after its last answer; the next prompt with this key starts it again")
+    if conversation is None or not router.known(conversation):
+        await new_chat(window)
+        if conversation is not None:
+            router.started(conversation, window)
+            get_conversation(window).reset(conversation)
+        return
+    
+    session = get_session()
+    budget = LatencyBudget()
+    await session.ensure_ready(budget)
+    with span("conversation.switch"):
+        opened = await router.open(conversation, window)
+    if not opened:
+        router.forget(conversation)
+        raise Exception(f"Conversation '{conversation}' is no longer in the ChatGPT sidebar; "
+                        f"the next prompt with this key starts it again")
+    get_scope(window).reset()
+    model = get_conversation(window)
+    model.reset(conversation)
+    forget_prompt(window)
+    
+    # Wait until the conversation's turns are shown
+    expected = router.entries[conversation].turns
+    
+    async def loaded():
+        turns = await model.refresh()
+        return turns is not None and len(turns) >= expected
+    
+    with span("conversation.wait_loaded"):
+        await budget.wait("switch", loaded)
+
+
+async def remember_conversation(conversation: Optional[str], window: int = 1):
+    """Record where a named conversation is in the sidebar after an exchange"""
+    if conversation is None:
+        return
+    turns = await get_conversation(window).refresh()
+    await get_router().remember(conversation, window, len(turns) if turns is not None else 0)
+
+
+async def _run_to_end(coro):
+    """Await a coroutine to the end, even if the caller is cancelled meanwhile"""
+    task = asyncio.ensure_future(coro)
+    while not task.done():
+        try:
+            await asyncio.shield(task)
+        except asyncio.CancelledError:
+            pass
+    return task.result()
+
+
+async def abort_generation(window: int = 1) -> bool:
+    """Stop what a window is still generating for an abandoned request.
+    
+    Runs under a short deadline of its own, since the request's has usually
+    passed already.
+    
+    Args:
+        window: Index of the ChatGPT window
+    
+    Returns:
+        True if a generation was stopped
+    """
+    with deadline_scope(time.monotonic() + STOP_TIMEOUT):
+        try:
+            stopped = await get_session().automation.stop_generation(window)
+        except Exception as e:
+            logger.warning(f"Could not stop the generation in window {window}: {e}")
+            return False
+    increment("abort.stopped" if stopped else "abort.idle")
+    if stopped:
+        logger.info(f"Stopped the generation of an abandoned request in window {window}")
+    return stopped
+
+
+@asynccontextmanager
+async def stop_on_abort(window: int = 1):
+    """Stop the window's generation if the block is cancelled or runs out of time.
+    
+    The generation is stopped before the block is left, so the window is idle
+    by the time it goes to the next request. An error raised after the
+    request's deadline passed is re-raised as ``asyncio.TimeoutError``.
+    """
+    try:
+        yield
+    except asyncio.CancelledError:
+        increment("abort.cancelled")
+        await _run_to_end(abort_generation(window))
+        raise
+    except Exception as e:
+        if not expired():
+            raise
+        increment("abort.deadline")
+        await _run_to_end(abort_generation(window))
+        raise asyncio.TimeoutError() from e
+
+
 def setup_mcp_tools(mcp: FastMCP):
     """Setup MCP tools"""
     
     @mcp.tool()
-    async def ask_chatgpt_tool(prompt: str) -> str:
+    async def ask_chatgpt_tool(prompt: str, stream: bool = False, priority: int = 0,
+                               timeout: Optional[float] = None, cache: bool = False,
+                               conversation: Optional[str] = None, ctx: Context = None) -> str:
         """Send a prompt to ChatGPT and return the complete response.
         
         This tool handles the entire interaction cycle:
@@ -478,19 +1070,104 @@ def setup_mcp_tools(mcp: FastMCP):
         2. Waits for processing to complete
         3. Returns the complete response
         
+        Requests are queued and each runs in its own ChatGPT window (one
+        at a time unless several windows are configured). If the queue is
+        full the call fails with a "busy, retry after N s" message.
+        
         Args:
             prompt: The text to send to ChatGPT
+            stream: Send text as it is generated, as progress notifications
+                (if the request has a progress token) or info log messages
+            priority: Queued requests with a higher priority are sent first
+            timeout: Seconds after which the request is abandoned, including
+                the time spent waiting in the queue (default: the
+                CHATGPT_MCP_REQUEST_TIMEOUT setting). An abandoned request's
+                generation is stopped in the app.
+            cache: Return a recent response to the same prompt if there is
+                one, and share the answer with identical prompts in flight
+                (ignored with a conversation, whose answers depend on the thread)
+            conversation: Key of a named conversation to send the prompt to.
+                The first prompt with a key starts a new chat; later ones go
+                to the same ChatGPT conversation, so earlier context does not
+                have to be sent again. Prompts without a key never go to a
+                named conversation.
             
         Returns:
             ChatGPT's complete response text
         """
+        on_delta = context_emitter(ctx) if stream and ctx is not None else None
+        timeout = request_timeout(timeout)
+        
+        async def answer(window):
+            try:
+                return await ask_chatgpt(prompt, on_delta, window)
+            except Exception as e:
+                if expired():
+                    raise
+                # If button detection fails, try a simpler approach
+                if "button" in str(e).lower() or "processing" in str(e).lower():
+                    increment("fallback.simple")
+                    return await ask_chatgpt_simple(prompt, window)
+                raise
+        
+        async def run():
+            async with conversation_lease(conversation) as window, stop_on_abort(window):
+                await route_conversation(conversation, window)
+                response = await answer(window)
+                await remember_conversation(conversation, window)
+                return response
+        
+        async def scheduled():
+            try:
+                return await get_scheduler().submit(run, priority, timeout, name="ask_chatgpt")
+            except asyncio.TimeoutError:
+                raise Exception(f"ChatGPT request did not complete within {timeout} seconds")
+        
+        if cache and conversation is None:
+            return await get_cache().get(prompt, scheduled)
+        return await scheduled()
+    
+    @mcp.tool(name="ask_chatgpt_batch")
+    async def ask_chatgpt_batch_tool(prompts: List[str], partial: bool = True, priority: int = 0,
+                                     timeout: Optional[float] = None) -> List[Dict[str, str]]:
+        """Send a list of prompts to ChatGPT and return the list of answers.
+        
+        The prompts are sent one after another in the same conversation,
+        each as soon as the previous answer is complete. Setup (checking
+        the app, bringing it forward, finding its controls) happens once
+        per batch rather than once per prompt.
+        
+        Args:
+            prompts: The texts to send to ChatGPT, in order
+            partial: On failure, return the answers collected so far with an
+                error for each failed prompt; otherwise fail the whole call
+            priority: Queued requests with a higher priority are sent first
+            timeout: Seconds for the whole batch, including the time spent
+                waiting in the queue (default: the CHATGPT_MCP_REQUEST_TIMEOUT
+                setting); prompts not answered in time are reported as failed
+            
+        Returns:
+            One entry per prompt with "prompt" and either "response" or "error"
+        """
+        timeout = request_timeout(timeout)
+        
+        async def run():
+            async with get_pool().lease() as window, stop_on_abort(window):
+                # The batch reports prompts left at the deadline as failed
+                # itself, so it runs to its deadline before the scheduler's
+                deadline = current_deadline()
+                if deadline is not None:
+                    deadline += asyncio.get_running_loop().time() - time.monotonic()
+                if not expired():
+                    await route_conversation(None, window)
+                return await ask_chatgpt_batch(prompts, window, deadline, partial)
+        
         try:
-            return await ask_chatgpt(prompt)
-        except Exception as e:
-            # If button detection fails, try a simpler approach
-            if "button" in str(e).lower() or "processing" in str(e).lower():
-                return await ask_chatgpt_simple(prompt)
-            raise
+            # Time to stop an unfinished generation and return the answers so far
+            return await get_scheduler().submit(run, priority, timeout, name="ask_chatgpt_batch",
+                                                grace=STOP_TIMEOUT + 1)
+        except asyncio.TimeoutError:
+            raise Exception(f"ChatGPT batch did not complete within {timeout} seconds")
     
     @mcp.tool()
     async def new_chat_tool() -> str:
@@ -502,4 +1179,109 @@ def setup_mcp_tools(mcp: FastMCP):
         Returns:
             Success message indicating the new chat has been started
         """
-        return await new_chat()
+        async def run():
+            # Every window in the pool starts over
+            results = []
+            for window in get_pool().windows:
+                async with get_pool().lease(window):
+                    results.append(await new_chat(window))
+            return results[0] if len(results) == 1 else "\n".join(
+                f"Window {window}: {result}" for window, result in zip(get_pool().windows, results))
+        
+        return await get_scheduler().submit(run, name="new_chat")
+    
+    @mcp.tool()
+    async def get_turn_tool(index: int = -1, window: int = 1) -> Dict[str, object]:
+        """Return one turn of the conversation shown in ChatGPT.
+        
+        Turns are the messages of the conversation in order, alternating
+        between the user's prompts and ChatGPT's answers. Only the turns
+        that changed since the last read are read from the app again. A
+        prompt in flight in the window is answered first.
+        
+        Args:
+            index: 1-based turn number; negative numbers count from the end
+                (-1, the default, is the latest turn)
+            window: Index of the ChatGPT window to read
+            
+        Returns:
+            The turn's "role" ("user" or "assistant"), "index", "text" and
+            "hash" (CRC-32 of the text)
+        """
+        async def run():
+            # The window's conversation model is shared with a prompt in flight there
+            async with get_pool().lease(window):
+                conversation = get_conversation(window)
+                if await conversation.refresh() is None:
+                    raise Exception("Could not read the conversation from ChatGPT")
+                turn = conversation.turn(index)
+                if turn is None:
+                    raise Exception(f"No turn {index}: the conversation has {conversation.message_count} turns")
+                return turn.to_dict()
+        
+        return await get_scheduler().submit(run, name="get_turn")
+    
+    @mcp.tool(name="search_history")
+    async def search_history_tool(query: str, limit: int = 10) -> List[Dict[str, object]]:
+        """Search every answer ChatGPT has given through this server.
+        
+        Past prompts and responses are stored locally and searched without
+        asking ChatGPT again, so check here before re-asking a question.
+        
+        Args:
+            query: Words to look for; an exchange matches if its prompt or
+                response contains all of them
+            limit: Maximum number of results
+            
+        Returns:
+            Matching exchanges, best match first, each with "prompt",
+            "response", "snippet" (the match in context), "asked_at" and
+            "answered_at" (Unix times), "latency" (seconds), "conversation"
+            and "window"
+        """
+        return await get_store().search(query, limit)
+    
+    @mcp.tool(name="get_last_response")
+    async def get_last_response_tool(prompt: Optional[str] = None) -> Dict[str, object]:
+        """Return the last answer ChatGPT gave, from the local history.
+        
+        The ChatGPT app is not touched.
+        
+        Args:
+            prompt: Return the last answer to this prompt instead (compared
+                after normalizing whitespace)
+            
+        Returns:
+            The exchange's "prompt", "response", "asked_at", "answered_at",
+            "latency", "conversation" and "window"
+        """
+        entry = await get_store().last_response(prompt)
+        if entry is None:
+            raise Exception("No matching response in the history" if prompt is not None
+                            else "No response in the history yet")
+        return entry
+    
+    @mcp.resource("chatgpt://scheduler/stats", mime_type="application/json")
+    def scheduler_stats() -> str:
+        """Request queue depth, counters and wait times (seconds), window states, named
+        conversations and app session"""
+        return json.dumps({**get_scheduler().snapshot(), "windows": get_pool().snapshot(),
+                           "conversations": get_router().snapshot(),
+                           "session": get_session().snapshot(), "phases": phase_stats()})
+    
+    @mcp.resource("chatgpt://cache/stats", mime_type="application/json")
+    def cache_stats() -> str:
+        """Response cache size and hit/miss/coalesce counters, and the transcript store's counters"""
+        return json.dumps({**get_cache().snapshot(), "history": get_store().snapshot()})
+    
+    @mcp.resource("chatgpt://metrics", mime_type="application/json")
+    def metrics() -> str:
+        """Latency histograms (seconds) for each phase, probe and extraction method, event
+        counters, and how often each extraction method has succeeded"""
+        from chatgpt_mcp.improved_extraction import method_stats
+        return json.dumps({**get_metrics().snapshot(), "extraction": method_stats()})
+    
+    @mcp.resource("chatgpt://metrics/prometheus", mime_type="text/plain")
+    def metrics_prometheus() -> str:
+        """The same metrics in Prometheus text format"""
+        return get_metrics().prometheus()
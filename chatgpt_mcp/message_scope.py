@@ -0,0 +1,208 @@
+"""
+Scoped reading of the latest messages in the conversation.
+
+Walking ``entire contents`` of the window visits the sidebar and the whole
+conversation history, so its cost grows with the length of the chat. The
+scripts here go to the conversation scroll area resolved by the UILocator,
+descend to the list of message containers and read static texts only from
+the containers at or after a start index:
+
+- with no watermark, the last two containers (the prompt and the answer);
+- with a watermark, every container added since the last finished exchange.
+
+The full-tree walk remains the fallback whenever the scroll area is not known
+or its path no longer resolves.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from chatgpt_mcp.script_registry import register
+from chatgpt_mcp.script_runner import run_script_async
+from chatgpt_mcp.ui_locator import CONVERSATION, ELEMENT_HANDLERS, get_locator
+from chatgpt_mcp.window_pool import window_read_lock
+
+logger = logging.getLogger(__name__)
+
+# AppleScript handlers shared with the status probe and the conversation
+# model. tailTexts returns {message count, first index read, texts}; all of
+# them fail if the path does not resolve.
+MESSAGE_HANDLERS = r'''
+on messageList(win, conversationPath)
+    set msgList to my resolvePath(win, conversationPath)
+    tell application "System Events"
+        -- Descend through single-child wrappers to the list of messages
+        repeat 8 times
+            set kids to UI elements of msgList
+            if (count of kids) is not 1 then exit repeat
+            set msgList to item 1 of kids
+        end repeat
+    end tell
+    return msgList
+end messageList
+
+on messageTexts(msg)
+    set msgTexts to {}
+    tell application "System Events"
+        set msgElements to {msg}
+        try
+            set msgElements to msgElements & (entire contents of msg)
+        end try
+        repeat with elem in msgElements
+            try
+                if role of elem is "AXStaticText" then
+                    set textContent to value of elem
+                    if textContent is missing value then set textContent to description of elem
+                    if textContent is not missing value then
+                        set textStr to textContent as text
+                        if length of textStr > 0 then set end of msgTexts to textStr
+                    end if
+                end if
+            end try
+        end repeat
+    end tell
+    return msgTexts
+end messageTexts
+
+on tailTexts(win, conversationPath, firstIndex)
+    set msgList to my messageList(win, conversationPath)
+    tell application "System Events" to set messages to UI elements of msgList
+    set messageCount to count of messages
+    if firstIndex < 1 or firstIndex > messageCount then set firstIndex to messageCount - 1
+    if firstIndex < 1 then set firstIndex to 1
+
+    set tailList to {}
+    repeat with i from firstIndex to messageCount
+        set tailList to tailList & my messageTexts(item i of messages)
+    end repeat
+    return {messageCount, firstIndex, tailList}
+end tailTexts
+'''
+
+# argv: window index, conversation path, first message index (0: last two)
+# Output: "messageCount firstIndex" on line 1, then the texts; "missing" if
+# the conversation could not be resolved.
+LATEST_MESSAGES_SCRIPT = register("extract_latest_messages", r'''
+on run argv
+    set windowIndex to (item 1 of argv) as integer
+    set conversationPath to item 2 of argv
+    set firstIndex to (item 3 of argv) as integer
+
+    tell application "System Events"
+        tell process "ChatGPT"
+            if not (exists window windowIndex) then return "missing"
+            set win to window windowIndex
+        end tell
+    end tell
+
+    try
+        set {messageCount, firstIndex, tailList} to my tailTexts(win, conversationPath, firstIndex)
+    on error
+        return "missing"
+    end try
+
+    set scopeOutput to (messageCount as text) & " " & (firstIndex as text)
+    if (count of tailList) > 0 then
+        set AppleScript's text item delimiters to linefeed
+        set scopeOutput to scopeOutput & linefeed & (tailList as text)
+        set AppleScript's text item delimiters to ""
+    end if
+    return scopeOutput
+end run
+''' + ELEMENT_HANDLERS + MESSAGE_HANDLERS)
+
+
+@dataclass
+class ScopedTexts:
+    """Texts read from the tail of the conversation"""
+    message_count: int
+    first_index: int
+    texts: List[str]
+
+
+class MessageScope:
+    """Tracks which messages of a window belong to the current exchange"""
+
+    def __init__(self, window: int = 1):
+        self.window = window
+        self.watermark = 0
+        self.message_count: Optional[int] = None
+
+    @property
+    def conversation_path(self) -> Optional[str]:
+        return get_locator(self.window).path(CONVERSATION)
+
+    def first_index(self) -> int:
+        """1-based index of the first message to read (0 for the last two)"""
+        return self.watermark + 1 if self.watermark else 0
+
+    def observe(self, message_count: int):
+        """Record the message count seen by a scoped read"""
+        if message_count < self.watermark:
+            # The conversation got shorter: another chat is shown
+            self.watermark = 0
+        self.message_count = message_count
+
+    def advance(self):
+        """Mark every message seen so far as part of finished exchanges"""
+        if self.message_count:
+            self.watermark = self.message_count
+
+    def reset(self):
+        """Forget the watermark, e.g. after switching conversations"""
+        self.watermark = 0
+        self.message_count = None
+
+    async def read(self) -> Optional[ScopedTexts]:
+        """Read the texts of the current exchange.
+
+        Returns:
+            ScopedTexts, or None if the conversation area is unknown or could
+            not be resolved and the caller should fall back to a full walk
+        """
+        path = self.conversation_path
+        if not path:
+            return None
+        try:
+            async with window_read_lock():
+                result = await run_script_async(
+                    LATEST_MESSAGES_SCRIPT, [str(self.window), path, str(self.first_index())])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.debug(f"Scoped read failed: {e}")
+            return None
+        if result.returncode != 0:
+            logger.debug(f"Scoped read failed: {result.stderr.strip()}")
+            return None
+
+        scoped = parse_scoped_output(result.stdout.rstrip('\n'))
+        if scoped is None:
+            # The path went stale; let the locator find the area again
+            get_locator(self.window).invalidate()
+            return None
+        self.observe(scoped.message_count)
+        return scoped
+
+
+def parse_scoped_output(output: str) -> Optional[ScopedTexts]:
+    """Parse the output of the latest-messages script"""
+    header, _, body = output.partition('\n')
+    try:
+        message_count, first_index = (int(v) for v in header.split())
+    except ValueError:
+        return None
+    return ScopedTexts(message_count, first_index, body.split('\n') if body else [])
+
+
+_scopes: Dict[int, MessageScope] = {}
+
+
+def get_scope(window: int = 1) -> MessageScope:
+    """Return the shared message scope for a ChatGPT window"""
+    scope = _scopes.get(window)
+    if scope is None:
+        scope = _scopes[window] = MessageScope(window)
+    return scope
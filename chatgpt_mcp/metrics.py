@@ -0,0 +1,208 @@
+"""
+Latency spans, histograms and counters.
+
+Each phase of a request runs inside a ``span`` (or a function decorated with
+``timed``), which records its duration in a histogram named after the phase.
+``increment`` counts events such as fallbacks. Recording costs two
+``perf_counter`` calls and a bisect, so the metrics are always on.
+
+They are served as the ``chatgpt://metrics`` resource (JSON) and
+``chatgpt://metrics/prometheus`` (Prometheus text format), and over HTTP at
+``/metrics`` when CHATGPT_MCP_METRICS_PORT is set.
+
+Configuration (environment variables):
+    CHATGPT_MCP_METRICS_PORT  port for the Prometheus endpoint on 127.0.0.1
+                              (unset: no endpoint)
+"""
+
+import asyncio
+import bisect
+import functools
+import logging
+import os
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds, seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+PROMETHEUS_PREFIX = "chatgpt_mcp"
+
+
+class Histogram:
+    """Cumulative-bucket histogram of durations"""
+
+    __slots__ = ("counts", "count", "sum", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "max": self.max,
+        }
+
+
+class Metrics:
+    """Named histograms and counters"""
+
+    def __init__(self):
+        self.histograms: Dict[str, Histogram] = {}
+        self.counters: Dict[str, int] = {}
+
+    def observe(self, name: str, seconds: float):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.observe(seconds)
+
+    def increment(self, name: str, amount: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def reset(self):
+        self.histograms.clear()
+        self.counters.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Summary of every span (count, sum, mean, p50/p95/p99, max) and counter"""
+        return {
+            "spans": {name: h.snapshot() for name, h in sorted(self.histograms.items())},
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+    def prometheus(self) -> str:
+        """Prometheus text exposition format"""
+        span_metric = f"{PROMETHEUS_PREFIX}_span_seconds"
+        event_metric = f"{PROMETHEUS_PREFIX}_events_total"
+        lines: List[str] = [
+            f"# HELP {span_metric} Time spent in each phase of a request",
+            f"# TYPE {span_metric} histogram",
+        ]
+        for name, histogram in sorted(self.histograms.items()):
+            cumulative = 0
+            for bound, count in zip(BUCKETS, histogram.counts):
+                cumulative += count
+                lines.append(f'{span_metric}_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{span_metric}_bucket{{span="{name}",le="+Inf"}} {histogram.count}')
+            lines.append(f'{span_metric}_sum{{span="{name}"}} {histogram.sum}')
+            lines.append(f'{span_metric}_count{{span="{name}"}} {histogram.count}')
+        lines.append(f"# HELP {event_metric} Events such as fallbacks and failures")
+        lines.append(f"# TYPE {event_metric} counter")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f'{event_metric}{{event="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+_metrics = Metrics()
+
+
+def get_metrics() -> Metrics:
+    """Return the process-wide metrics"""
+    return _metrics
+
+
+@contextmanager
+def span(name: str):
+    """Record the duration of the block under ``name``; failures also count ``<name>.errors``"""
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        if not isinstance(e, (asyncio.CancelledError, GeneratorExit)):
+            _metrics.increment(f"{name}.errors")
+        raise
+    finally:
+        _metrics.observe(name, time.perf_counter() - started)
+
+
+def timed(name: str):
+    """Decorator: run a coroutine function inside ``span(name)``"""
+    def decorate(function):
+        @functools.wraps(function)
+        async def wrapper(*args, **kwargs):
+            with span(name):
+                return await function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def increment(name: str, amount: int = 1):
+    """Count an event"""
+    _metrics.increment(name, amount)
+
+
+def observe(name: str, seconds: float):
+    """Record a duration measured elsewhere"""
+    _metrics.observe(name, seconds)
+
+
+async def _serve_prometheus(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        request = await reader.readline()
+        # Drain the headers
+        while (await reader.readline()).strip():
+            pass
+        path = request.split()[1].decode() if len(request.split()) > 1 else "/"
+        if path.split("?")[0] == "/metrics":
+            status, body = "200 OK", _metrics.prometheus()
+        else:
+            status, body = "404 Not Found", "not found\n"
+        payload = body.encode()
+        writer.write(
+            f"HTTP/1.0 {status}\r\nContent-Type: text/plain; version=0.0.4\r\n"
+            f"Content-Length: {len(payload)}\r\n\r\n".encode() + payload
+        )
+        await writer.drain()
+    except Exception as e:
+        logger.debug(f"Metrics request failed: {e}")
+    finally:
+        writer.close()
+
+
+@asynccontextmanager
+async def metrics_endpoint(port: Optional[int] = None):
+    """Serve /metrics over HTTP on 127.0.0.1 while the block runs, if a port is configured"""
+    if port is None:
+        configured = os.environ.get("CHATGPT_MCP_METRICS_PORT")
+        port = int(configured) if configured else None
+    if port is None:
+        yield None
+        return
+    server = await asyncio.start_server(_serve_prometheus, "127.0.0.1", port)
+    logger.info(f"Prometheus metrics at http://127.0.0.1:{port}/metrics")
+    try:
+        yield server
+    finally:
+        server.close()
+        await server.wait_closed()
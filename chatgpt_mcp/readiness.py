@@ -0,0 +1,158 @@
+"""
+Waiting on UI conditions instead of fixed sleeps.
+
+Each step that used to sleep for a fixed time now polls the condition it was
+waiting for and returns as soon as it holds: the app is frontmost, the input
+field was cleared or holds the pasted text, the button changed state, the
+response text stopped changing. Every wait is bounded by the request's
+``LatencyBudget``; a phase that runs out of budget stops waiting and the
+request carries on as it did after the old fixed sleep.
+
+The AppleScript side of the same idea is ``WAIT_HANDLERS``, which the scripts
+that type or click append to their source.
+
+Configuration (environment variables):
+    CHATGPT_MCP_BUDGET_<PHASE>  seconds a request may spend in a phase, e.g.
+                                CHATGPT_MCP_BUDGET_RENDER=2 (see DEFAULT_BUDGETS)
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from chatgpt_mcp.deadline import bound
+from chatgpt_mcp.metrics import observe
+
+logger = logging.getLogger(__name__)
+
+# Seconds per request for each phase
+DEFAULT_BUDGETS = {
+    "activate": 2.0,   # app frontmost after activation
+    "paste": 2.0,      # input field cleared and filled (inside the paste script)
+    "start": 10.0,     # button turns to 'stop' after sending
+    "render": 1.5,     # response text stops changing once the button is back
+    "new_chat": 3.0,   # empty conversation ready after clicking New Chat
+    "switch": 3.0,     # named conversation shown after selecting it in the sidebar
+    "response": 35.0,  # fallback without button detection: answer complete
+}
+
+# Seconds between condition checks
+POLL_INTERVAL = 0.05
+
+# AppleScript wait handlers; they poll every pollInterval seconds
+WAIT_HANDLERS = r'''
+property pollInterval : 0.02
+
+on waitForFrontmost(timeoutSeconds)
+    repeat ((timeoutSeconds / pollInterval) as integer) + 1 times
+        tell application "System Events"
+            if frontmost of process "ChatGPT" then return true
+        end tell
+        delay pollInterval
+    end repeat
+    return false
+end waitForFrontmost
+
+on waitForWindow(timeoutSeconds)
+    repeat ((timeoutSeconds / pollInterval) as integer) + 1 times
+        tell application "System Events"
+            if exists process "ChatGPT" then
+                if (count of windows of process "ChatGPT") > 0 then return true
+            end if
+        end tell
+        delay pollInterval
+    end repeat
+    return false
+end waitForWindow
+
+-- Wait until the field is empty (wanted is "") or its value starts with wanted
+on waitForInput(inputField, wanted, timeoutSeconds)
+    repeat ((timeoutSeconds / pollInterval) as integer) + 1 times
+        try
+            tell application "System Events" to set fieldValue to value of inputField
+            if fieldValue is missing value then set fieldValue to ""
+            if wanted is "" then
+                if fieldValue is "" then return true
+            else if fieldValue starts with wanted then
+                return true
+            end if
+        end try
+        delay pollInterval
+    end repeat
+    return false
+end waitForInput
+'''
+
+_stats: Dict[str, Dict[str, float]] = {}
+
+
+def configured_budgets() -> Dict[str, float]:
+    """Default budgets with CHATGPT_MCP_BUDGET_<PHASE> overrides applied"""
+    budgets = dict(DEFAULT_BUDGETS)
+    for phase in budgets:
+        value = os.environ.get(f"CHATGPT_MCP_BUDGET_{phase.upper()}")
+        if value:
+            budgets[phase] = float(value)
+    return budgets
+
+
+async def wait_until(check: Callable[[], Awaitable[Any]], timeout: float,
+                     interval: float = POLL_INTERVAL) -> Any:
+    """Poll ``check`` until it returns something truthy.
+
+    Args:
+        check: Coroutine function evaluated at least once
+        timeout: Seconds to keep polling, at most until the request's deadline
+        interval: Seconds between checks
+
+    Returns:
+        The first truthy result, or None on timeout
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max(0.0, bound(timeout))
+    while True:
+        result = await check()
+        if result:
+            return result
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return None
+        await asyncio.sleep(min(interval, remaining))
+
+
+class LatencyBudget:
+    """Time a single request may spend waiting in each phase"""
+
+    def __init__(self, budgets: Optional[Dict[str, float]] = None):
+        self.budgets = budgets if budgets is not None else configured_budgets()
+        self.spent: Dict[str, float] = {}
+
+    def remaining(self, phase: str) -> float:
+        """Seconds left in a phase"""
+        return max(0.0, self.budgets.get(phase, 0.0) - self.spent.get(phase, 0.0))
+
+    def charge(self, phase: str, seconds: float, timed_out: bool = False):
+        """Record time spent in a phase, by this request and in the totals"""
+        self.spent[phase] = self.spent.get(phase, 0.0) + seconds
+        totals = _stats.setdefault(phase, {"waits": 0, "seconds": 0.0, "timeouts": 0})
+        totals["waits"] += 1
+        totals["seconds"] += seconds
+        observe(f"wait.{phase}", seconds)
+        if timed_out:
+            totals["timeouts"] += 1
+            logger.debug(f"Phase {phase} ran out of budget after {self.spent[phase]:.2f}s")
+
+    async def wait(self, phase: str, check: Callable[[], Awaitable[Any]],
+                   interval: float = POLL_INTERVAL) -> Any:
+        """``wait_until`` bounded by, and charged to, a phase's budget"""
+        started = time.monotonic()
+        result = await wait_until(check, self.remaining(phase), interval)
+        self.charge(phase, time.monotonic() - started, timed_out=not result)
+        return result
+
+
+def phase_stats() -> Dict[str, Dict[str, float]]:
+    """Waits, seconds and timeouts per phase since startup"""
+    return {phase: dict(totals) for phase, totals in _stats.items()}
@@ -0,0 +1,128 @@
+"""
+Locating the answer in text read from the ChatGPT window.
+
+The window's static texts contain UI labels, earlier exchanges, the prompt
+that was just sent and the answer to it. Rather than guessing where the
+prompt ends from the shape of each line, the prompt is fingerprinted when it
+is sent (``remember_prompt``) and its lines are looked up in the text read
+back: the answer is whatever follows their last occurrence. The lookup
+compares lines exactly, starting at the end of the transcript where the
+prompt usually is, so it stops after a few lines; a prompt that is not there
+at all is ruled out with one membership test. Callers fall back to their
+heuristics when the prompt is not found (e.g. it was sent before the server
+started).
+
+UI labels are dropped with one precompiled matcher per caller instead of
+membership tests against lists of strings.
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Pattern, Sequence
+
+# Labels dropped from the text read by get_chatgpt_response and the status probe
+RESPONSE_LABELS = (
+    'Regenerate', 'Continue generating', 'Stop generating',
+    'Copy', '▍', 'ChatGPT', 'Send a message', 'Message ChatGPT',
+    'Type a message', 'Ask anything',
+)
+
+# Labels dropped by the improved extractor's full-window walks
+EXTRACTOR_LABELS = (
+    # Buttons and controls
+    'Regenerate', 'Continue generating', 'Stop generating', 'Copy',
+    'Send message', 'Reply...', 'New chat',
+    # UI indicators
+    '▍', '│', '─', '┌', '┐', '└', '┘',
+    # Navigation elements
+    'ChatGPT', 'Today', 'Yesterday', 'Previous 7 Days', 'Previous 30 Days',
+    # Status messages
+    'Thinking...', 'Typing...', 'ChatGPT is typing...',
+    # Common UI labels
+    'You', 'User', 'Assistant',
+)
+
+
+def noise_matcher(labels: Iterable[str], extra: Sequence[str] = ()) -> Pattern:
+    """Compile labels (matched literally) and extra regular expressions into one pattern.
+
+    Use the pattern's ``fullmatch`` on a stripped line.
+    """
+    # Longest first, so a label is not shadowed by one of its prefixes
+    literals = sorted(set(labels), key=len, reverse=True)
+    return re.compile("|".join([re.escape(label) for label in literals] + list(extra)))
+
+
+RESPONSE_NOISE = noise_matcher(RESPONSE_LABELS)
+
+# The extractor also drops very short lines, numbers and single short words
+EXTRACTOR_NOISE = noise_matcher(EXTRACTOR_LABELS, extra=(r".{1,2}", r"\d+", r"\S{1,9}"))
+
+# Lines scanned from the end before checking whether the prompt occurs at all
+TAIL_LINES = 256
+
+
+def find_last(haystack: Sequence[str], needle: Sequence[str]) -> int:
+    """Index of the last occurrence of ``needle`` as a contiguous run in ``haystack``, or -1"""
+    k, n = len(needle), len(haystack)
+    if k == 0 or n < k:
+        return -1
+    last = needle[-1]
+    needle = list(needle)
+    stop = k - 2
+    for end in range(n - 1, stop, -1):
+        if end == n - 1 - TAIL_LINES and last not in haystack:
+            # Not in the tail, and the membership test (a C loop) says nowhere else either
+            return -1
+        if haystack[end] == last and list(haystack[end - k + 1:end + 1]) == needle:
+            return end - k + 1
+    return -1
+
+
+class PromptFingerprint:
+    """The lines of a sent prompt, as they appear in the window's text"""
+
+    def __init__(self, prompt: str):
+        self.lines = [line.strip() for line in prompt.split('\n') if line.strip()]
+        self._filtered: Dict[Optional[Pattern], List[str]] = {}
+
+    def lines_for(self, noise: Optional[Pattern] = None) -> List[str]:
+        """The prompt's lines that survive the same noise filter as the text searched"""
+        lines = self._filtered.get(noise)
+        if lines is None:
+            lines = self._filtered[noise] = [
+                line for line in self.lines if noise is None or not noise.fullmatch(line)]
+        return lines
+
+    def locate(self, lines: Sequence[str], noise: Optional[Pattern] = None) -> Optional[int]:
+        """Index of the first line after the last occurrence of the prompt.
+
+        Args:
+            lines: Stripped, filtered lines in window order
+            noise: The matcher ``lines`` were filtered with
+
+        Returns:
+            The start of the answer (``len(lines)`` if nothing follows the
+            prompt yet), or None if the prompt was not found
+        """
+        needle = self.lines_for(noise)
+        index = find_last(lines, needle)
+        return index + len(needle) if index >= 0 else None
+
+
+_sent: Dict[int, PromptFingerprint] = {}
+
+
+def remember_prompt(window: int, prompt: str) -> PromptFingerprint:
+    """Fingerprint the prompt about to be sent to a window"""
+    fingerprint = _sent[window] = PromptFingerprint(prompt)
+    return fingerprint
+
+
+def sent_prompt(window: int) -> Optional[PromptFingerprint]:
+    """The last prompt sent to a window, if any"""
+    return _sent.get(window)
+
+
+def forget_prompt(window: int):
+    """Drop a window's prompt, e.g. when a new conversation starts"""
+    _sent.pop(window, None)
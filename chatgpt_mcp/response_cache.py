@@ -0,0 +1,251 @@
+"""
+Cache of ChatGPT responses keyed by prompt.
+
+Agents often repeat a prompt within minutes (retries, sibling agents fanning
+out the same question), and every repeat costs a full UI round trip. With
+``cache=True`` on ``ask_chatgpt_tool`` the response is looked up here first:
+
+- prompts are normalized (Unicode NFC, line endings, trailing whitespace and
+  blank lines) before hashing, so cosmetic differences still hit;
+- a memory tier holds the most recently used responses (LRU), each valid for
+  a fixed time (TTL);
+- an optional SQLite file is a second tier that survives restarts;
+- concurrent identical prompts are coalesced: the first caller generates the
+  response and the others wait for the same result.
+
+The cache does not know which conversation a response came from; callers that
+depend on conversation context should leave it off.
+
+Configuration (environment variables):
+    CHATGPT_MCP_CACHE_SIZE  responses kept in memory (256)
+    CHATGPT_MCP_CACHE_TTL   seconds a response stays valid (600)
+    CHATGPT_MCP_CACHE_DB    SQLite file for the disk tier (unset: memory only)
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_SIZE = 256
+DEFAULT_CACHE_TTL = 600.0
+
+_BLANK_LINES = re.compile(r'\n{3,}')
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Canonical form of a prompt for cache lookups.
+
+    Case and indentation are kept, since they can change the answer.
+    """
+    text = unicodedata.normalize("NFC", prompt).replace('\r\n', '\n').replace('\r', '\n')
+    text = '\n'.join(line.rstrip() for line in text.split('\n')).strip('\n')
+    return _BLANK_LINES.sub('\n\n', text)
+
+
+def cache_key(prompt: str) -> str:
+    """Hash of the normalized prompt"""
+    return hashlib.sha256(normalize_prompt(prompt).encode('utf-8')).hexdigest()
+
+
+@dataclass
+class _Flight:
+    """A generation in progress and the number of callers waiting on it"""
+    task: asyncio.Task
+    waiters: int = 0
+
+
+class ResponseCache:
+    """LRU + TTL response cache with an optional SQLite tier"""
+
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[float] = None,
+                 db_path: Optional[str] = None):
+        if max_entries is None:
+            max_entries = int(os.environ.get("CHATGPT_MCP_CACHE_SIZE", DEFAULT_CACHE_SIZE))
+        if ttl is None:
+            ttl = float(os.environ.get("CHATGPT_MCP_CACHE_TTL", DEFAULT_CACHE_TTL))
+        if db_path is None:
+            db_path = os.environ.get("CHATGPT_MCP_CACHE_DB") or None
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.db_path = db_path
+
+        # key -> (stored_at, response), least recently used first
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._inflight: Dict[str, _Flight] = {}
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self.stats = {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expired": 0,
+        }
+
+    async def get(self, prompt: str, factory: Callable[[], Awaitable[str]]) -> str:
+        """Return the cached response for ``prompt`` or generate it.
+
+        Args:
+            prompt: The prompt as sent by the client
+            factory: Called without arguments on a miss; returns the awaitable
+                that generates the response
+
+        Returns:
+            The response text
+        """
+        key = cache_key(prompt)
+        cached = self._lookup_memory(key)
+        if cached is None and self.db_path:
+            row = await asyncio.to_thread(self._lookup_disk, key)
+            if row is not None:
+                # Promote to memory, keeping the original age
+                self._store_memory(key, *row)
+                self.stats["disk_hits"] += 1
+                cached = row[1]
+        if cached is not None:
+            self.stats["hits"] += 1
+            return cached
+
+        flight = self._inflight.get(key)
+        if flight is not None:
+            self.stats["coalesced"] += 1
+            logger.debug(f"Waiting on in-flight response for prompt {key[:12]}")
+        else:
+            self.stats["misses"] += 1
+            flight = _Flight(asyncio.ensure_future(self._fill(key, prompt, factory)))
+            self._inflight[key] = flight
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            # Stop generating only when nobody else is waiting for it
+            if flight.waiters == 1 and not flight.task.done():
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def invalidate(self, prompt: Optional[str] = None):
+        """Drop one prompt's response, or everything if no prompt is given"""
+        keys = [cache_key(prompt)] if prompt is not None else list(self._entries)
+        for key in keys:
+            self._entries.pop(key, None)
+        if self.db_path:
+            with self._db_lock:
+                db = self._connect()
+                if prompt is None:
+                    db.execute("DELETE FROM responses")
+                else:
+                    db.execute("DELETE FROM responses WHERE key = ?", (keys[0],))
+                db.commit()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Entry count, settings and hit/miss/coalesce counters"""
+        lookups = self.stats["hits"] + self.stats["misses"] + self.stats["coalesced"]
+        return {
+            "entries": len(self._entries),
+            "in_flight": len(self._inflight),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "disk": self.db_path,
+            **self.stats,
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+        }
+
+    # -- internals -------------------------------------------------------
+
+    async def _fill(self, key: str, prompt: str, factory: Callable[[], Awaitable[str]]) -> str:
+        try:
+            response = await factory()
+            self._store_memory(key, time.time(), response)
+            if self.db_path:
+                await asyncio.to_thread(self._store_disk, key, prompt, response)
+            self.stats["stores"] += 1
+            return response
+        finally:
+            self._inflight.pop(key, None)
+
+    def _lookup_memory(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, response = entry
+        if time.time() - stored_at > self.ttl:
+            del self._entries[key]
+            self.stats["expired"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    def _store_memory(self, key: str, stored_at: float, response: str):
+        self._entries[key] = (stored_at, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            directory = os.path.dirname(os.path.abspath(self.db_path))
+            os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, prompt TEXT, response TEXT, stored_at REAL)"
+            )
+            self._db.commit()
+        return self._db
+
+    def _lookup_disk(self, key: str) -> Optional[Tuple[float, str]]:
+        try:
+            with self._db_lock:
+                db = self._connect()
+                row = db.execute(
+                    "SELECT stored_at, response FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and time.time() - row[0] > self.ttl:
+                    db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    db.commit()
+                    self.stats["expired"] += 1
+                    row = None
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache database unavailable: {e}")
+            return None
+        return tuple(row) if row is not None else None
+
+    def _store_disk(self, key: str, prompt: str, response: str):
+        try:
+            with self._db_lock:
+                db = self._connect()
+                db.execute(
+                    "INSERT OR REPLACE INTO responses (key, prompt, response, stored_at) VALUES (?, ?, ?, ?)",
+                    (key, prompt, response, time.time()),
+                )
+                db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to write response cache database: {e}")
+
+
+_cache: Optional[ResponseCache] = None
+
+
+def get_cache() -> ResponseCache:
+    """Return the response cache shared by all tools"""
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache()
+    return _cache
@@ -0,0 +1,90 @@
+"""
+Incremental delivery of a response while ChatGPT is still generating it.
+
+``ask_chatgpt`` polls the latest messages during generation and hands the
+filtered lines to a ``ResponseStream``. The stream cuts everything up to the
+prompt that was sent, diffs the rest against the last snapshot it delivered
+and emits only the appended text. Snapshots that do not extend what was
+already sent (the app re-rendered earlier text) are skipped; the tool's final
+result is authoritative.
+"""
+
+import logging
+import time
+from typing import Awaitable, Callable, List, Optional
+
+from mcp.server.fastmcp import Context
+
+from chatgpt_mcp.response_boundary import RESPONSE_NOISE, PromptFingerprint
+
+logger = logging.getLogger(__name__)
+
+# Seconds between text polls while streaming
+STREAM_INTERVAL = 0.5
+
+STREAM_LOGGER = "chatgpt_mcp.stream"
+
+# Receives the new text and the full snapshot it belongs to
+DeltaCallback = Callable[[str, str], Awaitable[None]]
+
+
+class ResponseStream:
+    """Turns successive snapshots of a growing response into deltas"""
+
+    def __init__(self, prompt: str, on_delta: DeltaCallback):
+        self.prompt = PromptFingerprint(prompt)
+        self.on_delta = on_delta
+        self.sent = ""
+        self.deltas = 0
+        self.started_at = time.monotonic()
+        self.first_delta_at: Optional[float] = None
+
+    def snapshot(self, lines: List[str]) -> Optional[str]:
+        """Response text after the last occurrence of the prompt, if found"""
+        start = self.prompt.locate(lines, RESPONSE_NOISE)
+        if start is None:
+            return None
+        return '\n'.join(lines[start:]).rstrip('▍').rstrip()
+
+    async def update(self, lines: List[str]) -> Optional[str]:
+        """Emit whatever the new snapshot appends to the text already sent.
+
+        Args:
+            lines: Filtered response lines in window order
+
+        Returns:
+            The emitted delta, or None if there was nothing new to send
+        """
+        snapshot = self.snapshot(lines)
+        if not snapshot or len(snapshot) <= len(self.sent) or not snapshot.startswith(self.sent):
+            return None
+        delta = snapshot[len(self.sent):]
+        self.sent = snapshot
+        self.deltas += 1
+        if self.first_delta_at is None:
+            self.first_delta_at = time.monotonic()
+            logger.debug(f"First streamed text after {self.first_delta_at - self.started_at:.2f}s")
+        try:
+            await self.on_delta(delta, snapshot)
+        except Exception as e:
+            logger.debug(f"Failed to deliver streamed text: {e}")
+        return delta
+
+
+def context_emitter(ctx: Context) -> DeltaCallback:
+    """Deliver deltas as MCP notifications for the request behind ``ctx``.
+
+    Progress notifications are used when the client asked for them with a
+    progress token (progress is the length of the text so far, the message
+    the delta); otherwise the delta is sent as an info log message.
+    """
+    meta = ctx.request_context.meta
+    has_progress_token = bool(meta and meta.progressToken is not None)
+
+    async def emit(delta: str, snapshot: str):
+        if has_progress_token:
+            await ctx.report_progress(len(snapshot), None, delta)
+        else:
+            await ctx.log("info", delta, logger_name=STREAM_LOGGER)
+
+    return emit
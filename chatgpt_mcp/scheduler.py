@@ -0,0 +1,223 @@
+"""
+Request scheduler for the ChatGPT UI.
+
+There is one input box per window and one clipboard, so two tool calls
+driving the same window paste over each other. Every tool call that drives
+the UI is submitted to the shared ``RequestScheduler``, which runs
+``concurrency`` jobs at a time (one per pooled window, see window_pool) in
+priority order, first-in first-out within a priority.
+
+The queue is bounded: when it is full a new request is rejected straight away
+with ``SchedulerBusy``, which carries an estimate of when to retry. A request
+may carry a deadline; it fails with ``asyncio.TimeoutError`` if the deadline
+passes while it is queued or running, and the job runs under it so every
+script call it makes is bounded by it too (see deadline).
+
+Configuration (environment variables):
+    CHATGPT_MCP_QUEUE_LIMIT  maximum number of queued requests (64)
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from chatgpt_mcp.deadline import deadline_scope
+from chatgpt_mcp.window_pool import get_pool
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_LIMIT = 64
+
+# Number of recent wait times kept for the percentile stats
+WAIT_SAMPLES = 1000
+
+
+class SchedulerBusy(Exception):
+    """Raised when the queue is full"""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(f"ChatGPT is busy, retry after {retry_after:.0f} s")
+
+
+@dataclass(order=True)
+class _Job:
+    sort_key: tuple
+    factory: Callable[[], Awaitable[Any]] = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    name: str = field(compare=False, default="")
+    enqueued_at: float = field(compare=False, default=0.0)
+    deadline: Optional[float] = field(compare=False, default=None)
+    task: Optional[asyncio.Task] = field(compare=False, default=None)
+
+
+class RequestScheduler:
+    """Runs UI jobs in priority/FIFO order with a bounded queue"""
+
+    def __init__(self, max_queue: Optional[int] = None, concurrency: int = 1):
+        if max_queue is None:
+            max_queue = int(os.environ.get("CHATGPT_MCP_QUEUE_LIMIT", DEFAULT_QUEUE_LIMIT))
+        self.max_queue = max_queue
+        self.concurrency = concurrency
+
+        self._queue: List[_Job] = []
+        self._sequence = itertools.count()
+        self._running = 0
+        self._waits = deque(maxlen=WAIT_SAMPLES)
+        self._service_time = 0.0
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "expired": 0,
+            "cancelled": 0,
+            "max_depth": 0,
+        }
+
+    @property
+    def depth(self) -> int:
+        """Number of queued (not yet running) requests"""
+        return len(self._queue)
+
+    async def submit(self, factory: Callable[[], Awaitable[Any]], priority: int = 0,
+                     timeout: Optional[float] = None, name: str = "", grace: float = 0.0) -> Any:
+        """Queue a job and wait for its result.
+
+        Args:
+            factory: Called without arguments when the job starts; returns the
+                awaitable to run
+            priority: Higher runs earlier; equal priorities run in arrival order
+            timeout: Seconds from now until the job must have finished
+            name: Label used in log messages
+            grace: Seconds the caller keeps waiting after the deadline, for a
+                job that wraps up and reports partial results once its
+                deadline has passed
+
+        Returns:
+            The job's result
+
+        Raises:
+            SchedulerBusy: if the queue is full
+            asyncio.TimeoutError: if the deadline passed first
+        """
+        if len(self._queue) >= self.max_queue:
+            self.stats["rejected"] += 1
+            raise SchedulerBusy(self.retry_after())
+
+        loop = asyncio.get_running_loop()
+        now = time.monotonic()
+        job = _Job(
+            sort_key=(-priority, next(self._sequence)),
+            factory=factory,
+            future=loop.create_future(),
+            name=name,
+            enqueued_at=now,
+            deadline=now + timeout if timeout is not None else None,
+        )
+        heapq.heappush(self._queue, job)
+        self.stats["submitted"] += 1
+        self.stats["max_depth"] = max(self.stats["max_depth"], len(self._queue))
+        self._dispatch()
+
+        try:
+            if job.deadline is None:
+                return await asyncio.shield(job.future)
+            return await asyncio.wait_for(asyncio.shield(job.future), job.deadline + grace - time.monotonic())
+        except (asyncio.CancelledError, asyncio.TimeoutError) as e:
+            self._abandon(job, expired=isinstance(e, asyncio.TimeoutError))
+            raise
+
+    def retry_after(self) -> float:
+        """Estimated seconds until the queue has room again"""
+        average = self._service_time / self.stats["completed"] if self.stats["completed"] else 30.0
+        backlog = len(self._queue) + self._running
+        return max(1.0, math.ceil(backlog * average / self.concurrency))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current queue depth, counters and wait-time statistics"""
+        waits = sorted(self._waits)
+
+        def percentile(p: float) -> float:
+            return waits[min(len(waits) - 1, int(p * len(waits)))] if waits else 0.0
+
+        completed = self.stats["completed"]
+        return {
+            "depth": len(self._queue),
+            "running": self._running,
+            "max_queue": self.max_queue,
+            **self.stats,
+            "wait_avg": sum(waits) / len(waits) if waits else 0.0,
+            "wait_p50": percentile(0.5),
+            "wait_p95": percentile(0.95),
+            "wait_max": waits[-1] if waits else 0.0,
+            "service_avg": self._service_time / completed if completed else 0.0,
+        }
+
+    # -- internals -------------------------------------------------------
+
+    def _dispatch(self):
+        while self._running < self.concurrency and self._queue:
+            job = heapq.heappop(self._queue)
+            if job.future.done():
+                continue
+            if job.deadline is not None and time.monotonic() >= job.deadline:
+                self.stats["expired"] += 1
+                job.future.set_exception(asyncio.TimeoutError())
+                continue
+            self._running += 1
+            self._waits.append(time.monotonic() - job.enqueued_at)
+            job.task = asyncio.get_running_loop().create_task(self._run(job))
+
+    async def _run(self, job: _Job):
+        started = time.monotonic()
+        try:
+            with deadline_scope(job.deadline):
+                result = await job.factory()
+        except asyncio.CancelledError:
+            if not job.future.done():
+                job.future.cancel()
+        except Exception as e:
+            self.stats["failed"] += 1
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            self.stats["completed"] += 1
+            self._service_time += time.monotonic() - started
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            self._running -= 1
+            self._dispatch()
+
+    def _abandon(self, job: _Job, expired: bool):
+        """The caller stopped waiting: drop the job or stop it if running"""
+        if job.future.done():
+            # Settled already (finished, or expired while queued)
+            return
+        self.stats["expired" if expired else "cancelled"] += 1
+        if job.task is not None:
+            job.task.cancel()
+        elif job in self._queue:
+            self._queue.remove(job)
+            heapq.heapify(self._queue)
+        job.future.cancel()
+        logger.debug(f"Request {job.name or '<unnamed>'} {'timed out' if expired else 'cancelled'}")
+
+
+_scheduler: Optional[RequestScheduler] = None
+
+
+def get_scheduler() -> RequestScheduler:
+    """Return the scheduler shared by all tools; one job per pooled window runs at a time"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = RequestScheduler(concurrency=get_pool().size)
+    return _scheduler
@@ -0,0 +1,186 @@
+"""
+Registry of the scripts used by the server, compiled once and cached on disk.
+
+Every script is registered with a name and its source. The first time it is
+run, ``osacompile`` turns it into a ``.scpt`` file stored in the cache directory
+under a name derived from the content hash of the source, so editing a script
+automatically invalidates its compiled copy. Variable data (coordinates, window
+index, text) is passed as ``on run argv`` parameters rather than interpolated
+into the source, so the compiled file can be reused for every call.
+
+Scripts are AppleScript unless registered with ``language="JavaScript"``
+(JavaScript for Automation); both are compiled and run by the same tools.
+
+If compilation is not possible, scripts are run from source with ``-e``.
+
+Environment variables:
+    CHATGPT_MCP_OSACOMPILE: osacompile executable to use (default ``osacompile``)
+    CHATGPT_MCP_SCRIPT_CACHE: directory for compiled scripts
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import platform
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Bump when the way scripts are compiled or invoked changes
+CACHE_FORMAT = "1"
+
+
+@dataclass(frozen=True)
+class RegisteredScript:
+    """A named script whose compiled form can be cached"""
+    name: str
+    source: str
+    digest: str
+    language: str = "AppleScript"
+
+    @property
+    def filename(self) -> str:
+        return f"{self.name}-{self.digest[:16]}.scpt"
+
+
+_registry: Dict[str, RegisteredScript] = {}
+
+
+def register(name: str, source: str, language: str = "AppleScript") -> RegisteredScript:
+    """Register a script under a unique name and return its handle.
+
+    Args:
+        name: Unique name of the script
+        source: Script source; variable data is passed as arguments
+        language: ``AppleScript`` or ``JavaScript``
+    """
+    key = "\0".join([CACHE_FORMAT, platform.mac_ver()[0], language, source])
+    script = RegisteredScript(name, source, hashlib.sha256(key.encode()).hexdigest(), language)
+    existing = _registry.get(name)
+    if existing is not None and existing.digest != script.digest:
+        raise ValueError(f"A different script is already registered as {name!r}")
+    _registry[name] = script
+    return script
+
+
+def registered_scripts() -> Dict[str, RegisteredScript]:
+    """Return all registered scripts by name"""
+    return dict(_registry)
+
+
+def default_cache_dir() -> str:
+    configured = os.environ.get("CHATGPT_MCP_SCRIPT_CACHE")
+    if configured:
+        return configured
+    library_caches = os.path.expanduser("~/Library/Caches")
+    if os.path.isdir(library_caches):
+        return os.path.join(library_caches, "chatgpt-mcp", "scripts")
+    xdg = os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache"))
+    return os.path.join(xdg, "chatgpt-mcp", "scripts")
+
+
+class ScriptCache:
+    """Compiles registered scripts with osacompile and tracks the results"""
+
+    def __init__(self, cache_dir: Optional[str] = None, osacompile: Optional[str] = None):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.osacompile = osacompile or os.environ.get("CHATGPT_MCP_OSACOMPILE", "osacompile")
+        self.stats = {"compiles": 0, "hits": 0, "fallbacks": 0}
+        # digest -> compiled path, or None when the script must run from source
+        self._compiled: Dict[str, Optional[str]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._unavailable = False
+
+    async def compiled_path(self, script: RegisteredScript) -> Optional[str]:
+        """Return the path of the compiled script, compiling it if needed.
+
+        Returns None when the script should be run from source instead.
+        """
+        if script.digest in self._compiled:
+            path = self._compiled[script.digest]
+            if path is None or os.path.exists(path):
+                self.stats["hits" if path else "fallbacks"] += 1
+                return path
+            del self._compiled[script.digest]
+
+        lock = self._locks.setdefault(script.digest, asyncio.Lock())
+        async with lock:
+            if script.digest not in self._compiled:
+                self._compiled[script.digest] = await self._load_or_compile(script)
+        path = self._compiled[script.digest]
+        if path is None:
+            self.stats["fallbacks"] += 1
+        return path
+
+    def invalidate(self, script: RegisteredScript):
+        """Forget and delete the compiled copy of a script (e.g. it failed to load)"""
+        path = self._compiled.pop(script.digest, None)
+        if path:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def clear(self):
+        """Delete every compiled script in the cache directory"""
+        self._compiled.clear()
+        if not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".scpt"):
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+
+    async def _load_or_compile(self, script: RegisteredScript) -> Optional[str]:
+        path = os.path.join(self.cache_dir, script.filename)
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            return path
+        if self._unavailable:
+            return None
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        except OSError as e:
+            logger.warning(f"Cannot create script cache directory {self.cache_dir}: {e}")
+            self._unavailable = True
+            return None
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            process = await asyncio.create_subprocess_exec(
+                self.osacompile, "-l", script.language, "-o", tmp_path, "-e", script.source,
+                stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE,
+            )
+            _, stderr = await process.communicate()
+        except OSError as e:
+            logger.info(f"osacompile not available, running scripts from source: {e}")
+            self._unavailable = True
+            return None
+
+        self.stats["compiles"] += 1
+        if process.returncode != 0 or not os.path.exists(tmp_path):
+            logger.warning(f"Could not compile script {script.name}: {stderr.decode(errors='replace').strip()}")
+            self._remove(tmp_path)
+            return None
+
+        os.replace(tmp_path, path)
+        self._prune_stale(script)
+        return path
+
+    def _prune_stale(self, script: RegisteredScript):
+        """Remove compiled copies of older versions of the same script"""
+        prefix = f"{script.name}-"
+        for name in os.listdir(self.cache_dir):
+            if name.startswith(prefix) and name.endswith(".scpt") and name != script.filename:
+                self._remove(os.path.join(self.cache_dir, name))
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,646 @@
+"""
+Persistent script runner for all osascript interaction.
+
+Instead of spawning a fresh ``osascript`` process (and recompiling the script)
+for every UI probe, scripts are sent over a pipe to a small pool of long-lived
+worker processes. Each worker is a JavaScript for Automation program that reads
+JSON requests from stdin, runs the AppleScript through ``NSAppleScript`` (keeping
+compiled scripts in memory) and writes JSON replies to stdout.
+
+Scripts can be plain source strings or ``RegisteredScript`` handles from
+``script_registry``; registered scripts are compiled once with ``osacompile``
+and loaded from the on-disk cache, with a fallback to running their source.
+JavaScript for Automation scripts are evaluated by the worker itself, which
+keeps each one's ``run`` function, and spawned with ``-l JavaScript``.
+
+Workers are restarted automatically when they crash and killed when a call
+exceeds its timeout. If no worker can be started, calls fall back to spawning
+``osascript`` directly.
+
+Every call can be recorded to a trace, and a recorded trace can stand in for
+``osascript`` altogether; see ``script_trace``.
+
+Calls made on behalf of a request with a deadline (see ``deadline``) get at
+most the time left before it, and fail straight away once it has passed.
+
+Callers that parse large framed output (see ``wire_format``) can ask for it
+``chunked``: the worker then writes the output as a series of short lines
+and a spawned process's stdout is read in pieces, so the output reaches the
+parser as a list of chunks and never exists as one string or one reply line.
+
+Environment variables:
+    CHATGPT_MCP_OSASCRIPT: osascript executable to use (default ``osascript``)
+    CHATGPT_MCP_RUNNER: ``persistent`` (default) or ``spawn``
+    CHATGPT_MCP_RUNNER_POOL: number of worker processes (default 1)
+    CHATGPT_MCP_TRACE, CHATGPT_MCP_REPLAY: see ``script_trace``
+"""
+
+import asyncio
+import atexit
+import codecs
+import json
+import logging
+import os
+import subprocess
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+try:
+    from chatgpt_mcp.deadline import bound
+    from chatgpt_mcp.script_registry import RegisteredScript, ScriptCache
+    from chatgpt_mcp.script_trace import (
+        CANCELLED, TIMEOUT, ScriptTracer, TraceReplay, replay_from_env, tracer_from_env)
+except ImportError:
+    from deadline import bound
+    from script_registry import RegisteredScript, ScriptCache
+    from script_trace import CANCELLED, TIMEOUT, ScriptTracer, TraceReplay, replay_from_env, tracer_from_env
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 60.0
+
+# Characters per line of a chunked worker reply, and bytes per read of a
+# spawned script's output
+CHUNK_SIZE = 64 * 1024
+
+Script = Union[str, RegisteredScript]
+
+# JXA worker: one JSON request per line in, one JSON reply per line out.
+# Requests are always pure ASCII (json.dumps escapes everything else), so
+# splitting the input on newlines never cuts a multi-byte character.
+WORKER_SOURCE = r'''
+ObjC.import("Foundation");
+
+function errorMessage(err) {
+    var info = ObjC.deepUnwrap(err[0]) || {};
+    return info.NSAppleScriptErrorMessage || info.NSAppleScriptErrorBriefMessage || "AppleScript error";
+}
+
+function descriptorText(desc) {
+    if (desc.isNil()) {
+        return "";
+    }
+    var type = desc.descriptorType;
+    if (type === 0x74727565) { return "true"; }   // 'true'
+    if (type === 0x66616c73) { return "false"; }  // 'fals'
+    if (type === 0x626f6f6c) { return desc.booleanValue ? "true" : "false"; }
+    var text = desc.stringValue;
+    return text.isNil() ? "" : text.js;
+}
+
+function writeLine(stdout, text) {
+    var out = $.NSString.alloc.initWithUTF8String(text + "\n");
+    stdout.writeData(out.dataUsingEncoding($.NSUTF8StringEncoding));
+}
+
+// Chunked reply: the header, the output as JSON strings of at most "size"
+// characters, one per line, and a null line. Chunks never end between the
+// two halves of a surrogate pair.
+function writeChunked(stdout, reply, size) {
+    var output = reply.output;
+    delete reply.output;
+    reply.chunked = true;
+    writeLine(stdout, JSON.stringify(reply));
+    var start = 0;
+    while (start < output.length) {
+        var end = Math.min(start + size, output.length);
+        var last = output.charCodeAt(end - 1);
+        if (end < output.length && end - start > 1 && last >= 0xD800 && last <= 0xDBFF) {
+            end -= 1;
+        }
+        writeLine(stdout, JSON.stringify(output.slice(start, end)));
+        start = end;
+    }
+    writeLine(stdout, "null");
+}
+
+// JavaScript for Automation: the script's run(argv) function, evaluated once
+function handleJavaScript(req, cache) {
+    var run = cache[req.source];
+    try {
+        if (!run) {
+            run = cache[req.source] = eval("(function () {\nvar run;\n" + req.source + "\nreturn run;\n})()");
+        }
+        var output = run(req.args || []);
+        return {id: req.id, ok: true, output: output === undefined || output === null ? "" : String(output)};
+    } catch (e) {
+        return {id: req.id, ok: false, error: String(e)};
+    }
+}
+
+function handle(req, cache) {
+    if (req.language === "JavaScript") {
+        return handleJavaScript(req, cache);
+    }
+    var err = Ref();
+    var key = req.path || req.source;
+    var script = cache[key];
+    if (!script) {
+        if (req.path) {
+            script = $.NSAppleScript.alloc.initWithContentsOfURLError($.NSURL.fileURLWithPath(req.path), err);
+            if (script.isNil()) {
+                return {id: req.id, ok: false, load_error: true, error: errorMessage(err)};
+            }
+        } else {
+            script = $.NSAppleScript.alloc.initWithSource(req.source);
+        }
+        if (!script.compileAndReturnError(err)) {
+            return {id: req.id, ok: false, error: errorMessage(err)};
+        }
+        cache[key] = script;
+    }
+
+    var result;
+    if (req.args && req.args.length) {
+        var argv = $.NSAppleEventDescriptor.listDescriptor;
+        for (var i = 0; i < req.args.length; i++) {
+            argv.insertDescriptorAtIndex($.NSAppleEventDescriptor.descriptorWithString(String(req.args[i])), i + 1);
+        }
+        // 'aevt'/'oapp' is the run event; the list becomes the argv of "on run argv".
+        var event = $.NSAppleEventDescriptor.appleEventWithEventClassEventIDTargetDescriptorReturnIDTransactionID(
+            0x61657674, 0x6f617070, $.NSAppleEventDescriptor.nullDescriptor, -1, 0);
+        event.setParamDescriptorForKeyword(argv, 0x2d2d2d2d);
+        result = script.executeAppleEventError(event, err);
+    } else {
+        result = script.executeAndReturnError(err);
+    }
+
+    if (result.isNil()) {
+        return {id: req.id, ok: false, error: errorMessage(err)};
+    }
+    return {id: req.id, ok: true, output: descriptorText(result)};
+}
+
+function run() {
+    var stdin = $.NSFileHandle.fileHandleWithStandardInput;
+    var stdout = $.NSFileHandle.fileHandleWithStandardOutput;
+    var cache = {};
+    var buffer = "";
+    while (true) {
+        var data = stdin.availableData;
+        if (data.length === 0) {
+            break;
+        }
+        buffer += $.NSString.alloc.initWithDataEncoding(data, $.NSUTF8StringEncoding).js;
+        var newline;
+        while ((newline = buffer.indexOf("\n")) >= 0) {
+            var line = buffer.slice(0, newline);
+            buffer = buffer.slice(newline + 1);
+            if (!line) {
+                continue;
+            }
+            var req = null;
+            var reply;
+            try {
+                req = JSON.parse(line);
+                reply = handle(req, cache);
+            } catch (e) {
+                reply = {id: null, ok: false, error: String(e)};
+            }
+            if (reply.ok && req.chunk > 0) {
+                writeChunked(stdout, reply, req.chunk);
+            } else {
+                writeLine(stdout, JSON.stringify(reply));
+            }
+        }
+    }
+}
+'''
+
+
+class WorkerCrashed(Exception):
+    """Raised when a worker process exits while a call is in flight"""
+
+
+class _Worker:
+    """A single long-lived script worker process"""
+
+    def __init__(self, command: Sequence[str]):
+        self.command = list(command)
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self._next_id = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    async def start(self):
+        self.process = await asyncio.create_subprocess_exec(
+            *self.command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            limit=64 * 1024 * 1024,
+        )
+        logger.debug(f"Started script worker pid={self.process.pid}")
+
+    async def call(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Send one request and wait for its reply.
+
+        The output of a chunked reply is returned as the list of its chunks.
+        """
+        self._next_id += 1
+        request = dict(request, id=self._next_id)
+        try:
+            self.process.stdin.write(json.dumps(request).encode() + b"\n")
+            await self.process.stdin.drain()
+            while True:
+                reply = json.loads(await self._readline())
+                # Replies to calls that were abandoned earlier are skipped
+                wanted = reply.get("id") in (request["id"], None)
+                if reply.get("chunked"):
+                    chunks = reply["output"] = []
+                    while True:
+                        chunk = json.loads(await self._readline())
+                        if chunk is None:
+                            break
+                        if wanted:
+                            chunks.append(chunk)
+                if wanted:
+                    return reply
+        except (BrokenPipeError, ConnectionResetError) as e:
+            raise WorkerCrashed(f"script worker pipe closed: {e}")
+
+    async def _readline(self) -> bytes:
+        line = await self.process.stdout.readline()
+        if not line:
+            raise WorkerCrashed("script worker exited")
+        return line
+
+    async def kill(self):
+        if self.alive:
+            try:
+                self.process.kill()
+            except ProcessLookupError:
+                pass
+        if self.process is not None:
+            try:
+                await self.process.wait()
+            except Exception:
+                pass
+        self.process = None
+
+
+class ScriptRunner:
+    """Runs scripts on a pool of persistent workers with spawn fallback.
+
+    All worker I/O happens on a private event loop in a background thread, so
+    the runner can be used from synchronous code (``run``) and from any
+    asyncio event loop (``run_async``) without blocking it.
+    """
+
+    def __init__(
+        self,
+        osascript: Optional[str] = None,
+        pool_size: Optional[int] = None,
+        persistent: Optional[bool] = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        cache: Optional[ScriptCache] = None,
+        tracer: Optional[ScriptTracer] = None,
+        replay: Optional[TraceReplay] = None,
+    ):
+        self.osascript = osascript or os.environ.get("CHATGPT_MCP_OSASCRIPT", "osascript")
+        self.pool_size = pool_size or int(os.environ.get("CHATGPT_MCP_RUNNER_POOL", "1"))
+        if persistent is None:
+            persistent = os.environ.get("CHATGPT_MCP_RUNNER", "persistent") != "spawn"
+        self.persistent = persistent
+        self.timeout = timeout
+        self.cache = cache if cache is not None else ScriptCache()
+        self.tracer = tracer if tracer is not None else tracer_from_env()
+        self.replay = replay if replay is not None else replay_from_env()
+
+        self.stats = {"calls": 0, "spawns": 0, "worker_starts": 0, "timeouts": 0, "crashes": 0,
+                      "expired": 0}
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._idle: Optional[asyncio.Queue] = None
+        self._workers: List[_Worker] = []
+
+    @property
+    def worker_command(self) -> List[str]:
+        return [self.osascript, "-l", "JavaScript", "-e", WORKER_SOURCE]
+
+    # -- background loop -------------------------------------------------
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever, name="chatgpt-mcp-script-runner", daemon=True
+                )
+                thread.start()
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    def _submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def _in_runner_loop(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    # -- public API ------------------------------------------------------
+
+    def run(
+        self, script: Script, args: Sequence[str] = (), timeout: Optional[float] = None
+    ) -> subprocess.CompletedProcess:
+        """Run a script synchronously.
+
+        Args:
+            script: AppleScript source or a registered script
+            args: Values passed to the script's ``on run argv`` handler
+            timeout: Seconds before the call is abandoned (default: runner
+                timeout), cut to the time left before the request's deadline
+
+        Returns:
+            CompletedProcess with returncode, stdout and stderr
+
+        Raises:
+            subprocess.TimeoutExpired: if the call takes longer than ``timeout``
+                or the request's deadline has already passed
+        """
+        timeout = self._bounded(script, timeout)
+        return self._submit(self._run(script, list(args), timeout)).result()
+
+    async def run_async(
+        self, script: Script, args: Sequence[str] = (), timeout: Optional[float] = None,
+        spawn: bool = False, chunked: bool = False,
+    ) -> subprocess.CompletedProcess:
+        """Run a script without blocking the calling event loop.
+
+        Cancelling the awaiting task cancels the call and kills its worker
+        (or its osascript process).
+
+        Args:
+            spawn: Run in a process of its own instead of on a worker, so the
+                call runs alongside the workers' calls and cancelling it only
+                kills that process
+            chunked: Return the output as a list of chunks of at most
+                CHUNK_SIZE characters (or decoded bytes) instead of one
+                string, for parsers that take chunks (``wire_format``).
+                Replayed calls still return one string.
+        """
+        timeout = self._bounded(script, timeout)
+        call = self._run(script, list(args), timeout, spawn, chunked)
+        if self._in_runner_loop():
+            return await call
+        return await asyncio.wrap_future(self._submit(call))
+
+    def close(self):
+        """Stop all workers and the background loop"""
+        if self._loop is None:
+            return
+        try:
+            self._submit(self._close()).result(timeout=5)
+        except Exception:
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
+        if self.tracer is not None:
+            self.tracer.close()
+
+    # -- implementation --------------------------------------------------
+
+    def _bounded(self, script: Script, timeout: Optional[float]) -> float:
+        """The call's timeout cut to the caller's deadline; raises if none is left"""
+        timeout = bound(self.timeout if timeout is None else timeout)
+        if timeout <= 0:
+            self.stats["expired"] += 1
+            name = script.name if isinstance(script, RegisteredScript) else "-e"
+            raise subprocess.TimeoutExpired(["osascript", name], 0)
+        return timeout
+
+    async def _close(self):
+        for worker in self._workers:
+            await worker.kill()
+        self._workers = []
+        self._idle = None
+
+    async def _run(self, script: Script, args: List[str], timeout: Optional[float],
+                   spawn: bool = False, chunked: bool = False) -> subprocess.CompletedProcess:
+        self.stats["calls"] += 1
+        if self.replay is not None:
+            return await self.replay.serve(script, args)
+        if self.tracer is None:
+            return await self._execute(script, args, timeout, spawn, chunked)
+
+        started = time.perf_counter()
+        try:
+            result = await self._execute(script, args, timeout, spawn, chunked)
+        except subprocess.TimeoutExpired:
+            self.tracer.record(script, args, time.perf_counter() - started, None, TIMEOUT)
+            raise
+        except asyncio.CancelledError:
+            # The worker or process running it has been killed
+            self.tracer.record(script, args, time.perf_counter() - started, None, CANCELLED)
+            raise
+        self.tracer.record(script, args, time.perf_counter() - started, result)
+        return result
+
+    async def _execute(self, script: Script, args: List[str], timeout: Optional[float],
+                       spawn: bool = False, chunked: bool = False) -> subprocess.CompletedProcess:
+        timeout = self.timeout if timeout is None else timeout
+
+        if isinstance(script, RegisteredScript):
+            source, name, language = script.source, script.name, script.language
+            path = await self.cache.compiled_path(script)
+        else:
+            source, name, language, path = script, None, "AppleScript", None
+
+        if self.persistent and not spawn:
+            worker = await self._acquire()
+            if worker is not None:
+                if language == "JavaScript":
+                    # The worker evaluates the source; a compiled copy is only for osascript
+                    request = {"source": source, "language": language}
+                else:
+                    request = {"path": path} if path else {"source": source}
+                if name:
+                    request["name"] = name
+                if chunked:
+                    request["chunk"] = CHUNK_SIZE
+                result = await self._run_on_worker(worker, request, args, timeout)
+                if path and result.returncode == 2:
+                    # The compiled copy could not be loaded; drop it and use the source
+                    self.cache.invalidate(script)
+                    path = None
+                    worker = await self._acquire()
+                    if worker is not None:
+                        request = {"source": source, "name": name}
+                        if chunked:
+                            request["chunk"] = CHUNK_SIZE
+                        return await self._run_on_worker(worker, request, args, timeout)
+                else:
+                    return result
+
+        if path:
+            return await self._spawn([self.osascript, path, *args], timeout, chunked)
+        if language != "AppleScript":
+            return await self._spawn([self.osascript, "-l", language, "-e", source, *args], timeout, chunked)
+        return await self._spawn([self.osascript, "-e", source, *args], timeout, chunked)
+
+    async def _acquire(self) -> Optional[_Worker]:
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            self._workers = [_Worker(self.worker_command) for _ in range(self.pool_size)]
+            for worker in self._workers:
+                self._idle.put_nowait(worker)
+
+        worker = await self._idle.get()
+        if worker.alive:
+            return worker
+        try:
+            await worker.start()
+            self.stats["worker_starts"] += 1
+            return worker
+        except OSError as e:
+            logger.warning(f"Could not start script worker, falling back to spawning osascript: {e}")
+            self._idle.put_nowait(worker)
+            self.persistent = False
+            return None
+
+    async def _run_on_worker(
+        self, worker: _Worker, request: Dict[str, Any], args: List[str], timeout: Optional[float]
+    ) -> subprocess.CompletedProcess:
+        cmd = ["osascript", request.get("path") or "-e", *args]
+        try:
+            reply = await asyncio.wait_for(worker.call(dict(request, args=args)), timeout)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            await worker.kill()
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        except WorkerCrashed as e:
+            self.stats["crashes"] += 1
+            logger.warning(f"Script worker crashed, it will be restarted: {e}")
+            await worker.kill()
+            return subprocess.CompletedProcess(cmd, -1, "", str(e))
+        except asyncio.CancelledError:
+            # The reply may still arrive later; a fresh worker avoids confusion
+            await worker.kill()
+            raise
+        finally:
+            self._idle.put_nowait(worker)
+
+        if reply.get("ok"):
+            return subprocess.CompletedProcess(cmd, 0, reply.get("output", ""), "")
+        # Exit status 2 marks a compiled script that could not be loaded
+        returncode = 2 if reply.get("load_error") else 1
+        return subprocess.CompletedProcess(cmd, returncode, "", reply.get("error", ""))
+
+    async def _spawn(self, cmd: List[str], timeout: Optional[float],
+                     chunked: bool = False) -> subprocess.CompletedProcess:
+        self.stats["spawns"] += 1
+        process = await asyncio.create_subprocess_exec(
+            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            if chunked:
+                stdout, stderr = await asyncio.wait_for(self._read_chunks(process), timeout)
+            else:
+                stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+                stdout = stdout.decode(errors="replace")
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            process.kill()
+            await process.wait()
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        except asyncio.CancelledError:
+            process.kill()
+            await process.wait()
+            raise
+        return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr.decode(errors="replace"))
+
+    @staticmethod
+    async def _read_chunks(process: asyncio.subprocess.Process):
+        """A process's stdout as decoded chunks of at most CHUNK_SIZE bytes, and its stderr"""
+        stderr = asyncio.ensure_future(process.stderr.read())
+        try:
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+            chunks = []
+            while True:
+                data = await process.stdout.read(CHUNK_SIZE)
+                chunk = decoder.decode(data, final=not data)
+                if chunk:
+                    chunks.append(chunk)
+                if not data:
+                    break
+            await process.wait()
+            return chunks, await stderr
+        finally:
+            stderr.cancel()
+
+
+_default_runner: Optional[ScriptRunner] = None
+_default_lock = threading.Lock()
+
+
+def get_runner() -> ScriptRunner:
+    """Return the process-wide script runner, creating it on first use"""
+    global _default_runner
+    with _default_lock:
+        if _default_runner is None:
+            _default_runner = ScriptRunner()
+            atexit.register(_default_runner.close)
+        return _default_runner
+
+
+def set_runner(runner: Optional[ScriptRunner]):
+    """Replace the process-wide script runner (used by benchmarks and tools)"""
+    global _default_runner
+    with _default_lock:
+        if _default_runner is not None and _default_runner is not runner:
+            _default_runner.close()
+        _default_runner = runner
+
+
+def run_script(script: Script, args: Sequence[str] = (), timeout: Optional[float] = None) -> subprocess.CompletedProcess:
+    """Run an AppleScript (source or registered script) through the shared runner"""
+    return get_runner().run(script, args, timeout)
+
+
+# Loop the server's shared state (window pool, button observers) lives on
+_home_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def set_home_loop(loop: Optional[asyncio.AbstractEventLoop] = None):
+    """Make ``loop`` (the running loop if None) the loop run_sync runs coroutines on"""
+    global _home_loop
+    _home_loop = loop if loop is not None else asyncio.get_running_loop()
+
+
+def run_sync(coro):
+    """Run a coroutine to completion from synchronous code.
+
+    The coroutine runs on the home loop while it is running (see
+    ``set_home_loop``), so synchronous wrappers share the server's window pool
+    and observers; otherwise on the shared runner's background loop. Either
+    way it reuses the same workers as async callers.
+
+    Raises:
+        RuntimeError: if called from the loop the coroutine would run on
+    """
+    loop = _home_loop
+    if loop is None or loop.is_closed() or not loop.is_running():
+        loop = get_runner()._ensure_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("run_sync called from the event loop it would block; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+async def run_script_async(
+    script: Script, args: Sequence[str] = (), timeout: Optional[float] = None, spawn: bool = False,
+    chunked: bool = False,
+) -> subprocess.CompletedProcess:
+    """Run an AppleScript through the shared runner without blocking the event loop"""
+    return await get_runner().run_async(script, args, timeout, spawn, chunked)
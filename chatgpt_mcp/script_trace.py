@@ -0,0 +1,208 @@
+"""
+Tracing of script calls, and replay of a recorded trace.
+
+With CHATGPT_MCP_TRACE set, every script the runner executes is appended to a
+rotating JSONL file: the script's name and hash, its arguments, how long it
+took, how it ended, its exit status, the size of its output and the output
+itself. Traces therefore contain prompts and responses. Calls that timed out
+or were cancelled (their worker or process killed) are recorded too, with
+their status and without output.
+
+With CHATGPT_MCP_REPLAY set, no script is executed at all: each call is
+answered from a trace, taking as long as it originally did. Calls are matched
+on script hash and arguments and served in recording order, so a probe polled
+while a response was generated sees the same sequence of outputs it saw on the
+Mac. Arguments that are fractional seconds (wait budgets, timeouts) differ
+from run to run, so they are matched as any number of seconds. A session
+captured on macOS can then be replayed on any platform to profile the Python
+side or reproduce a polling pathology.
+
+Configuration (environment variables):
+    CHATGPT_MCP_TRACE              JSONL file to record script calls to
+    CHATGPT_MCP_TRACE_MAX_BYTES    size at which the file is rotated (50 MB)
+    CHATGPT_MCP_TRACE_BACKUPS      rotated files kept, as FILE.1, FILE.2... (5)
+    CHATGPT_MCP_REPLAY             trace file to answer script calls from
+    CHATGPT_MCP_REPLAY_SPEED       replay speed factor (1: original timings)
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import subprocess
+import time
+from collections import deque
+from logging.handlers import RotatingFileHandler
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple, Union
+
+try:
+    from chatgpt_mcp.script_registry import RegisteredScript
+except ImportError:
+    from script_registry import RegisteredScript
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_BACKUPS = 5
+
+# How a recorded call ended
+COMPLETED = "completed"
+TIMEOUT = "timeout"
+CANCELLED = "cancelled"
+
+# Arguments written as str(float): wait budgets and timeouts
+SECONDS_ARG = re.compile(r"-?\d+\.\d+(e[-+]?\d+)?")
+
+
+def script_identity(script: Union[str, RegisteredScript]) -> Tuple[str, str]:
+    """Name and platform-independent hash of a script's source"""
+    if isinstance(script, RegisteredScript):
+        name, source = script.name, script.source
+    else:
+        name, source = "", script
+    return name, hashlib.sha256(source.encode()).hexdigest()[:16]
+
+
+def replay_key(digest: str, args: Sequence[str]) -> Tuple[str, Tuple[str, ...]]:
+    """Key a call is matched on when replayed: script hash and arguments, seconds normalized"""
+    return digest, tuple("<seconds>" if SECONDS_ARG.fullmatch(arg) else arg for arg in args)
+
+
+class ScriptTracer:
+    """Appends one JSON line per script call to a rotating file"""
+
+    def __init__(self, path: str, max_bytes: Optional[int] = None, backups: Optional[int] = None):
+        if max_bytes is None:
+            max_bytes = int(os.environ.get("CHATGPT_MCP_TRACE_MAX_BYTES", DEFAULT_MAX_BYTES))
+        if backups is None:
+            backups = int(os.environ.get("CHATGPT_MCP_TRACE_BACKUPS", DEFAULT_BACKUPS))
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+        self._handler.setFormatter(logging.Formatter("%(message)s"))
+        self.stats = {"recorded": 0}
+
+    def record(self, script: Union[str, RegisteredScript], args: Sequence[str], duration: float,
+               result: Optional[subprocess.CompletedProcess], status: str = COMPLETED):
+        """Write one call; ``result`` is None when the call timed out or was cancelled"""
+        name, digest = script_identity(script)
+        entry: Dict[str, Any] = {
+            "time": time.time(),
+            "name": name,
+            "hash": digest,
+            "args": list(args),
+            "duration": round(duration, 6),
+            "status": status,
+        }
+        if status == TIMEOUT:
+            entry["timeout"] = True
+        if result is not None:
+            # Chunked output (see ScriptRunner.run_async) is recorded as one string
+            stdout = result.stdout if isinstance(result.stdout, str) else "".join(result.stdout)
+            entry.update({
+                "returncode": result.returncode,
+                "stdout_bytes": len(stdout.encode()),
+                "stderr_bytes": len(result.stderr.encode()),
+                "stdout": stdout,
+                "stderr": result.stderr,
+            })
+        # The handler takes its own lock and rotates the file when needed
+        self._handler.handle(logging.makeLogRecord({"msg": json.dumps(entry, ensure_ascii=False)}))
+        self.stats["recorded"] += 1
+
+    def close(self):
+        self._handler.close()
+
+
+def trace_files(path: str) -> List[str]:
+    """A trace and its rotated backups, oldest first"""
+    backups = []
+    index = 1
+    while os.path.exists(f"{path}.{index}"):
+        backups.append(f"{path}.{index}")
+        index += 1
+    files = list(reversed(backups))
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+
+def load_trace(path: str) -> List[Dict[str, Any]]:
+    """All recorded calls, in recording order"""
+    entries = []
+    for filename in trace_files(path):
+        with open(filename, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    entries.append(json.loads(line))
+    return entries
+
+
+class TraceReplay:
+    """Answers script calls from a recorded trace with the recorded timings"""
+
+    def __init__(self, path: str, speed: Optional[float] = None):
+        if speed is None:
+            speed = float(os.environ.get("CHATGPT_MCP_REPLAY_SPEED", "1"))
+        self.speed = speed
+        self._calls: Dict[Tuple[str, Tuple[str, ...]], Deque[Dict[str, Any]]] = {}
+        self._last: Dict[Tuple[str, Tuple[str, ...]], Dict[str, Any]] = {}
+        entries = load_trace(path)
+        for entry in entries:
+            self._calls.setdefault(replay_key(entry["hash"], entry["args"]), deque()).append(entry)
+        self.stats = {"recorded": len(entries), "served": 0, "repeated": 0, "missing": 0, "cancelled": 0}
+        logger.info(f"Replaying {len(entries)} script calls from {path}")
+
+    def _next(self, digest: str, args: Sequence[str]) -> Optional[Dict[str, Any]]:
+        key = replay_key(digest, args)
+        queue = self._calls.get(key)
+        if queue:
+            entry = self._last[key] = queue.popleft()
+            return entry
+        # More calls than were recorded: repeat the last answer
+        entry = self._last.get(key)
+        if entry is not None:
+            self.stats["repeated"] += 1
+        return entry
+
+    async def serve(self, script: Union[str, RegisteredScript], args: Sequence[str]) -> subprocess.CompletedProcess:
+        """The recorded result of a call, after its recorded duration.
+
+        A call that was cancelled when it was recorded never returned; its
+        caller gave up after the recorded duration and normally cancels the
+        replayed call at about the same time. If it does not, the call fails.
+
+        Raises:
+            subprocess.TimeoutExpired: if the recorded call timed out
+        """
+        name, digest = script_identity(script)
+        cmd = ["osascript", name or "-e", *args]
+        entry = self._next(digest, args)
+        if entry is None:
+            self.stats["missing"] += 1
+            logger.warning(f"No recorded call of {name or digest} with arguments {list(args)}")
+            return subprocess.CompletedProcess(cmd, 1, "", "not in the replayed trace")
+        self.stats["served"] += 1
+        if self.speed > 0:
+            await asyncio.sleep(entry["duration"] / self.speed)
+        status = entry.get("status", TIMEOUT if entry.get("timeout") else COMPLETED)
+        if status == TIMEOUT:
+            raise subprocess.TimeoutExpired(cmd, entry["duration"])
+        if status == CANCELLED:
+            self.stats["cancelled"] += 1
+            return subprocess.CompletedProcess(cmd, -1, "", "cancelled in the replayed trace")
+        return subprocess.CompletedProcess(cmd, entry["returncode"], entry["stdout"], entry["stderr"])
+
+
+def tracer_from_env() -> Optional[ScriptTracer]:
+    path = os.environ.get("CHATGPT_MCP_TRACE")
+    return ScriptTracer(path) if path else None
+
+
+def replay_from_env() -> Optional[TraceReplay]:
+    path = os.environ.get("CHATGPT_MCP_REPLAY")
+    return TraceReplay(path) if path else None
@@ -0,0 +1,199 @@
+"""
+Long-lived session with the ChatGPT app.
+
+Before every exchange the tools used to check that the app was running (one
+script), activate it (another script and a fixed one-second sleep) and build
+fresh automation helpers. The ``ChatGPTSession`` created at server startup
+keeps that state instead:
+
+- a background heartbeat runs one cheap status script every few seconds and
+  records whether the app is running, whether it is frontmost and how many
+  windows it has;
+- ``ensure_ready()`` trusts a recent sample, checks again otherwise, and only
+  launches or activates the app when the sample says it is needed;
+- the scripts that type or click bring the app forward themselves and wait
+  until it is frontmost before the first keystroke or click; if it does not
+  come forward they send nothing and fail. A stale "frontmost" sample
+  therefore only moves the activation wait into that script, and never sends
+  input to another app.
+
+Configuration (environment variables):
+    CHATGPT_MCP_HEARTBEAT  seconds between heartbeats (2); 0 disables it
+"""
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from chatgpt_mcp.button_helper import AsyncChatGPTButtonHelper
+from chatgpt_mcp.chatgpt_automation import LAUNCH_SCRIPT, AsyncChatGPTAutomation
+from chatgpt_mcp.deadline import detached
+from chatgpt_mcp.readiness import LatencyBudget
+from chatgpt_mcp.script_registry import register
+from chatgpt_mcp.script_runner import run_script_async
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEARTBEAT = 2.0
+
+# Prints "running frontmost windows", e.g. "true false 1"
+SESSION_STATUS_SCRIPT = register("session_status", '''
+tell application "System Events"
+    if not (exists process "ChatGPT") then return "false false 0"
+    tell process "ChatGPT"
+        return "true " & (frontmost as text) & " " & ((count of windows) as text)
+    end tell
+end tell
+''')
+
+
+@dataclass(slots=True)
+class AppStatus:
+    """One sample of the app's state"""
+    running: bool
+    frontmost: bool
+    windows: int
+    sampled_at: float
+
+
+def parse_status(output: str) -> Optional[AppStatus]:
+    """Parse the session status script's output"""
+    parts = output.split()
+    if len(parts) != 3 or not parts[2].isdigit():
+        return None
+    return AppStatus(parts[0] == "true", parts[1] == "true", int(parts[2]), time.monotonic())
+
+
+class ChatGPTSession:
+    """Tracks the app's liveness and focus across requests"""
+
+    def __init__(self, heartbeat: Optional[float] = None):
+        if heartbeat is None:
+            heartbeat = float(os.environ.get("CHATGPT_MCP_HEARTBEAT", DEFAULT_HEARTBEAT))
+        self.heartbeat = heartbeat
+        # Samples younger than this are trusted without checking again
+        self.max_age = 2 * heartbeat if heartbeat > 0 else 0.0
+        self.automation = AsyncChatGPTAutomation()
+        self.button_helper = AsyncChatGPTButtonHelper()
+        self.status: Optional[AppStatus] = None
+        self.stats = {"heartbeats": 0, "checks": 0, "launches": 0, "activations": 0, "skipped": 0}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the heartbeat on the running event loop"""
+        if self.heartbeat > 0 and (self._task is None or self._task.done()):
+            self._task = detached(self._beat())
+
+    async def stop(self):
+        """Stop the heartbeat"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def refresh(self) -> Optional[AppStatus]:
+        """Sample the app's state now"""
+        result = await run_script_async(SESSION_STATUS_SCRIPT)
+        status = parse_status(result.stdout) if result.returncode == 0 else None
+        if status is not None:
+            self.status = status
+        return status
+
+    def fresh(self) -> bool:
+        """Whether the last sample is recent enough to act on"""
+        return self.status is not None and time.monotonic() - self.status.sampled_at <= self.max_age
+
+    async def ensure_ready(self, budget: Optional[LatencyBudget] = None):
+        """Make sure the app is running and in front, doing only what is needed.
+
+        Args:
+            budget: The request's latency budget, charged for activation
+
+        Raises:
+            Exception: if the app cannot be reached or launched
+        """
+        try:
+            if not self.fresh():
+                self.stats["checks"] += 1
+                await self.refresh()
+            if self.status is None or not self.status.running:
+                logger.info("ChatGPT app is not running, attempting to launch...")
+                self.stats["launches"] += 1
+                result = await run_script_async(LAUNCH_SCRIPT)
+                if result.returncode != 0:
+                    raise Exception("Could not activate ChatGPT app. Please start it manually.")
+                await self.refresh()
+            if self.status is not None and self.status.running and self.status.frontmost:
+                self.stats["skipped"] += 1
+                return
+            await self.activate(budget)
+        except Exception as e:
+            raise Exception(f"Cannot access ChatGPT app. Please make sure ChatGPT is installed and properly configured. Error: {str(e)}")
+
+    async def activate(self, budget: Optional[LatencyBudget] = None):
+        """Bring the app forward unconditionally and wait until it is frontmost"""
+        self.stats["activations"] += 1
+        started = time.monotonic()
+        frontmost = await self.automation.activate_chatgpt(budget.remaining("activate") if budget else None)
+        if budget is not None:
+            budget.charge("activate", time.monotonic() - started, timed_out=not frontmost)
+        self.mark_frontmost()
+
+    def mark_frontmost(self):
+        """Record that a script just brought the app forward"""
+        if self.status is not None:
+            self.status.running = True
+            self.status.frontmost = True
+            self.status.sampled_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Last sample, its age and the counters"""
+        status = self.status
+        return {
+            "running": status.running if status else None,
+            "frontmost": status.frontmost if status else None,
+            "windows": status.windows if status else None,
+            "age": time.monotonic() - status.sampled_at if status else None,
+            "heartbeat": self.heartbeat,
+            **self.stats,
+        }
+
+    async def _beat(self):
+        while True:
+            try:
+                await self.refresh()
+                self.stats["heartbeats"] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.debug(f"Heartbeat failed: {e}")
+            await asyncio.sleep(self.heartbeat)
+
+
+_session: Optional[ChatGPTSession] = None
+
+
+def get_session() -> ChatGPTSession:
+    """Return the session shared by all tools"""
+    global _session
+    if _session is None:
+        _session = ChatGPTSession()
+    return _session
+
+
+@asynccontextmanager
+async def session_lifespan(server):
+    """FastMCP lifespan: warm the session up at startup and stop its heartbeat on exit"""
+    session = get_session()
+    session.start()
+    try:
+        yield {}
+    finally:
+        await session.stop()
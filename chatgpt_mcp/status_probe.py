@@ -0,0 +1,237 @@
+"""
+Combined status and content probe.
+
+A single script invocation reports the state of the action button, a cheap
+fingerprint of the latest message (number of text elements, length and
+checksum of the last one) and, optionally, the conversation text. Polling
+loops can decide whether generation has finished and fetch the answer in the
+same round trip instead of running the button probe and the full extraction
+script separately.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from chatgpt_mcp.message_scope import MESSAGE_HANDLERS, get_scope
+from chatgpt_mcp.metrics import timed
+from chatgpt_mcp.script_registry import register
+from chatgpt_mcp.script_runner import run_script_async
+from chatgpt_mcp.ui_locator import (
+    ACTION_BUTTON, ELEMENT_HANDLERS, ButtonInfo, get_locator, is_action_button, parse_element,
+)
+from chatgpt_mcp.window_pool import window_read_lock
+
+logger = logging.getLogger(__name__)
+
+MODE_STATE = "state"
+MODE_FINGERPRINT = "fingerprint"
+MODE_TEXT = "text"
+
+# argv: window index, mode ("state", "fingerprint" or "text"), cached element
+# path of the action button, conversation scroll area path ("" if unknown) and
+# first message index to read from it
+# Output: line 1 is the button element record (or null), line 2 the fingerprint
+# "count length checksum messageCount" (empty in state mode; messageCount is -1
+# when the whole window was walked), the rest the static texts.
+STATUS_PROBE_SCRIPT = register("status_probe", r'''
+on run argv
+    set windowIndex to (item 1 of argv) as integer
+    set probeMode to item 2 of argv
+    set actionPath to ""
+    if (count of argv) > 2 then set actionPath to item 3 of argv
+    set conversationPath to ""
+    set firstIndex to 0
+    if (count of argv) > 4 then
+        set conversationPath to item 4 of argv
+        set firstIndex to (item 5 of argv) as integer
+    end if
+    set messageCount to -1
+    set buttonInfo to "null"
+    set fingerprint to ""
+    set allTexts to {}
+
+    tell application "System Events"
+        tell process "ChatGPT"
+            if not (exists window windowIndex) then
+                return "null"
+            end if
+            set win to window windowIndex
+        end tell
+    end tell
+
+    -- Action button: the cached path if it still points at a large button
+    if actionPath is not "" then
+        try
+            set elem to my resolvePath(win, actionPath)
+            tell application "System Events"
+                set btnSize to size of elem
+                set isLarge to (role of elem is "AXButton") and (item 1 of btnSize) > 45 and (item 2 of btnSize) > 45
+            end tell
+            if isLarge then set buttonInfo to my describe(elem, actionPath)
+        end try
+    end if
+
+    -- Texts: only the latest messages when the conversation area is known
+    if probeMode is not "state" and conversationPath is not "" then
+        try
+            set {messageCount, firstRead, allTexts} to my tailTexts(win, conversationPath, firstIndex)
+        on error
+            set messageCount to -1
+            set allTexts to {}
+        end try
+    end if
+
+    tell application "System Events"
+        tell process "ChatGPT"
+            tell window windowIndex
+                -- Otherwise the rightmost button larger than 45px in the split group
+                if buttonInfo is "null" then
+                    set maxX to -1
+                    try
+                        repeat with grp in UI elements of UI element 1 of group 1
+                            if role of grp is "AXGroup" then
+                                repeat with elem in UI elements of grp
+                                    try
+                                        if role of elem is "AXButton" then
+                                            set btnSize to size of elem
+                                            if (item 1 of btnSize) > 45 and (item 2 of btnSize) > 45 then
+                                                set btnPos to position of elem
+                                                if (item 1 of btnPos) > maxX then
+                                                    set maxX to item 1 of btnPos
+                                                    set buttonInfo to my describe(elem, "")
+                                                end if
+                                            end if
+                                        end if
+                                    end try
+                                end repeat
+                            end if
+                        end repeat
+                    end try
+                end if
+
+                if probeMode is not "state" and messageCount < 0 then
+                    repeat with elem in entire contents
+                        try
+                            if class of elem is static text then
+                                set textContent to value of elem
+                                if textContent is missing value then
+                                    set textContent to description of elem
+                                end if
+                                if textContent is not missing value then
+                                    set textStr to textContent as text
+                                    if length of textStr > 0 then
+                                        set end of allTexts to textStr
+                                    end if
+                                end if
+                            end if
+                        end try
+                    end repeat
+                end if
+            end tell
+        end tell
+    end tell
+
+    if probeMode is not "state" then
+        set lastText to ""
+        if (count of allTexts) > 0 then set lastText to item -1 of allTexts
+        set fingerprint to ((count of allTexts) as text) & " " & ((length of lastText) as text) & " " & ¬
+            ((my checksum(lastText)) as text) & " " & (messageCount as text)
+    end if
+
+    set probeOutput to buttonInfo & linefeed & fingerprint
+    if probeMode is "text" and (count of allTexts) > 0 then
+        set AppleScript's text item delimiters to linefeed
+        set probeOutput to probeOutput & linefeed & (allTexts as text)
+        set AppleScript's text item delimiters to ""
+    end if
+    return probeOutput
+end run
+
+-- Adler-style checksum of the last 256 characters
+on checksum(txt)
+    set n to length of txt
+    if n = 0 then return 0
+    if n > 256 then set txt to text (n - 255) thru n of txt
+    set codes to id of txt
+    if class of codes is integer then set codes to {codes}
+    set total to 0
+    repeat with c in codes
+        set total to (total * 31 + c) mod 65521
+    end repeat
+    return total
+end checksum
+''' + ELEMENT_HANDLERS + MESSAGE_HANDLERS)
+
+
+@dataclass
+class ProbeResult:
+    """What a single status probe observed"""
+    button: Optional[ButtonInfo]
+    fingerprint: Optional[Tuple[int, int, int]] = None
+    texts: Optional[List[str]] = None
+    # Messages in the conversation, if the texts were read from its tail
+    message_count: Optional[int] = None
+
+    @property
+    def state(self) -> Optional[str]:
+        return self.button.state if self.button else None
+
+
+def parse_probe_output(output: str, mode: str) -> ProbeResult:
+    """Parse the output of the status probe script"""
+    lines = output.split('\n', 2)
+    element = parse_element(lines[0])
+    button = ButtonInfo.from_element(element) if is_action_button(element) else None
+    fingerprint = None
+    texts = None
+    message_count = None
+    if len(lines) > 1 and lines[1].strip():
+        try:
+            count, length, checksum, messages = (int(v) for v in lines[1].split())
+            fingerprint = (count, length, checksum)
+            if messages >= 0:
+                message_count = messages
+        except ValueError:
+            logger.debug(f"Unexpected probe fingerprint: {lines[1]!r}")
+    if mode == MODE_TEXT:
+        texts = lines[2].split('\n') if len(lines) > 2 and lines[2] else []
+    return ProbeResult(button, fingerprint, texts, message_count)
+
+
+@timed("probe_status")
+async def probe_status(window: int = 1, mode: str = MODE_FINGERPRINT) -> Optional[ProbeResult]:
+    """
+    Probe button state and latest-message fingerprint in one script call.
+    
+    The action button is read through the element path cached by the
+    window's UILocator, falling back to a scan of the split group. Texts come
+    from the latest messages of the conversation (see message_scope) when its
+    scroll area is known, otherwise from a walk of the whole window.
+
+    Args:
+        window: Index of the ChatGPT window
+        mode: 'state' (button only), 'fingerprint' or 'text' (fingerprint and texts)
+
+    Returns:
+        ProbeResult, or None if the probe failed
+    """
+    action_path = get_locator(window).path(ACTION_BUTTON) or ""
+    scope = get_scope(window)
+    args = [str(window), mode, action_path, scope.conversation_path or "", str(scope.first_index())]
+    try:
+        async with window_read_lock():
+            result = await run_script_async(STATUS_PROBE_SCRIPT, args)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.debug(f"Status probe failed: {e}")
+        return None
+    if result.returncode != 0:
+        logger.debug(f"Status probe failed: {result.stderr.strip()}")
+        return None
+    probe = parse_probe_output(result.stdout.rstrip('\n'), mode)
+    if probe.message_count is not None:
+        scope.observe(probe.message_count)
+    return probe
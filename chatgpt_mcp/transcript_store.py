@@ -0,0 +1,277 @@
+"""
+Append-only local store of every answer returned by ChatGPT.
+
+Each answered prompt is recorded with its response, when it was asked and
+answered, how long it took, the conversation it belongs to and the window
+that served it, in an SQLite file with an FTS5 index over prompts and
+responses. Past answers can then be searched (ranked with BM25) or the last
+one read back without touching the UI.
+
+Recording never blocks a request: ``record`` only appends to an in-memory
+batch, and a background task writes the batch in one transaction from a
+worker thread every CHATGPT_MCP_HISTORY_FLUSH seconds (and when the server
+stops). Reads flush the pending batch first, so they see every answer.
+
+If the SQLite library lacks FTS5, search falls back to substring matching,
+most recent first.
+
+Configuration (environment variables):
+    CHATGPT_MCP_HISTORY_DB     SQLite file (default: history.sqlite3 in the
+                               user's application data directory; ``off``
+                               disables recording)
+    CHATGPT_MCP_HISTORY_FLUSH  seconds between batched writes (1)
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from chatgpt_mcp.deadline import detached
+from chatgpt_mcp.response_cache import cache_key
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS transcripts ("
+    "id INTEGER PRIMARY KEY, prompt TEXT NOT NULL, response TEXT NOT NULL, prompt_key TEXT, "
+    "asked_at REAL, answered_at REAL, latency REAL, conversation TEXT, window INTEGER)",
+    "CREATE INDEX IF NOT EXISTS transcripts_prompt_key ON transcripts (prompt_key)",
+]
+
+FTS_SCHEMA = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS transcripts_fts USING fts5("
+    "prompt, response, content='transcripts', content_rowid='id')",
+    # The store is append-only, so inserts are the only changes to mirror
+    "CREATE TRIGGER IF NOT EXISTS transcripts_fts_insert AFTER INSERT ON transcripts BEGIN "
+    "INSERT INTO transcripts_fts (rowid, prompt, response) VALUES (new.id, new.prompt, new.response); END",
+]
+
+COLUMNS = "id, prompt, response, asked_at, answered_at, latency, conversation, window"
+
+# prompt, response, prompt_key, asked_at, answered_at, latency, conversation, window
+Entry = Tuple[str, str, str, float, float, float, Optional[str], int]
+
+
+def default_db_path() -> str:
+    app_support = os.path.expanduser("~/Library/Application Support")
+    if os.path.isdir(app_support):
+        return os.path.join(app_support, "chatgpt-mcp", "history.sqlite3")
+    xdg = os.environ.get("XDG_DATA_HOME", os.path.expanduser("~/.local/share"))
+    return os.path.join(xdg, "chatgpt-mcp", "history.sqlite3")
+
+
+def fts_query(text: str) -> str:
+    """FTS5 query matching every word of ``text``, with its syntax characters quoted"""
+    return " ".join('"' + word.replace('"', '""') + '"' for word in text.split())
+
+
+def _row(row: Tuple) -> Dict[str, Any]:
+    keys = [column.strip() for column in COLUMNS.split(",")]
+    return dict(zip(keys, row))
+
+
+class TranscriptStore:
+    """SQLite transcript store with batched writes"""
+
+    def __init__(self, db_path: Optional[str] = None, flush_interval: Optional[float] = None):
+        if db_path is None:
+            db_path = os.environ.get("CHATGPT_MCP_HISTORY_DB") or default_db_path()
+        if flush_interval is None:
+            flush_interval = float(os.environ.get("CHATGPT_MCP_HISTORY_FLUSH", DEFAULT_FLUSH_INTERVAL))
+        self.db_path = None if db_path.lower() == "off" else db_path
+        self.flush_interval = flush_interval
+        self.fts: Optional[bool] = None
+
+        self._pending: List[Entry] = []
+        self._flusher: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self.stats = {"recorded": 0, "flushes": 0, "written": 0, "errors": 0, "searches": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.db_path is not None
+
+    def record(self, prompt: str, response: str, asked_at: float, answered_at: Optional[float] = None,
+               conversation: Optional[str] = None, window: int = 1):
+        """Queue one answered prompt for writing; returns without any I/O.
+
+        Args:
+            prompt: The prompt as sent by the client
+            response: The answer returned to the client
+            asked_at: Wall-clock time the prompt was received
+            answered_at: Wall-clock time the answer was read (default: now)
+            conversation: Id of the conversation the exchange belongs to
+            window: Index of the ChatGPT window that answered
+        """
+        if not self.enabled:
+            return
+        if answered_at is None:
+            answered_at = time.time()
+        self._pending.append((prompt, response, cache_key(prompt), asked_at, answered_at,
+                              answered_at - asked_at, conversation, window))
+        self.stats["recorded"] += 1
+        if self._flusher is None or self._flusher.done():
+            self._flusher = detached(self._flush_later())
+
+    async def flush(self):
+        """Write every pending entry"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, []
+            await asyncio.to_thread(self._write, batch)
+
+    async def close(self):
+        """Write pending entries and close the database"""
+        if self._flusher is not None and not self._flusher.done():
+            self._flusher.cancel()
+        if self.enabled:
+            await self.flush()
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    async def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Past exchanges matching every word of ``query``, best match first.
+
+        Returns:
+            Dicts with id, prompt, response, asked_at, answered_at, latency,
+            conversation, window, and the matched ``snippet``
+        """
+        if not self.enabled or not query.strip():
+            return []
+        await self.flush()
+        self.stats["searches"] += 1
+        return await asyncio.to_thread(self._search, query, max(1, limit))
+
+    async def last_response(self, prompt: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """The most recent exchange, or the most recent one for ``prompt`` (compared normalized)"""
+        if not self.enabled:
+            return None
+        key = cache_key(prompt) if prompt is not None else None
+        for entry in reversed(self._pending):
+            if key is None or entry[2] == key:
+                return _row((None, entry[0], entry[1], *entry[3:]))
+        await self.flush()
+        return await asyncio.to_thread(self._last, key)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Database path, search mode, pending entries and counters"""
+        return {"db": self.db_path, "fts": self.fts, "pending": len(self._pending), **self.stats}
+
+    # -- internals -------------------------------------------------------
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            directory = os.path.dirname(os.path.abspath(self.db_path))
+            os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            for statement in SCHEMA:
+                self._db.execute(statement)
+            try:
+                for statement in FTS_SCHEMA:
+                    self._db.execute(statement)
+                self.fts = True
+            except sqlite3.OperationalError as e:
+                logger.info(f"FTS5 not available, history search uses substring matching: {e}")
+                self.fts = False
+            self._db.commit()
+        return self._db
+
+    def _write(self, batch: List[Entry]):
+        try:
+            with self._db_lock:
+                db = self._connect()
+                db.executemany(
+                    "INSERT INTO transcripts (prompt, response, prompt_key, asked_at, answered_at, latency, "
+                    "conversation, window) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    batch,
+                )
+                db.commit()
+            self.stats["flushes"] += 1
+            self.stats["written"] += len(batch)
+        except sqlite3.Error as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Failed to write {len(batch)} transcript entries: {e}")
+
+    def _search(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        try:
+            with self._db_lock:
+                db = self._connect()
+                if self.fts:
+                    rows = db.execute(
+                        f"SELECT {', '.join('t.' + c.strip() for c in COLUMNS.split(','))}, "
+                        "snippet(transcripts_fts, -1, '[', ']', '...', 16) "
+                        "FROM transcripts_fts JOIN transcripts t ON t.id = transcripts_fts.rowid "
+                        "WHERE transcripts_fts MATCH ? ORDER BY bm25(transcripts_fts) LIMIT ?",
+                        (fts_query(query), limit),
+                    ).fetchall()
+                else:
+                    words = query.split()
+                    where = " AND ".join(["(prompt LIKE ? OR response LIKE ?)"] * len(words))
+                    params = [f"%{word}%" for word in words for _ in range(2)]
+                    rows = db.execute(
+                        f"SELECT {COLUMNS}, NULL FROM transcripts WHERE {where} ORDER BY id DESC LIMIT ?",
+                        (*params, limit),
+                    ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"History search failed: {e}")
+            return []
+        results = []
+        for row in rows:
+            result = _row(row[:-1])
+            result["snippet"] = row[-1] if row[-1] is not None else result["response"][:200]
+            results.append(result)
+        return results
+
+    def _last(self, key: Optional[str]) -> Optional[Dict[str, Any]]:
+        try:
+            with self._db_lock:
+                db = self._connect()
+                if key is None:
+                    row = db.execute(f"SELECT {COLUMNS} FROM transcripts ORDER BY id DESC LIMIT 1").fetchone()
+                else:
+                    row = db.execute(
+                        f"SELECT {COLUMNS} FROM transcripts WHERE prompt_key = ? ORDER BY id DESC LIMIT 1",
+                        (key,),
+                    ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"History lookup failed: {e}")
+            return None
+        return _row(row) if row is not None else None
+
+
+_store: Optional[TranscriptStore] = None
+
+
+def get_store() -> TranscriptStore:
+    """Return the transcript store shared by all tools"""
+    global _store
+    if _store is None:
+        _store = TranscriptStore()
+    return _store
+
+
+@asynccontextmanager
+async def transcript_lifespan():
+    """Write the pending transcript entries when the block exits"""
+    try:
+        yield get_store()
+    finally:
+        await get_store().close()
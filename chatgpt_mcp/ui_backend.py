@@ -0,0 +1,510 @@
+"""
+Backends for the scripts that read the ChatGPT window.
+
+A backend runs the scripts behind the UI queries (locate every control, query
+one element, scan for the action button) and turns their output into typed
+results (``UIElement``, ``ButtonInfo``). Callers such as ``UILocator`` only see
+the typed results, so backends can be swapped without touching them.
+
+Two backends are provided:
+
+- ``AppleScriptBackend`` (default): AppleScript that prints tab-separated
+  element records, or pseudo-JSON for the action button scan, parsed with
+  string splitting and regular expressions.
+- ``JXABackend``: JavaScript for Automation (``osascript -l JavaScript``).
+  Filtering and sorting happen in the script, which returns one
+  ``JSON.stringify`` document read with a single ``json.loads``. Text
+  containing quotes, tabs or newlines round-trips unchanged.
+
+Configuration (environment variables):
+    CHATGPT_MCP_UI_BACKEND: ``applescript`` (default) or ``jxa``
+"""
+
+import json
+import logging
+import os
+import re
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Tuple
+
+from chatgpt_mcp.script_registry import RegisteredScript, register
+from chatgpt_mcp.script_runner import run_script_async
+from chatgpt_mcp.ui_locator import (
+    LOCATE_CONTROLS_SCRIPT, QUERY_ELEMENT_SCRIPT, ButtonInfo, Geometry, LocatorError, UIElement,
+    parse_element, parse_geometry, state_from_help,
+)
+from chatgpt_mcp.window_pool import window_read_lock
+
+logger = logging.getLogger(__name__)
+
+
+# Full scan of the split group; used when the cached locator cannot be run
+FIND_ACTION_BUTTON_SCRIPT = register("find_action_button", '''
+on run argv
+    set windowIndex to (item 1 of argv) as integer
+    tell application "System Events"
+        tell process "ChatGPT"
+            tell window windowIndex
+                tell group 1
+                    tell UI element 1  -- Split group
+                        set largeButtons to {}
+                        
+                        repeat with grp in UI elements
+                            if role of grp is "AXGroup" then
+                                repeat with elem in UI elements of grp
+                                    try
+                                        if role of elem is "AXButton" then
+                                            set btnSize to size of elem
+                                            
+                                            -- Look for large buttons (45+ pixels)
+                                            if (item 1 of btnSize) > 45 and (item 2 of btnSize) > 45 then
+                                                set btnPos to position of elem
+                                                set btnInfo to "{"
+                                                set btnInfo to btnInfo & "\\"x\\":" & (item 1 of btnPos) & ","
+                                                set btnInfo to btnInfo & "\\"y\\":" & (item 2 of btnPos) & ","
+                                                set btnInfo to btnInfo & "\\"width\\":" & (item 1 of btnSize) & ","
+                                                set btnInfo to btnInfo & "\\"height\\":" & (item 2 of btnSize) & ","
+                                                
+                                                -- Get help text (contains state info)
+                                                try
+                                                    set helpText to help of elem
+                                                    set btnInfo to btnInfo & "\\"help\\":\\"" & helpText & "\\","
+                                                on error
+                                                    set btnInfo to btnInfo & "\\"help\\":null,"
+                                                end try
+                                                
+                                                -- Get enabled state
+                                                set btnInfo to btnInfo & "\\"enabled\\":" & (enabled of elem) & ","
+                                                
+                                                -- Get description
+                                                try
+                                                    set btnDesc to description of elem
+                                                    set btnInfo to btnInfo & "\\"description\\":\\"" & btnDesc & "\\""
+                                                on error
+                                                    set btnInfo to btnInfo & "\\"description\\":null"
+                                                end try
+                                                
+                                                set btnInfo to btnInfo & "}"
+                                                set end of largeButtons to btnInfo
+                                            end if
+                                        end if
+                                    end try
+                                end repeat
+                            end if
+                        end repeat
+                        
+                        -- Return the rightmost large button (typically our action button)
+                        if (count of largeButtons) > 0 then
+                            -- If multiple large buttons, return the rightmost one
+                            set rightmostButton to item 1 of largeButtons
+                            set maxX to 0
+                            
+                            repeat with btnStr in largeButtons
+                                -- Extract X position
+                                set xStart to offset of "\\"x\\":" in btnStr
+                                set xEnd to offset of "," in (text (xStart + 5) thru -1 of btnStr)
+                                set xValue to (text (xStart + 5) thru (xStart + 3 + xEnd) of btnStr) as number
+                                
+                                if xValue > maxX then
+                                    set maxX to xValue
+                                    set rightmostButton to btnStr
+                                end if
+                            end repeat
+                            
+                            return rightmostButton
+                        else
+                            return "null"
+                        end if
+                    end tell
+                end tell
+            end tell
+        end tell
+    end tell
+end run
+''')
+
+
+def parse_button_info(output: str) -> Optional[ButtonInfo]:
+    """
+    Parse the pseudo-JSON printed by the find_action_button script.
+
+    Args:
+        output: Raw script output
+
+    Returns:
+        ButtonInfo, or None if no button was reported
+    """
+    button_str = output.strip()
+    if not button_str or button_str == "null":
+        return None
+
+    # Extract values using regex
+    x_match = re.search(r'"x":(\d+)', button_str)
+    y_match = re.search(r'"y":(\d+)', button_str)
+    width_match = re.search(r'"width":(\d+)', button_str)
+    height_match = re.search(r'"height":(\d+)', button_str)
+    help_match = re.search(r'"help":"([^"]*)"', button_str)
+    enabled_match = re.search(r'"enabled":(true|false)', button_str)
+    desc_match = re.search(r'"description":"([^"]*)"', button_str)
+
+    if not (x_match and y_match):
+        return None
+
+    help_text = help_match.group(1) if help_match else None
+    return ButtonInfo(
+        x=int(x_match.group(1)),
+        y=int(y_match.group(1)),
+        width=int(width_match.group(1)) if width_match else 0,
+        height=int(height_match.group(1)) if height_match else 0,
+        help=help_text,
+        enabled=enabled_match.group(1) == 'true' if enabled_match else False,
+        description=desc_match.group(1) if desc_match else None,
+        state=state_from_help(help_text),
+    )
+
+
+# JavaScript helpers shared by the JXA scripts. Element objects carry the same
+# fields as the AppleScript element records; paths are 1-based ``UI element``
+# indexes, so both backends cache interchangeable paths.
+JXA_HANDLERS = r'''
+var systemEvents = Application("System Events");
+
+function chatWindow(index) {
+    var proc = systemEvents.processes.byName("ChatGPT");
+    if (!proc.exists() || index < 1 || index > proc.windows.length) {
+        return null;
+    }
+    return proc.windows[index - 1];
+}
+
+function attribute(elem, name) {
+    try {
+        var value = elem[name]();
+        return value === undefined ? null : value;
+    } catch (e) {
+        return null;
+    }
+}
+
+function describe(elem, path) {
+    var position = elem.position();
+    var size = elem.size();
+    return {
+        role: elem.role(),
+        path: path,
+        x: position[0],
+        y: position[1],
+        width: size[0],
+        height: size[1],
+        help: attribute(elem, "help") || null,
+        enabled: attribute(elem, "enabled") === true,
+        description: attribute(elem, "description") || null
+    };
+}
+
+function tryDescribe(elem, path) {
+    try {
+        return describe(elem, path);
+    } catch (e) {
+        return null;
+    }
+}
+
+function geometry(win) {
+    var position = win.position();
+    var size = win.size();
+    return [position[0], position[1], size[0], size[1]];
+}
+
+function resolvePath(win, path) {
+    var elem = win;
+    path.split("/").forEach(function (index) {
+        elem = elem.uiElements[parseInt(index, 10) - 1];
+    });
+    return elem;
+}
+'''
+
+# argv: window index. Walks the window once; output:
+#   {"window": [x, y, width, height], "controls": {name: element}} or null
+JXA_LOCATE_CONTROLS_SCRIPT = register("jxa_locate_controls", r'''
+function run(argv) {
+    var win = chatWindow(parseInt(argv[0], 10));
+    if (!win) {
+        return "null";
+    }
+    var controls = {};
+    var actionX = -1;
+    var conversationWidth = -1;
+
+    function walk(elem, path, depth) {
+        if (depth > 10) {
+            return;
+        }
+        var kids = elem.uiElements();
+        for (var i = 0; i < kids.length; i++) {
+            var kid = kids[i];
+            var kidPath = path ? path + "/" + (i + 1) : String(i + 1);
+            var role = attribute(kid, "role") || "";
+            if (role === "AXButton") {
+                visitButton(kid, kidPath);
+            } else if (role === "AXTextArea") {
+                controls.input = controls.input || tryDescribe(kid, kidPath);
+            } else if (role !== "AXStaticText") {
+                if (role === "AXScrollArea") {
+                    visitScrollArea(kid, kidPath);
+                }
+                walk(kid, kidPath, depth + 1);
+            }
+        }
+    }
+
+    function visitButton(button, path) {
+        var record = tryDescribe(button, path);
+        if (!record) {
+            return;
+        }
+        // The action button is the rightmost button larger than 45 pixels
+        if (record.width > 45 && record.height > 45 && record.x > actionX) {
+            actionX = record.x;
+            controls.action = record;
+        }
+        if (!controls.newchat && [record.help, record.description].join(" ").indexOf("New chat") >= 0) {
+            controls.newchat = record;
+        }
+    }
+
+    // The conversation is the widest scroll area (the sidebar is narrower)
+    function visitScrollArea(area, path) {
+        var record = tryDescribe(area, path);
+        if (record && record.width > conversationWidth) {
+            conversationWidth = record.width;
+            controls.conversation = record;
+        }
+    }
+
+    walk(win, "", 0);
+    return JSON.stringify({window: geometry(win), controls: controls});
+}
+''' + JXA_HANDLERS, language="JavaScript")
+
+# argv: window index, element path. Output:
+#   {"window": [x, y, width, height], "element": element or null} or null
+JXA_QUERY_ELEMENT_SCRIPT = register("jxa_query_element", r'''
+function run(argv) {
+    var win = chatWindow(parseInt(argv[0], 10));
+    if (!win) {
+        return "null";
+    }
+    var found = {window: geometry(win), element: null};
+    if (argv[1]) {
+        try {
+            found.element = describe(resolvePath(win, argv[1]), argv[1]);
+        } catch (e) {
+            // Stale path: the element is gone
+        }
+    }
+    return JSON.stringify(found);
+}
+''' + JXA_HANDLERS, language="JavaScript")
+
+# argv: window index. Scans the split group like FIND_ACTION_BUTTON_SCRIPT and
+# returns the rightmost large button as an element, or null
+JXA_FIND_ACTION_BUTTON_SCRIPT = register("jxa_find_action_button", r'''
+function run(argv) {
+    var win = chatWindow(parseInt(argv[0], 10));
+    var candidates = [];
+    try {
+        win.groups[0].uiElements[0].uiElements().forEach(function (group) {
+            if (attribute(group, "role") !== "AXGroup") {
+                return;
+            }
+            group.uiElements().forEach(function (elem) {
+                if (attribute(elem, "role") !== "AXButton") {
+                    return;
+                }
+                var record = tryDescribe(elem, null);
+                if (record && record.width > 45 && record.height > 45) {
+                    candidates.push(record);
+                }
+            });
+        });
+    } catch (e) {
+        return "null";
+    }
+    candidates.sort(function (a, b) { return b.x - a.x; });
+    return JSON.stringify(candidates.length ? candidates[0] : null);
+}
+''' + JXA_HANDLERS, language="JavaScript")
+
+
+def element_from_json(data: Optional[Dict[str, Any]]) -> Optional[UIElement]:
+    """Build a UIElement from an element object written by the JXA ``describe``"""
+    if not data:
+        return None
+    try:
+        return UIElement(
+            role=data["role"],
+            path=data.get("path"),
+            x=int(data["x"]),
+            y=int(data["y"]),
+            width=int(data["width"]),
+            height=int(data["height"]),
+            help=data.get("help") or None,
+            enabled=data.get("enabled") is True,
+            description=data.get("description") or None,
+        )
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _load(output: str) -> Any:
+    try:
+        return json.loads(output)
+    except ValueError:
+        logger.debug(f"Unreadable JXA output: {output[:200]!r}")
+        return None
+
+
+def _geometry(data: Any) -> Optional[Geometry]:
+    try:
+        return tuple(int(v) for v in data["window"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class UIBackend(ABC):
+    """Runs the UI query scripts and parses their output into typed results.
+
+    Subclasses provide the three scripts and a parser for each; ``run`` is the
+    coroutine used to run a script (``run_script_async`` unless given). Every
+    script addresses the window by its index and runs under the window read
+    lock.
+    """
+
+    name = ""
+    locate_controls_script: RegisteredScript
+    query_element_script: RegisteredScript
+    find_action_button_script: RegisteredScript
+
+    def __init__(self, run=None):
+        self.run = run or run_script_async
+
+    async def locate_controls(self, window: int) -> Tuple[Optional[Geometry], Dict[str, UIElement]]:
+        """Resolve every control of a window with one traversal.
+
+        Returns:
+            The window geometry (None if the window is missing) and the
+            controls found, by name (ACTION_BUTTON, INPUT_FIELD, ...)
+        """
+        result = await self._run(self.locate_controls_script, [str(window)])
+        if result.returncode != 0:
+            raise LocatorError(result.stderr.strip() or "locate_controls failed")
+        return self.parse_controls(result.stdout)
+
+    async def query_element(self, window: int, path: str) -> Tuple[Optional[Geometry], Optional[UIElement]]:
+        """Read the window geometry and the element at a cached path ("" for none)"""
+        result = await self._run(self.query_element_script, [str(window), path])
+        if result.returncode != 0:
+            raise LocatorError(result.stderr.strip() or "query_element failed")
+        return self.parse_query(result.stdout)
+
+    async def find_action_button(self, window: int) -> Optional[ButtonInfo]:
+        """Scan the split group for the action button without the locator cache"""
+        result = await self._run(self.find_action_button_script, [str(window)])
+        if result.returncode != 0:
+            return None
+        return self.parse_button(result.stdout)
+
+    async def _run(self, script: RegisteredScript, args):
+        async with window_read_lock():
+            return await self.run(script, args)
+
+    @abstractmethod
+    def parse_controls(self, output: str) -> Tuple[Optional[Geometry], Dict[str, UIElement]]:
+        """Parse the locate_controls script's output"""
+
+    @abstractmethod
+    def parse_query(self, output: str) -> Tuple[Optional[Geometry], Optional[UIElement]]:
+        """Parse the query_element script's output"""
+
+    @abstractmethod
+    def parse_button(self, output: str) -> Optional[ButtonInfo]:
+        """Parse the find_action_button script's output"""
+
+
+class AppleScriptBackend(UIBackend):
+    """AppleScript printing tab-separated element records"""
+
+    name = "applescript"
+    locate_controls_script = LOCATE_CONTROLS_SCRIPT
+    query_element_script = QUERY_ELEMENT_SCRIPT
+    find_action_button_script = FIND_ACTION_BUTTON_SCRIPT
+
+    def parse_controls(self, output: str) -> Tuple[Optional[Geometry], Dict[str, UIElement]]:
+        lines = output.rstrip('\n').split('\n')
+        controls = {}
+        for line in lines[1:]:
+            name, _, record = line.partition('\t')
+            element = parse_element(record)
+            if element is not None:
+                controls[name] = element
+        return parse_geometry(lines[0]), controls
+
+    def parse_query(self, output: str) -> Tuple[Optional[Geometry], Optional[UIElement]]:
+        lines = output.rstrip('\n').split('\n')
+        element = parse_element(lines[1]) if len(lines) > 1 else None
+        return parse_geometry(lines[0]), element
+
+    def parse_button(self, output: str) -> Optional[ButtonInfo]:
+        return parse_button_info(output)
+
+
+class JXABackend(UIBackend):
+    """JavaScript for Automation returning JSON documents"""
+
+    name = "jxa"
+    locate_controls_script = JXA_LOCATE_CONTROLS_SCRIPT
+    query_element_script = JXA_QUERY_ELEMENT_SCRIPT
+    find_action_button_script = JXA_FIND_ACTION_BUTTON_SCRIPT
+
+    def parse_controls(self, output: str) -> Tuple[Optional[Geometry], Dict[str, UIElement]]:
+        data = _load(output)
+        if not isinstance(data, dict):
+            return None, {}
+        controls = {}
+        for name, value in (data.get("controls") or {}).items():
+            element = element_from_json(value)
+            if element is not None:
+                controls[name] = element
+        return _geometry(data), controls
+
+    def parse_query(self, output: str) -> Tuple[Optional[Geometry], Optional[UIElement]]:
+        data = _load(output)
+        if not isinstance(data, dict):
+            return None, None
+        return _geometry(data), element_from_json(data.get("element"))
+
+    def parse_button(self, output: str) -> Optional[ButtonInfo]:
+        element = element_from_json(_load(output))
+        return ButtonInfo.from_element(element) if element else None
+
+
+BACKENDS = {
+    AppleScriptBackend.name: AppleScriptBackend,
+    JXABackend.name: JXABackend,
+}
+
+_backend: Optional[UIBackend] = None
+
+
+def get_backend() -> UIBackend:
+    """Return the shared backend selected by CHATGPT_MCP_UI_BACKEND"""
+    global _backend
+    if _backend is None:
+        name = os.environ.get("CHATGPT_MCP_UI_BACKEND", AppleScriptBackend.name).strip().lower()
+        if name not in BACKENDS:
+            logger.warning(f"Unknown UI backend {name!r}, using {AppleScriptBackend.name}")
+            name = AppleScriptBackend.name
+        _backend = BACKENDS[name]()
+    return _backend
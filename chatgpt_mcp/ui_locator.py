@@ -0,0 +1,375 @@
+"""
+Cached locator for the ChatGPT controls the server interacts with.
+
+A single traversal of the window resolves the element path (chain of
+``UI element`` indexes from the window) and frame of the action button, the
+message input field, the New Chat control and the conversation scroll area. The result is cached per window
+and keyed by the window geometry. Later lookups query the cached path
+directly, which touches one element instead of scanning the window; the full
+scan runs again only when the cached element is gone, no longer matches, or
+the window has moved or been resized.
+
+The scripts are run by the UI backend (see ``ui_backend``), AppleScript unless
+CHATGPT_MCP_UI_BACKEND selects JXA.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from chatgpt_mcp.script_registry import register
+
+logger = logging.getLogger(__name__)
+
+ACTION_BUTTON = "action"
+INPUT_FIELD = "input"
+NEW_CHAT = "newchat"
+CONVERSATION = "conversation"
+
+# The action button is the rightmost button larger than this (in pixels)
+ACTION_BUTTON_MIN_SIZE = 45
+
+Geometry = Tuple[int, int, int, int]
+
+# AppleScript handlers shared by the locator scripts. Element records are
+# tab-separated:
+#   role, path, x, y, width, height, help, enabled, description
+ELEMENT_HANDLERS = r'''
+on describe(elem, elemPath)
+    tell application "System Events"
+        set elemPos to position of elem
+        set elemSize to size of elem
+        set helpText to ""
+        try
+            set elemHelp to help of elem
+            if elemHelp is not missing value then set helpText to elemHelp
+        end try
+        set descText to ""
+        try
+            set elemDesc to description of elem
+            if elemDesc is not missing value then set descText to elemDesc
+        end try
+        set isEnabled to false
+        try
+            set isEnabled to enabled of elem
+        end try
+        return (role of elem) & tab & elemPath & tab & (item 1 of elemPos) & tab & (item 2 of elemPos) & tab & ¬
+            (item 1 of elemSize) & tab & (item 2 of elemSize) & tab & helpText & tab & isEnabled & tab & descText
+    end tell
+end describe
+
+on geometryLine(win)
+    tell application "System Events"
+        set winPos to position of win
+        set winSize to size of win
+    end tell
+    return "window" & tab & (item 1 of winPos) & tab & (item 2 of winPos) & tab & (item 1 of winSize) & tab & (item 2 of winSize)
+end geometryLine
+
+on resolvePath(win, elemPath)
+    set elem to win
+    set AppleScript's text item delimiters to "/"
+    set indexes to text items of elemPath
+    set AppleScript's text item delimiters to ""
+    tell application "System Events"
+        repeat with idx in indexes
+            set elem to UI element (idx as integer) of elem
+        end repeat
+    end tell
+    return elem
+end resolvePath
+'''
+
+# argv: window index. Walks the window once and reports every control.
+LOCATE_CONTROLS_SCRIPT = register("locate_controls", r'''
+global actionRecord, actionX, inputRecord, newChatRecord, conversationRecord, conversationWidth
+
+on run argv
+    set windowIndex to (item 1 of argv) as integer
+    set actionRecord to ""
+    set actionX to -1
+    set inputRecord to ""
+    set newChatRecord to ""
+    set conversationRecord to ""
+    set conversationWidth to -1
+
+    tell application "System Events"
+        tell process "ChatGPT"
+            if not (exists window windowIndex) then return "missing"
+            set win to window windowIndex
+        end tell
+    end tell
+
+    set locateOutput to my geometryLine(win)
+    my walk(win, "", 0)
+    if actionRecord is not "" then set locateOutput to locateOutput & linefeed & "action" & tab & actionRecord
+    if inputRecord is not "" then set locateOutput to locateOutput & linefeed & "input" & tab & inputRecord
+    if newChatRecord is not "" then set locateOutput to locateOutput & linefeed & "newchat" & tab & newChatRecord
+    if conversationRecord is not "" then set locateOutput to locateOutput & linefeed & "conversation" & tab & conversationRecord
+    return locateOutput
+end run
+
+on walk(elem, elemPath, depth)
+    if depth > 10 then return
+    tell application "System Events"
+        set kids to UI elements of elem
+    end tell
+    repeat with i from 1 to count of kids
+        set kid to item i of kids
+        if elemPath is "" then
+            set kidPath to (i as text)
+        else
+            set kidPath to elemPath & "/" & i
+        end if
+        set kidRole to ""
+        try
+            tell application "System Events" to set kidRole to role of kid
+        end try
+        if kidRole is "AXButton" then
+            my considerButton(kid, kidPath)
+        else if kidRole is "AXTextArea" then
+            if inputRecord is "" then
+                try
+                    set inputRecord to my describe(kid, kidPath)
+                end try
+            end if
+        else if kidRole is not "AXStaticText" then
+            if kidRole is "AXScrollArea" then my considerScrollArea(kid, kidPath)
+            my walk(kid, kidPath, depth + 1)
+        end if
+    end repeat
+end walk
+
+on considerButton(btn, btnPath)
+    try
+        set btnRecord to my describe(btn, btnPath)
+        tell application "System Events"
+            set btnSize to size of btn
+            set btnPos to position of btn
+        end tell
+        if (item 1 of btnSize) > 45 and (item 2 of btnSize) > 45 and (item 1 of btnPos) > actionX then
+            set actionX to item 1 of btnPos
+            set actionRecord to btnRecord
+        end if
+        if newChatRecord is "" and btnRecord contains "New chat" then
+            set newChatRecord to btnRecord
+        end if
+    end try
+end considerButton
+
+-- The conversation is the widest scroll area (the sidebar is narrower)
+on considerScrollArea(area, areaPath)
+    try
+        tell application "System Events" to set areaSize to size of area
+        if (item 1 of areaSize) > conversationWidth then
+            set conversationWidth to item 1 of areaSize
+            set conversationRecord to my describe(area, areaPath)
+        end if
+    end try
+end considerScrollArea
+''' + ELEMENT_HANDLERS)
+
+# argv: window index, element path. Reports the window geometry and one element.
+QUERY_ELEMENT_SCRIPT = register("query_element", r'''
+on run argv
+    set windowIndex to (item 1 of argv) as integer
+    set elemPath to item 2 of argv
+
+    tell application "System Events"
+        tell process "ChatGPT"
+            if not (exists window windowIndex) then return "missing"
+            set win to window windowIndex
+        end tell
+    end tell
+
+    set queryOutput to my geometryLine(win)
+    if elemPath is "" then return queryOutput
+    try
+        return queryOutput & linefeed & my describe(my resolvePath(win, elemPath), elemPath)
+    on error
+        return queryOutput & linefeed & "missing"
+    end try
+end run
+''' + ELEMENT_HANDLERS)
+
+
+class LocatorError(Exception):
+    """Raised when the locator scripts cannot be run"""
+
+
+@dataclass(slots=True)
+class UIElement:
+    """Location and accessibility attributes of one control"""
+    role: str
+    path: str
+    x: int
+    y: int
+    width: int
+    height: int
+    help: Optional[str]
+    enabled: bool
+    description: Optional[str]
+
+    @property
+    def center(self) -> Tuple[int, int]:
+        return self.x + self.width // 2, self.y + self.height // 2
+
+
+@dataclass(slots=True)
+class ButtonInfo:
+    """State of the main action button (submit/stop/voice)"""
+    x: int
+    y: int
+    width: int
+    height: int
+    help: Optional[str]
+    enabled: bool
+    description: Optional[str]
+    state: str
+    path: Optional[str] = None
+
+    @classmethod
+    def from_element(cls, element: UIElement) -> "ButtonInfo":
+        return cls(element.x, element.y, element.width, element.height, element.help,
+                   element.enabled, element.description, state_from_help(element.help), element.path)
+
+
+def state_from_help(help_text: Optional[str]) -> str:
+    """Derive the action button state from its help text"""
+    if not help_text:
+        return 'waveform'
+    if 'Send message' in help_text:
+        return 'submit'
+    if 'Stop' in help_text:
+        return 'stop'
+    if 'Start voice' in help_text or 'voice conversation' in help_text:
+        return 'voice'
+    return 'unknown'
+
+
+def _number(value: str) -> int:
+    return int(float(value))
+
+
+def parse_element(record: str) -> Optional[UIElement]:
+    """Parse a tab-separated element record written by the ``describe`` handler"""
+    fields = record.rstrip('\n').split('\t')
+    if len(fields) < 9:
+        return None
+    try:
+        return UIElement(
+            role=fields[0],
+            path=fields[1],
+            x=_number(fields[2]),
+            y=_number(fields[3]),
+            width=_number(fields[4]),
+            height=_number(fields[5]),
+            help=fields[6] or None,
+            enabled=fields[7] == 'true',
+            description='\t'.join(fields[8:]) or None,
+        )
+    except ValueError:
+        return None
+
+
+def parse_geometry(line: str) -> Optional[Geometry]:
+    fields = line.split('\t')
+    if len(fields) != 5 or fields[0] != 'window':
+        return None
+    try:
+        return tuple(_number(v) for v in fields[1:])
+    except ValueError:
+        return None
+
+
+def is_action_button(element: Optional[UIElement]) -> bool:
+    return (element is not None and element.role == 'AXButton'
+            and element.width > ACTION_BUTTON_MIN_SIZE and element.height > ACTION_BUTTON_MIN_SIZE)
+
+
+class UILocator:
+    """Resolves and caches the controls of one ChatGPT window"""
+
+    def __init__(self, window: int = 1, backend=None):
+        from chatgpt_mcp.ui_backend import get_backend
+
+        self.window = window
+        self.backend = backend or get_backend()
+        self.geometry: Optional[Geometry] = None
+        self.controls: Dict[str, UIElement] = {}
+        self.stats = {"scans": 0, "hits": 0, "misses": 0}
+        self._scan_lock: Optional[asyncio.Lock] = None
+
+    def path(self, name: str) -> Optional[str]:
+        """Cached element path of a control, if known"""
+        element = self.controls.get(name)
+        return element.path if element else None
+
+    async def scan(self) -> Dict[str, UIElement]:
+        """Resolve all controls with one full traversal of the window"""
+        if self._scan_lock is None:
+            self._scan_lock = asyncio.Lock()
+        async with self._scan_lock:
+            self.stats["scans"] += 1
+            self.geometry, self.controls = await self.backend.locate_controls(self.window)
+            logger.debug(f"Located controls in window {self.window}: {sorted(self.controls)}")
+            return self.controls
+
+    async def locate(self, name: str) -> Optional[UIElement]:
+        """Return fresh attributes of a control, rescanning on a miss or resize.
+
+        Args:
+            name: ACTION_BUTTON, INPUT_FIELD, NEW_CHAT or CONVERSATION
+
+        Returns:
+            The element, or None if the window has no such control
+        """
+        cached = self.controls.get(name)
+        if cached is None:
+            if self.geometry is not None and await self._query_geometry() == self.geometry:
+                # Already scanned this layout and the control was not there
+                return None
+            await self.scan()
+            return self.controls.get(name)
+
+        geometry, element = await self._query(cached.path)
+        if geometry == self.geometry and element is not None and element.role == cached.role \
+                and (name != ACTION_BUTTON or is_action_button(element)):
+            self.stats["hits"] += 1
+            self.controls[name] = element
+            return element
+
+        self.stats["misses"] += 1
+        await self.scan()
+        return self.controls.get(name)
+
+    async def action_button(self) -> Optional[ButtonInfo]:
+        """Current state of the action button"""
+        element = await self.locate(ACTION_BUTTON)
+        if not is_action_button(element):
+            return None
+        return ButtonInfo.from_element(element)
+
+    def invalidate(self):
+        """Forget all cached controls"""
+        self.geometry = None
+        self.controls = {}
+
+    async def _query(self, path: str) -> Tuple[Optional[Geometry], Optional[UIElement]]:
+        return await self.backend.query_element(self.window, path)
+
+    async def _query_geometry(self) -> Optional[Geometry]:
+        geometry, _ = await self._query("")
+        return geometry
+
+
+_locators: Dict[int, UILocator] = {}
+
+
+def get_locator(window: int = 1) -> UILocator:
+    """Return the shared locator for a ChatGPT window"""
+    locator = _locators.get(window)
+    if locator is None:
+        locator = _locators[window] = UILocator(window)
+    return locator
@@ -0,0 +1,224 @@
+"""
+Pool of ChatGPT windows for running prompts in parallel.
+
+Each request leases one window for its whole exchange, so with N windows open
+up to N answers are generated at the same time. Waiting for the answer and
+reading it only query the leased window, but pasting, pressing Enter and
+clicking need the app and the window in front. Those focus-stealing steps go
+through ``focus_lock()`` and never overlap.
+
+System Events numbers windows front to back, so raising window N shifts
+windows 1..N-1 down by one until the script puts them back in front. A
+window's index is therefore only stable between focus-stealing scripts:
+the scripts that address a window by its index (probes, locator scans,
+extraction) hold ``window_read_lock()``, the shared side of the lock
+``focus_lock()`` takes exclusively, and never run while the order is
+disturbed.
+
+Configuration (environment variables):
+    CHATGPT_MCP_WINDOWS  number of ChatGPT windows to use (1); open them
+                         in the app before starting the server
+"""
+
+import asyncio
+import logging
+import os
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+IDLE = "idle"
+BUSY = "busy"
+
+# AppleScript handlers for the focus-stealing scripts
+RAISE_HANDLERS = r'''
+on raiseWindow(windowIndex)
+    if windowIndex > 1 then
+        tell application "System Events" to tell process "ChatGPT" to perform action "AXRaise" of window windowIndex
+    end if
+end raiseWindow
+
+-- Raising window N moved windows 1..N-1 down by one; raise each of them
+-- again (each is at index N in turn) so every window gets its index back.
+-- System Events delivers these after the keystrokes and clicks already sent.
+-- Scripts reading other windows wait for this (see window_read_lock).
+on restoreWindowOrder(windowIndex)
+    if windowIndex > 1 then
+        tell application "System Events"
+            tell process "ChatGPT"
+                repeat (windowIndex - 1) times
+                    perform action "AXRaise" of window windowIndex
+                end repeat
+            end tell
+        end tell
+    end if
+end restoreWindowOrder
+'''
+
+
+class WindowOrderLock:
+    """Shared/exclusive lock over the front-to-back order of the app's windows.
+
+    Scripts that address a window by its index hold it shared; scripts that
+    raise a window hold it exclusively. A waiting exclusive holder goes first:
+    new shared holders queue behind it, so steady polling cannot starve a paste.
+    Releasing never awaits, so a cancelled holder cannot leave it held.
+    """
+
+    def __init__(self):
+        self.readers = 0
+        self.writing = False
+        self.writers_waiting = 0
+        self._waiters: List[asyncio.Future] = []
+
+    @asynccontextmanager
+    async def shared(self):
+        while self.writing or self.writers_waiting:
+            await self._wait()
+        self.readers += 1
+        try:
+            yield
+        finally:
+            self.readers -= 1
+            self._wake()
+
+    @asynccontextmanager
+    async def exclusive(self):
+        self.writers_waiting += 1
+        try:
+            while self.writing or self.readers:
+                await self._wait()
+        finally:
+            self.writers_waiting -= 1
+        self.writing = True
+        try:
+            yield
+        finally:
+            self.writing = False
+            self._wake()
+
+    async def _wait(self):
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def _wake(self):
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+
+class WindowPool:
+    """Leases ChatGPT windows to requests and tracks their state"""
+
+    def __init__(self, size: Optional[int] = None):
+        if size is None:
+            size = int(os.environ.get("CHATGPT_MCP_WINDOWS", "1"))
+        self.size = max(1, size)
+        self.windows: List[int] = list(range(1, self.size + 1))
+        self.states: Dict[int, str] = {window: IDLE for window in self.windows}
+        self.stats = {"leases": 0, "waits": 0}
+
+        # Least recently used window first, to spread prompts across windows
+        self._idle: Deque[int] = deque(self.windows)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._available: Optional[asyncio.Condition] = None
+        self._order: Optional[WindowOrderLock] = None
+
+    def _bind(self):
+        """Create the asyncio primitives on first use, for the running loop.
+
+        The pool stays on that loop until it is closed; waiters and lock
+        holders on it would otherwise be orphaned by new primitives.
+        Synchronous callers reach it through ``run_sync``.
+
+        Raises:
+            RuntimeError: if used from another loop while its loop is open
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        if self._loop is not None and not self._loop.is_closed():
+            raise RuntimeError("The window pool is bound to another event loop; "
+                               "use it from the server loop (run_sync routes synchronous callers there)")
+        self._loop = loop
+        self._available = asyncio.Condition()
+        self._order = WindowOrderLock()
+
+    def focus_lock(self):
+        """Held exclusively while a script brings ChatGPT and one of its windows forward"""
+        self._bind()
+        return self._order.exclusive()
+
+    def window_read_lock(self):
+        """Held shared while a script addresses a window by its index"""
+        self._bind()
+        return self._order.shared()
+
+    @asynccontextmanager
+    async def lease(self, window: Optional[int] = None):
+        """Lease an idle window for the duration of the ``async with`` block.
+
+        Args:
+            window: Lease this window specifically; any idle window if None
+
+        Yields:
+            The window index
+        """
+        if window is not None and window not in self.states:
+            raise ValueError(f"Window {window} is not in the pool (size {self.size})")
+        self._bind()
+        async with self._available:
+            if not self._has_idle(window):
+                self.stats["waits"] += 1
+                await self._available.wait_for(lambda: self._has_idle(window))
+            if window is None:
+                window = self._idle.popleft()
+            else:
+                self._idle.remove(window)
+            self.states[window] = BUSY
+            self.stats["leases"] += 1
+
+        try:
+            yield window
+        finally:
+            self.states[window] = IDLE
+            self._idle.append(window)
+            if self._available is not None:
+                async with self._available:
+                    self._available.notify_all()
+
+    def _has_idle(self, window: Optional[int]) -> bool:
+        return window in self._idle if window is not None else bool(self._idle)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Window states and lease counters"""
+        return {"size": self.size, "states": dict(self.states), **self.stats}
+
+
+_pool: Optional[WindowPool] = None
+
+
+def get_pool() -> WindowPool:
+    """Return the window pool shared by all tools"""
+    global _pool
+    if _pool is None:
+        _pool = WindowPool()
+    return _pool
+
+
+def focus_lock():
+    """Lock serializing the focus-stealing steps (activate, paste, click)"""
+    return get_pool().focus_lock()
+
+
+def window_read_lock():
+    """Lock keeping the window order still while a script reads a window by index"""
+    return get_pool().window_read_lock()
@@ -0,0 +1,89 @@
+"""
+Framed output of the extraction scripts.
+
+Scripts that return many texts separate them with ASCII control characters
+instead of building JSON: records are separated by RS (0x1E) and the fields
+of a record by US (0x1F). Neither character occurs in UI text, so nothing is
+escaped on the AppleScript side, where every escaping pass walks the whole
+text again, and the texts can be joined with one text-item-delimiter pass.
+
+A frame is a header record followed by one record per text:
+
+    ok US <conversation complete: true|false> RS text RS text ...
+    error US <message>
+
+The parser is a generator pipeline: ``iter_records`` takes the output as one
+string or as chunks read from a pipe and yields records as soon as their
+separator arrives, without splitting the output into a list first. The
+readers of large frames ask the script runner for ``chunked`` output, so
+the output arrives as the worker's reply lines (or the spawned process's
+reads) and is never held as one string; ``drain_chunks`` hands the chunks
+to the parser and drops each once it is parsed. A script only returns its
+frame when it finishes, so the saving is memory, not the wait for the output.
+"""
+
+from typing import Iterable, Iterator, List, Tuple, Union
+
+RS = "\x1e"  # record separator
+US = "\x1f"  # unit separator
+
+# The same separators, for the AppleScript side
+APPLESCRIPT_SEPARATORS = '''
+property recordSeparator : character id 30
+property unitSeparator : character id 31
+'''
+
+
+def drain_chunks(output: Union[str, List[str]]) -> Union[str, Iterator[str]]:
+    """Chunked output as an iterator that removes each chunk from the list as it goes.
+
+    Once the parser has moved past a chunk nothing refers to it any more, so
+    at most one chunk of the output stays in memory. A string is returned as is.
+    """
+    if isinstance(output, str):
+        return output
+
+    def chunks():
+        output.reverse()
+        while output:
+            yield output.pop()
+    return chunks()
+
+
+def iter_records(output: Union[str, Iterable[str]]) -> Iterator[str]:
+    """Yield the RS-separated records of a frame.
+
+    Args:
+        output: The whole output, or chunks of it in order (e.g. read from a pipe)
+    """
+    chunks = (output,) if isinstance(output, str) else output
+    pending = ""
+    for chunk in chunks:
+        if pending:
+            chunk = pending + chunk
+        start = 0
+        end = chunk.find(RS)
+        while end >= 0:
+            yield chunk[start:end]
+            start = end + 1
+            end = chunk.find(RS, start)
+        pending = chunk[start:]
+    # The output ends with the last record, possibly followed by the newline osascript adds
+    pending = pending.rstrip("\n")
+    if pending:
+        yield pending
+
+
+def read_frame(output: Union[str, Iterable[str]]) -> Tuple[str, List[str], Iterator[str]]:
+    """Split a frame into its status, the header's other fields and the texts.
+
+    Returns:
+        The status ("ok", "error", or "" for output that is not a frame), the
+        remaining header fields and an iterator over the texts
+    """
+    records = iter_records(output)
+    header = next(records, "")
+    if US not in header:
+        return "", [header], records
+    status, *fields = header.split(US)
+    return status, fields, records